@@ -0,0 +1,164 @@
+"""
+Cache layer benchmarks: each layer on its own and CacheManager combined.
+
+Uses the Redis server at REDIS_URL when it is reachable, otherwise an
+in-process fakeredis (which measures client-side cost only).
+"""
+import os
+import random
+import tempfile
+from typing import Any, Dict, List
+
+import fakeredis
+
+from src import metrics
+from src.cache import CacheManager, FileCache, MemoryCache, RedisCache, SQLiteCache, get_codec
+from .fixtures import make_parse_payload, make_player_record
+from .harness import measure
+
+def make_redis_cache() -> RedisCache:
+    url = os.getenv('REDIS_URL')
+    if url:
+        cache = RedisCache(url)
+        if cache.ping():
+            cache.backend = 'redis'
+            return cache
+    cache = RedisCache()
+    cache.redis = fakeredis.FakeRedis()
+    cache.backend = 'fakeredis'
+    return cache
+
+def bench_layer(name: str, layer: Any, records: int, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    keys = [f'player:{i}' for i in range(records)]
+    values = [make_player_record(i) for i in range(records)]
+    lookups = [random.randrange(records) for _ in range(records)]
+    extra = {'backend': getattr(layer, 'backend', name)}
+    results = []
+
+    results.append(measure(
+        f'cache.{name}.set', lambda i: layer.set(keys[i], values[i], 3600), records,
+        setup=layer.clear, **extra,
+    ))
+    results.append(measure(
+        f'cache.{name}.get', lambda i: layer.get(keys[lookups[i]]), records,
+        track_memory=False, **extra,
+    ))
+    if hasattr(layer, 'get_many'):
+        batch = 100
+        results.append(measure(
+            f'cache.{name}.get_many[{batch}]',
+            lambda i: layer.get_many(keys[(i * batch) % records:(i * batch) % records + batch]),
+            max(1, records // batch), track_memory=False, **extra,
+        ))
+
+    parse_codec = get_codec('parse')
+    def set_page(i):
+        if isinstance(layer, MemoryCache):
+            layer.set(f'parse:{i}', pages[i % len(pages)], 3600)
+        else:
+            layer.set(f'parse:{i}', pages[i % len(pages)], 3600, codec=parse_codec)
+    results.append(measure(f'cache.{name}.set_parse_page', set_page, len(pages) * 2, **extra))
+    results.append(measure(
+        f'cache.{name}.get_parse_page', lambda i: layer.get(f'parse:{i % (len(pages) * 2)}'),
+        len(pages) * 2, track_memory=False, **extra,
+    ))
+    layer.clear()
+    return results
+
+def bench_manager(records: int) -> List[Dict[str, Any]]:
+    """Combined CacheManager: cold reads from the file layer, then warm reads from memory."""
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        manager = CacheManager(cache_dir=cache_dir)
+        manager.redis_cache = make_redis_cache()
+        keys = [f'player:{i}' for i in range(records)]
+        extra = {'backend': manager.redis_cache.backend}
+
+        results.append(measure(
+            'cache.manager.set', lambda i: manager.set(keys[i], make_player_record(i), 'player'), records,
+            track_memory=False, **extra,
+        ))
+
+        def drop_fast_layers():
+            manager.memory_cache.clear()
+            manager.redis_cache.clear()
+        results.append(measure(
+            'cache.manager.get_cold', lambda i: manager.get(keys[i], 'player'), records,
+            setup=drop_fast_layers, track_memory=False, **extra,
+        ))
+        results.append(measure(
+            'cache.manager.get_warm', lambda i: manager.get(keys[i], 'player'), records,
+            track_memory=False, **extra,
+        ))
+        # Same reads with instrumentation switched off, to keep its overhead visible
+        was_enabled = metrics.is_enabled()
+        metrics.disable()
+        try:
+            results.append(measure(
+                'cache.manager.get_warm.metrics_off', lambda i: manager.get(keys[i], 'player'), records,
+                track_memory=False, **extra,
+            ))
+        finally:
+            if was_enabled:
+                metrics.enable()
+
+        batch = 500
+        results.append(measure(
+            f'cache.manager.get_many_cold[{batch}]',
+            lambda i: manager.get_many(keys[i * batch:(i + 1) * batch], 'player'),
+            max(1, records // batch), setup=drop_fast_layers, track_memory=False, **extra,
+        ))
+        manager.close()
+    return results
+
+def bench_snapshot(records: int) -> List[Dict[str, Any]]:
+    """Warm restart: export a snapshot, load it in a fresh manager, then first reads against it."""
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, 'warm.snap')
+        data = {f'player:{i}': make_player_record(i) for i in range(records)}
+        source = CacheManager(cache_dir=os.path.join(cache_dir, 'source'))
+        source.memory_cache.max_size = records
+        source.memory_cache.set_many(data, source.ttls['player'])
+        results.append(measure(
+            'cache.snapshot.export', lambda i: source.export_snapshot(path), 1,
+            track_memory=False, records=records,
+        ))
+        results[-1]['bytes'] = os.path.getsize(path)
+
+        replica = CacheManager(cache_dir=os.path.join(cache_dir, 'replica'))
+        replica.memory_cache.max_size = records
+        results.append(measure(
+            'cache.snapshot.load', lambda i: replica.load_snapshot(path), 1, records=records,
+        ))
+        keys = list(data)
+        random.Random(0).shuffle(keys)
+        results.append(measure(
+            'cache.snapshot.get_first', lambda i: replica.get(keys[i], 'player'), records,
+            track_memory=False,
+        ))
+
+        # The per-key path a snapshot replaces
+        fresh = CacheManager(cache_dir=os.path.join(cache_dir, 'fresh'))
+        results.append(measure(
+            'cache.manager.warmup', lambda i: fresh.warmup(data, 'player'), 1,
+            track_memory=False, records=records,
+        ))
+    return results
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    records = 2000 if quick else 20000
+    pages = [make_parse_payload(f'Tournament {i}', matches=300, seed=i) for i in range(4 if quick else 10)]
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        layers = {
+            'memory': MemoryCache(max_size=records * 2, max_bytes=512 * 1024 * 1024),
+            'redis': make_redis_cache(),
+            'file_json': FileCache(os.path.join(cache_dir, 'json')),
+            'file_sqlite': SQLiteCache(os.path.join(cache_dir, 'sqlite')),
+        }
+        for name, layer in layers.items():
+            results.extend(bench_layer(name, layer, records, pages))
+    results.extend(bench_manager(records))
+    results.extend(bench_snapshot(10000 if quick else 100000))
+    return results
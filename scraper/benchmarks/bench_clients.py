@@ -0,0 +1,245 @@
+"""
+Client and crawl benchmarks against the local Liquipedia stand-in.
+
+Budgets from RATE_LIMITS are scaled by TIME_SCALE on both the server and
+the client limiters, so a run exercises the real ratios between the
+general and parse budgets in a fraction of the wall time.
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+import fakeredis
+import requests
+
+from src.cache import CacheManager, RevisionParseCache
+from src.clients import AsyncLiquipediaClient, LiquipediaClient, RedisTokenBucket, TokenBucket
+from src.config import RATE_LIMITS
+from src.scraper import FetchScheduler, Priority
+from .harness import measure, percentile
+from .server import StandInServer
+
+TIME_SCALE = 0.01
+
+def scaled_bucket(service: str, budget: str) -> TokenBucket:
+    limit = RATE_LIMITS[service][budget]
+    return TokenBucket(limit['calls'], limit['period'] * TIME_SCALE)
+
+def unthrottled_client(url: str) -> LiquipediaClient:
+    """Sync client with effectively unlimited budgets; the stand-in sets the pace instead."""
+    unlimited = TokenBucket(10 ** 9, 1)
+    return anonymous(lambda: LiquipediaClient(base_url=url, limiter=unlimited, parse_limiter=unlimited))
+
+def anonymous(factory):
+    with patch.dict(os.environ, {'LIQUIPEDIA_USERNAME': '', 'LIQUIPEDIA_PASSWORD': ''}):
+        return factory()
+
+def bench_base_client(requests: int) -> List[Dict[str, Any]]:
+    """Raw request latency of the sync BaseClient with limits disabled."""
+    with StandInServer(enforce_limits=False) as server:
+        client = unthrottled_client(f'{server.url}/api.php')
+        results = [measure(
+            'client.base.get_page_info',
+            lambda i: client.get_page_info(f'Tournament {i}'),
+            requests, track_memory=False,
+        )]
+        results.append(measure(
+            'client.base.get_parsed_page',
+            lambda i: client.get_parsed_page(f'Tournament {i}'),
+            max(1, requests // 10), track_memory=False,
+        ))
+    return results
+
+def bench_async_budget(titles: int) -> List[Dict[str, Any]]:
+    """How fully gather_pages uses the scaled general and parse budgets."""
+    results = []
+    with StandInServer(time_scale=TIME_SCALE, response_delay=0.005) as server:
+        for parsed, budget in ((False, 'general'), (True, 'parse')):
+            count = titles if not parsed else max(2, titles // 5)
+
+            async def scenario():
+                client = AsyncLiquipediaClient(
+                    base_url=f'{server.url}/api.php',
+                    limiter=scaled_bucket('liquipedia', 'general'),
+                    parse_limiter=scaled_bucket('liquipedia', 'parse'),
+                )
+                async with client:
+                    start = time.perf_counter()
+                    await client.gather_pages([f'Tournament {i}' for i in range(count)], parsed=parsed)
+                    return time.perf_counter() - start
+
+            throttled_before = server.stats['throttled']
+            elapsed = anonymous(lambda: asyncio.run(scenario()))
+            limit = RATE_LIMITS['liquipedia'][budget]
+            budget_rate = limit['calls'] / (limit['period'] * TIME_SCALE)
+            # The bucket starts full, so the first `calls` requests are free
+            achieved = (count - limit['calls']) / elapsed if elapsed else float('inf')
+            results.append({
+                'benchmark': f'client.async.gather_pages.{budget}',
+                'iterations': count,
+                'ops_per_sec': count / elapsed,
+                'budget_utilization': achieved / budget_rate,
+                'throttled': server.stats['throttled'] - throttled_before,
+                'p50_us': None,
+                'p99_us': None,
+                'peak_kib': None,
+            })
+    return results
+
+def bench_shared_budget(workers: int, requests_per_worker: int) -> List[Dict[str, Any]]:
+    """
+    Several workers sharing the general budget, each with its own client and limiter.
+
+    'local' gives every worker a private bucket (the per-process setup);
+    'redis' points them all at one bucket, as separate processes would.
+    """
+    results = []
+    limit = RATE_LIMITS['liquipedia']['general']
+    period = limit['period'] * TIME_SCALE
+    for backend in ('local', 'redis'):
+        redis_server = fakeredis.FakeServer()
+
+        def make_limiter():
+            if backend == 'local':
+                return TokenBucket(limit['calls'], period)
+            client = fakeredis.FakeRedis(server=redis_server)
+            return RedisTokenBucket(client, 'ratelimit:liquipedia:general', limit['calls'], period)
+
+        with StandInServer(time_scale=TIME_SCALE) as server:
+            clients = [
+                anonymous(lambda: LiquipediaClient(base_url=f'{server.url}/api.php', limiter=make_limiter()))
+                for _ in range(workers)
+            ]
+
+            failed = []
+
+            def work(client, worker):
+                for i in range(requests_per_worker):
+                    try:
+                        client.get_page_info(f'Tournament {worker}-{i}')
+                    except requests.HTTPError:
+                        # Still throttled after every retry
+                        failed.append(i)
+
+            threads = [threading.Thread(target=work, args=(c, n)) for n, c in enumerate(clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+        count = workers * requests_per_worker
+        results.append({
+            'benchmark': f'client.shared_budget.{backend}',
+            'iterations': count,
+            'ops_per_sec': count / elapsed,
+            'budget_utilization': (count - limit['calls']) / elapsed / (limit['calls'] / period),
+            'throttled': server.stats['throttled'],
+            'failed': len(failed),
+            'p50_us': None, 'p99_us': None, 'peak_kib': None,
+        })
+    return results
+
+def bench_scheduler(parse_jobs: int, info_jobs: int) -> List[Dict[str, Any]]:
+    """Mixed parse and info jobs through FetchScheduler; how busy each budget stays."""
+    with StandInServer(time_scale=TIME_SCALE) as server, tempfile.TemporaryDirectory() as cache_dir:
+        client = anonymous(lambda: LiquipediaClient(
+            base_url=f'{server.url}/api.php',
+            limiter=scaled_bucket('liquipedia', 'general'),
+            parse_limiter=scaled_bucket('liquipedia', 'parse'),
+        ))
+        manager = CacheManager(cache_dir=cache_dir)
+        scheduler = FetchScheduler(client, manager, batch_size=5)
+        priorities = list(Priority)
+        for i in range(parse_jobs):
+            scheduler.submit('parse', f'Tournament {i}', priority=priorities[i % len(priorities)])
+        for i in range(info_jobs):
+            scheduler.submit('info', f'Player {i}', priority=priorities[i % len(priorities)])
+
+        start = time.perf_counter()
+        scheduler.start()
+        scheduler.join()
+        elapsed = time.perf_counter() - start
+        scheduler.stop()
+        manager.close()
+
+    def utilization(budget, requests):
+        limit = RATE_LIMITS['liquipedia'][budget]
+        return max(0, requests - limit['calls']) / elapsed / (limit['calls'] / (limit['period'] * TIME_SCALE))
+
+    return [{
+        'benchmark': 'client.scheduler.mixed',
+        'iterations': parse_jobs + info_jobs,
+        'ops_per_sec': (parse_jobs + info_jobs) / elapsed,
+        'general_utilization': utilization('general', scheduler.stats['general_requests']),
+        'budget_utilization': utilization('parse', scheduler.stats['parse_requests']),
+        'throttled': server.stats['throttled'],
+        'p50_us': None, 'p99_us': None, 'peak_kib': None,
+    }]
+
+def bench_crawl(pages: int) -> List[Dict[str, Any]]:
+    """Category walk, batched revision checks and parse caching over the stand-in."""
+    results = []
+    with StandInServer(enforce_limits=False, category_size=pages) as server, \
+            tempfile.TemporaryDirectory() as cache_dir:
+        client = unthrottled_client(f'{server.url}/api.php')
+
+        before = server.stats['requests']
+        start = time.perf_counter()
+        titles = [member['title'] for member in client.iter_category_members('Category:Tournaments')]
+        elapsed = time.perf_counter() - start
+        results.append({
+            'benchmark': 'crawl.category_walk',
+            'iterations': len(titles),
+            'ops_per_sec': len(titles) / elapsed,
+            'requests': server.stats['requests'] - before,
+            'p50_us': None, 'p99_us': None, 'peak_kib': None,
+        })
+
+        before = server.stats['requests']
+        start = time.perf_counter()
+        client.get_pages_info(titles)
+        elapsed = time.perf_counter() - start
+        results.append({
+            'benchmark': 'crawl.batched_page_info',
+            'iterations': len(titles),
+            'ops_per_sec': len(titles) / elapsed,
+            'requests': server.stats['requests'] - before,
+            'p50_us': None, 'p99_us': None, 'peak_kib': None,
+        })
+
+        parse_cache = RevisionParseCache(client, CacheManager(cache_dir=cache_dir))
+        sample = titles[:min(len(titles), 50)]
+        for phase in ('cold', 'warm'):
+            timings = []
+            start = time.perf_counter()
+            for offset in range(0, len(sample), 10):
+                t0 = time.perf_counter()
+                parse_cache.get_parsed_pages(sample[offset:offset + 10])
+                timings.append(time.perf_counter() - t0)
+            elapsed = time.perf_counter() - start
+            results.append({
+                'benchmark': f'crawl.parse_cycle.{phase}',
+                'iterations': len(sample),
+                'ops_per_sec': len(sample) / elapsed,
+                'p50_us': percentile(timings, 50) * 1e6,
+                'p99_us': percentile(timings, 99) * 1e6,
+                'peak_kib': None,
+                **parse_cache.stats,
+            })
+        parse_cache.cache_manager.close()
+    return results
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    results = []
+    results.extend(bench_base_client(50 if quick else 300))
+    results.extend(bench_async_budget(40 if quick else 200))
+    results.extend(bench_shared_budget(3, 15 if quick else 60))
+    results.extend(bench_scheduler(8 if quick else 30, 60 if quick else 300))
+    results.extend(bench_crawl(500 if quick else 2000))
+    return results
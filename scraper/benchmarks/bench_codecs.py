@@ -0,0 +1,74 @@
+"""
+Compare cache codecs on realistic action=parse payloads.
+
+Run from the scraper directory:
+
+    python -m benchmarks.bench_codecs --pages 20 --matches 300
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+from src.cache.codecs import Codec, decode
+from .fixtures import make_parse_payload
+
+COMBINATIONS = [
+    (fmt, compression)
+    for fmt in ('json', 'orjson', 'msgpack')
+    for compression in ('none', 'zlib', 'zstd')
+]
+
+def bench_codec(fmt: str, compression: str, payloads: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    codec = Codec(format=fmt, compression=compression, threshold=1024)
+    encoded = [codec.encode(payload) for payload in payloads]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for payload in payloads:
+            codec.encode(payload)
+    encode_time = (time.perf_counter() - start) / (repeat * len(payloads))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for data in encoded:
+            decode(data)
+    decode_time = (time.perf_counter() - start) / (repeat * len(payloads))
+
+    return {
+        # Report what was actually used if an optional library is missing
+        'codec': f'{codec.format}+{codec.compression}',
+        'avg_bytes': sum(len(data) for data in encoded) / len(encoded),
+        'encode_ms': encode_time * 1000,
+        'decode_ms': decode_time * 1000,
+    }
+
+def main(argv: List[str] = None) -> List[Dict[str, Any]]:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--matches', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    payloads = [make_parse_payload(f'Tournament {i}', args.matches, seed=i) for i in range(args.pages)]
+    baseline = sum(len(json.dumps(p)) for p in payloads) / len(payloads)
+    print(f"plain json.dumps: {baseline / 1024:.0f} KiB per page")
+
+    results = []
+    for fmt, compression in COMBINATIONS:
+        result = bench_codec(fmt, compression, payloads, args.repeat)
+        result['ratio'] = result['avg_bytes'] / baseline
+        results.append(result)
+        print(
+            f"{result['codec']:>14} | {result['avg_bytes'] / 1024:>7.1f} KiB ({result['ratio']:>5.1%}) | "
+            f"encode {result['encode_ms']:>6.2f} ms | decode {result['decode_ms']:>6.2f} ms"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare the persistent cache layers (FileCache vs SQLiteCache).
+
+Run from the scraper directory:
+
+    python -m benchmarks.bench_file_layers --sizes 10000,100000
+    python -m benchmarks.bench_file_layers --sizes 1000000 --backends sqlite
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from src.cache import FileCache, SQLiteCache
+from .fixtures import make_player_record
+
+BACKENDS = {
+    'json': FileCache,
+    'sqlite': SQLiteCache,
+}
+
+def bench_backend(name: str, size: int, reads: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = BACKENDS[name](cache_dir)
+        keys = [f'player:{i}' for i in range(size)]
+        records = {key: make_player_record(i) for i, key in enumerate(keys)}
+
+        start = time.perf_counter()
+        if hasattr(cache, 'set_many'):
+            cache.set_many(records, ttl=3600)
+        else:
+            for key, value in records.items():
+                cache.set(key, value, ttl=3600)
+        bulk_set = time.perf_counter() - start
+
+        sample = random.sample(keys, min(reads, size))
+        start = time.perf_counter()
+        for key in sample:
+            cache.set(key, records[key], ttl=3600)
+        single_set = time.perf_counter() - start
+
+        # Reopen to measure reads without warm in-process state
+        cache = BACKENDS[name](cache_dir)
+        start = time.perf_counter()
+        for key in sample:
+            cache.get(key)
+        single_get = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if hasattr(cache, 'get_many'):
+            cache.get_many(sample)
+        else:
+            for key in sample:
+                cache.get(key)
+        bulk_get = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cache.cleanup_expired()
+        cleanup = time.perf_counter() - start
+
+        return {
+            'backend': name,
+            'entries': size,
+            'bulk_set_per_sec': size / bulk_set,
+            'set_per_sec': len(sample) / single_set,
+            'get_per_sec': len(sample) / single_get,
+            'bulk_get_per_sec': len(sample) / bulk_get,
+            'cleanup_seconds': cleanup,
+        }
+
+def main(argv: List[str] = None) -> List[Dict[str, Any]]:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000')
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    parser.add_argument('--reads', type=int, default=5000)
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(',')):
+        for name in args.backends.split(','):
+            result = bench_backend(name, size, args.reads)
+            results.append(result)
+            print(
+                f"{name:>6} {size:>8} entries | "
+                f"bulk set {result['bulk_set_per_sec']:>9.0f}/s | "
+                f"set {result['set_per_sec']:>8.0f}/s | "
+                f"get {result['get_per_sec']:>8.0f}/s | "
+                f"bulk get {result['bulk_get_per_sec']:>9.0f}/s | "
+                f"cleanup {result['cleanup_seconds']:.3f}s"
+            )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Extraction benchmarks: parsed tournament pages to records.
+
+Throughput is reported in pages/sec. Peak memory is measured while only
+counting records, so it reflects the tokenizer itself and should stay
+flat as pages grow. The pipeline benchmark reads pages from a file
+cache on 1..N worker processes and reports the speedup over extracting
+in-process.
+"""
+import os
+import tempfile
+import time
+from collections import deque
+from typing import Any, Dict, List
+
+from data_processor import PagePipeline, extract_page, iter_records
+from src.cache import CacheManager, RevisionParseCache
+from .fixtures import make_parse_payload
+from .harness import measure
+
+def bench_extract(matches: int, pages: int) -> List[Dict[str, Any]]:
+    payloads = [make_parse_payload(f'Tournament {i}', matches=matches, seed=i) for i in range(pages)]
+    page_kib = len(payloads[0]['parse']['text']['*']) / 1024
+    results = []
+
+    def stream(i: int) -> None:
+        # Consume without keeping anything, as a streaming consumer would
+        deque(iter_records(payloads[i]['parse']['text']['*']), maxlen=0)
+
+    for name, fn in (
+        (f'processor.iter_records.{matches}_matches', stream),
+        (f'processor.extract_page.{matches}_matches', lambda i: extract_page(payloads[i])),
+    ):
+        result = measure(name, fn, pages, page_kib=round(page_kib))
+        result['pages_per_sec'] = result['ops_per_sec']
+        result['mib_per_sec'] = result['ops_per_sec'] * page_kib / 1024
+        results.append(result)
+    return results
+
+def bench_pipeline(pages: int, matches: int = 300) -> List[Dict[str, Any]]:
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({0, 1, 2, cpus} | ({cpus // 2} if cpus > 4 else set()))
+    titles = [f'Tournament {i}' for i in range(pages)]
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        parse_cache = RevisionParseCache(None, CacheManager(cache_dir=cache_dir, file_backend='sqlite'))
+        for i, title in enumerate(titles):
+            payload = make_parse_payload(title, matches=matches, seed=i)
+            parse_cache.store(title, payload['parse']['revid'], payload)
+
+        baseline = None
+        for workers in worker_counts:
+            with PagePipeline(cache_dir=cache_dir, file_backend='sqlite', workers=workers) as pipeline:
+                # Start the pool outside the timed run
+                list(pipeline.process_titles(titles[:max(1, workers)]))
+                start = time.perf_counter()
+                extracted = sum(records is not None for _, records in pipeline.process_titles(titles))
+                elapsed = time.perf_counter() - start
+            pages_per_sec = extracted / elapsed
+            baseline = baseline or pages_per_sec
+            results.append({
+                'benchmark': f'processor.pipeline.{workers}_workers',
+                'workers': workers,
+                'cpus': cpus,
+                'pages': extracted,
+                'pages_per_sec': pages_per_sec,
+                'speedup': pages_per_sec / baseline,
+            })
+    return results
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    results = []
+    for matches in (100, 300, 1000):
+        results.extend(bench_extract(matches, pages=3 if quick else 10))
+    results.extend(bench_pipeline(pages=16 if quick else 64))
+    return results
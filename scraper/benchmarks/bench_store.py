@@ -0,0 +1,51 @@
+"""
+Columnar results store benchmarks: ingestion rate and query latency over
+millions of match rows.
+"""
+import random
+import time
+from typing import Any, Dict, List
+
+from data_processor import Match
+from src.results_store import ResultsStore
+from .fixtures import player_names
+from .harness import measure
+
+def build_store(rows: int, per_tournament: int = 1000, players: int = 1000) -> Dict[str, Any]:
+    rng = random.Random(0)
+    names = player_names(players)
+    store = ResultsStore()
+    ingest_seconds = 0.0
+    for t in range(rows // per_tournament):
+        matches = []
+        for _ in range(per_tournament):
+            first, second = rng.sample(names, 2)
+            first_wins = rng.random() < 0.5
+            matches.append(Match(
+                None, first, second, 2 if first_wins else 1, 1 if first_wins else 2,
+                first if first_wins else second, 3, 1600000000 + rng.randrange(10 ** 8),
+            ))
+        start = time.perf_counter()
+        store.add_matches(f'Tournament {t}', 'starcraft2' if t % 2 else 'counterstrike', matches)
+        ingest_seconds += time.perf_counter() - start
+    return {'store': store, 'names': names, 'ingest_seconds': ingest_seconds}
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    rows = 200_000 if quick else 2_000_000
+    built = build_store(rows)
+    store, names = built['store'], built['names']
+    extra = {'rows': store.matches.size}
+    iterations = 5 if quick else 10
+    return [
+        {
+            'benchmark': 'store.ingest',
+            'rows': store.matches.size,
+            'rows_per_sec': store.matches.size / built['ingest_seconds'],
+        },
+        measure('store.win_rates', lambda i: store.win_rates(limit=20), iterations, track_memory=False, **extra),
+        measure('store.win_rates.game', lambda i: store.win_rates(game='starcraft2', limit=20), iterations,
+                track_memory=False, **extra),
+        measure('store.head_to_head', lambda i: store.head_to_head(names[i], names[-i - 1]), iterations,
+                track_memory=False, **extra),
+        measure('store.form', lambda i: store.form(last=10, limit=20), iterations, **extra),
+    ]
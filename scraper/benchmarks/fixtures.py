@@ -0,0 +1,126 @@
+"""
+Synthetic Liquipedia payloads with realistic structure and size.
+
+The HTML mirrors the markup produced by Liquipedia's bracket, prize pool
+and infobox templates so that it exercises the same code paths as real
+action=parse output.
+"""
+import random
+from typing import Any, Dict, List
+
+RACES = ('Terran', 'Zerg', 'Protoss')
+MAPS = ('Alcyone', 'Amphion', 'Crimson Court', 'Dynasty', 'Ghost River', 'Goldenaura', 'Oceanborn', 'Post-Youth')
+
+def player_names(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    syllables = ('ma', 'ru', 'ser', 'ral', 'clem', 'dark', 'rog', 'her', 'o', 'sh', 'zest', 'sol', 'key', 'byun', 'tra')
+    names = set()
+    while len(names) < count:
+        names.add(''.join(rng.choice(syllables) for _ in range(rng.randint(2, 3))).capitalize())
+    return sorted(names)
+
+def _player_block(name: str, race: str) -> str:
+    return (
+        f'<div class="block-player"><span class="race-icon"><img alt="{race}" src="/commons/images/{race}_icon.png"></span>'
+        f'<span class="name"><a href="/starcraft2/{name}" title="{name}">{name}</a></span></div>'
+    )
+
+def _match_html(rng: random.Random, players: List[str], best_of: int) -> str:
+    first, second = rng.sample(players, 2)
+    wins_needed = best_of // 2 + 1
+    loser_score = rng.randint(0, wins_needed - 1)
+    first_wins = rng.random() < 0.5
+    scores = (wins_needed, loser_score) if first_wins else (loser_score, wins_needed)
+
+    entries = []
+    for name, score, won in ((first, scores[0], first_wins), (second, scores[1], not first_wins)):
+        win_class = ' brkts-opponent-win' if won else ''
+        entries.append(
+            f'<div class="brkts-opponent-entry brkts-opponent-hover" aria-label="{name}">'
+            f'<div class="brkts-opponent-entry-left">{_player_block(name, rng.choice(RACES))}</div>'
+            f'<div class="brkts-opponent-score-outer"><div class="brkts-opponent-score-inner{win_class}">{score}</div></div>'
+            f'</div>'
+        )
+
+    games = ''.join(
+        f'<div class="brkts-popup-body-element brkts-popup-body-game">'
+        f'<div class="brkts-popup-spaced">{rng.choice(MAPS)}</div>'
+        f'<div class="brkts-popup-body-element-thumbs"><i class="fa fa-check forest-green-text"></i></div>'
+        f'</div>'
+        for _ in range(sum(scores))
+    )
+    popup = (
+        f'<div class="brkts-match-info brkts-match-info-popup" style="display:none">'
+        f'<div class="brkts-popup-header-dev">{_player_block(first, "Terran")}{_player_block(second, "Zerg")}</div>'
+        f'<div class="brkts-popup-body"><span class="timer-object" data-timestamp="{rng.randint(1600000000, 1700000000)}">'
+        f'</span>{games}</div><div class="brkts-popup-comment">Best of {best_of}</div></div>'
+    )
+    return f'<div class="brkts-match brkts-match-popup-wrapper">{entries[0]}{entries[1]}{popup}</div>'
+
+def make_tournament_html(matches: int = 300, participants: int = 64, seed: int = 0, name: str = 'Tournament') -> str:
+    """Tournament page HTML with an infobox, participants, brackets and a prize pool table."""
+    rng = random.Random(seed)
+    players = player_names(participants, seed)
+    prize_pool = rng.choice((25000, 50000, 100000, 250000))
+
+    parts = [
+        '<div class="mw-parser-output"><div class="fo-nttax-infobox-wrapper infobox-starcraft2">',
+        f'<div class="infobox-header">{name}</div>',
+        '<div><div class="infobox-cell-2 infobox-description">Prize Pool:</div>'
+        f'<div class="infobox-cell-2">${prize_pool:,}&#160;USD</div></div>',
+        '<div><div class="infobox-cell-2 infobox-description">Date:</div><div class="infobox-cell-2">2024-05-01</div></div>',
+        '</div><h2><span class="mw-headline" id="Participants">Participants</span></h2>',
+        '<div class="participantTable">',
+    ]
+    for player in players:
+        parts.append(f'<div class="participantTable-entry">{_player_block(player, rng.choice(RACES))}</div>')
+    parts.append('</div><h2><span class="mw-headline" id="Results">Results</span></h2><div class="brkts-bracket">')
+    for i in range(matches):
+        if i % 32 == 0:
+            parts.append(f'<div class="brkts-round-header"><div class="brkts-header">Round {i // 32 + 1}</div></div>')
+        parts.append(_match_html(rng, players, best_of=rng.choice((3, 5, 7))))
+    parts.append('</div><h2><span class="mw-headline" id="Prize_Pool">Prize Pool</span></h2>')
+
+    parts.append('<div class="csstable-widget collapsed general-collapsible prizepooltable">')
+    share = prize_pool * 0.3
+    for place, player in enumerate(players[:16], start=1):
+        parts.append(
+            '<div class="csstable-widget-row">'
+            f'<div class="csstable-widget-cell prizepooltable-place"><div class="block-placement">'
+            f'<span class="placement-text">{place}{_ordinal_suffix(place)}</span></div></div>'
+            f'<div class="csstable-widget-cell">${share:,.0f}</div>'
+            f'<div class="csstable-widget-cell">{_player_block(player, rng.choice(RACES))}</div>'
+            '</div>'
+        )
+        share *= 0.6
+    parts.append('</div></div>')
+    return ''.join(parts)
+
+def _ordinal_suffix(n: int) -> str:
+    if 10 <= n % 100 <= 20:
+        return 'th'
+    return {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+
+def make_parse_payload(title: str = 'ASL Season 17', matches: int = 300, seed: int = 0) -> Dict[str, Any]:
+    """A dict shaped like the action=parse JSON response for a tournament page."""
+    return {
+        'parse': {
+            'title': title,
+            'pageid': 1000 + seed,
+            'revid': 500000 + seed,
+            'text': {'*': make_tournament_html(matches=matches, seed=seed, name=title)},
+            'categories': [{'*': 'Tournaments', 'sortkey': ''}, {'*': 'Premier_Tournaments', 'sortkey': ''}],
+            'links': [{'ns': 0, '*': name, 'exists': ''} for name in player_names(64, seed)],
+        }
+    }
+
+def make_player_record(i: int) -> Dict[str, Any]:
+    """A LiquipediaDB-style player record (~300 bytes of JSON)."""
+    return {
+        'id': f'player-{i}',
+        'name': f'Player {i}',
+        'team': f'Team {i % 97}',
+        'race': RACES[i % 3],
+        'earnings': i * 13.5,
+        'results': [{'tournament': f'T{i % 50}', 'placement': i % 16 + 1} for _ in range(3)],
+    }
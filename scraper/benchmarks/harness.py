@@ -0,0 +1,67 @@
+"""Timing and memory measurement shared by the benchmark modules."""
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def measure(
+    name: str,
+    fn: Callable[[int], Any],
+    iterations: int,
+    setup: Optional[Callable[[], Any]] = None,
+    track_memory: bool = True,
+    **extra: Any,
+) -> Dict[str, Any]:
+    """
+    Call fn(i) for i in range(iterations) and summarize the timings.
+
+    Memory is measured in a second pass under tracemalloc so that its
+    overhead does not distort the latency figures.
+    """
+    if setup:
+        setup()
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    peak = None
+    if track_memory:
+        if setup:
+            setup()
+        tracemalloc.start()
+        try:
+            for i in range(iterations):
+                fn(i)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    result = {
+        'benchmark': name,
+        'iterations': iterations,
+        'ops_per_sec': iterations / elapsed if elapsed else float('inf'),
+        'p50_us': percentile(latencies, 50) * 1e6,
+        'p99_us': percentile(latencies, 99) * 1e6,
+        'peak_kib': peak / 1024 if peak is not None else None,
+    }
+    result.update(extra)
+    return result
+
+def format_result(result: Dict[str, Any]) -> str:
+    peak = result.get('peak_kib')
+    memory = f"{peak:>9.0f} KiB" if peak is not None else f"{'-':>13}"
+    return (
+        f"{result['benchmark']:<40} {result['ops_per_sec']:>12.1f} ops/s "
+        f"p50 {result['p50_us']:>10.1f} us  p99 {result['p99_us']:>10.1f} us  peak {memory}"
+    )
@@ -0,0 +1,107 @@
+"""
+Run the benchmark suite and store the results for comparison between commits.
+
+Run from the scraper directory:
+
+    python -m benchmarks.run                  # full run, writes benchmarks/results/<commit>.json
+    python -m benchmarks.run --quick --suites cache
+    python -m benchmarks.run --compare benchmarks/results/a1b2c3d.json benchmarks/results/e4f5a6b.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from . import bench_cache, bench_clients, bench_processor, bench_store
+from .harness import format_result
+
+SUITES = {
+    'cache': bench_cache.run,
+    'clients': bench_clients.run,
+    'processor': bench_processor.run,
+    'store': bench_store.run,
+}
+RESULTS_DIR = Path(__file__).parent / 'results'
+
+# Metrics where a larger number is better; all others are latencies/sizes
+HIGHER_IS_BETTER = {'ops_per_sec', 'budget_utilization', 'parse_calls_avoided', 'pages_per_sec', 'speedup', 'rows_per_sec'}
+COMPARED_METRICS = ('ops_per_sec', 'p50_us', 'p99_us', 'peak_kib', 'budget_utilization', 'pages_per_sec')
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def run_suites(names: List[str], quick: bool) -> Dict[str, Any]:
+    results = []
+    for name in names:
+        for result in SUITES[name](quick=quick):
+            print(format_result(result) if result.get('p50_us') is not None else _format_summary(result))
+            results.append(result)
+    return {
+        'commit': current_commit(),
+        'timestamp': time.time(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'quick': quick,
+        'results': results,
+    }
+
+def _format_summary(result: Dict[str, Any]) -> str:
+    details = ', '.join(
+        f'{k}={v:.3g}' if isinstance(v, float) else f'{k}={v}'
+        for k, v in result.items()
+        if k not in ('benchmark', 'p50_us', 'p99_us', 'peak_kib') and v is not None
+    )
+    return f"{result['benchmark']:<40} {details}"
+
+def compare(base_path: str, new_path: str, threshold: float) -> int:
+    """Print metric changes between two result files; return the number of regressions."""
+    with open(base_path) as f:
+        base = {r['benchmark']: r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = {r['benchmark']: r for r in json.load(f)['results']}
+
+    regressions = 0
+    for name in sorted(base.keys() & new.keys()):
+        for metric in COMPARED_METRICS:
+            old_value, new_value = base[name].get(metric), new[name].get(metric)
+            if not old_value or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = 'REGRESSION' if worse > threshold else ''
+            regressions += bool(flag)
+            print(f"{name:<40} {metric:<18} {old_value:>12.1f} -> {new_value:>12.1f} ({change:+.1%}) {flag}")
+    return regressions
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suites', default=','.join(SUITES))
+    parser.add_argument('--quick', action='store_true', help='Smaller workloads for a fast check')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'))
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative change flagged as a regression')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare, threshold=args.threshold) else 0
+
+    report = run_suites(args.suites.split(','), args.quick)
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open('w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+Local stand-in for Liquipedia's api.php and the v3 LiquipediaDB API.
+
+Serves synthetic payloads from benchmarks.fixtures and enforces the
+budgets in RATE_LIMITS, optionally scaled down by `time_scale` so that
+benchmarks finish quickly. Requests over budget get a 429 with Retry-After.
+"""
+import asyncio
+import math
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from aiohttp import web
+
+from src.config import RATE_LIMITS
+from .fixtures import make_parse_payload, make_player_record
+
+@lru_cache(maxsize=32)
+def _cached_html(seed: int, matches: int) -> str:
+    return make_parse_payload(matches=matches, seed=seed)['parse']['text']['*']
+
+def _seed_for(title: str) -> int:
+    # A handful of distinct pages is enough; reuse them across titles
+    return zlib.crc32(title.encode('utf-8')) % 16
+
+class RateWindow:
+    """Sliding window allowing `calls` requests per `period` seconds."""
+
+    def __init__(self, calls: int, period: float, tolerance: float = 0.15):
+        self.calls = calls
+        self.period = period
+        self.tolerance = period * tolerance
+        self.history: Deque[float] = deque()
+
+    def check(self, now: float) -> Optional[float]:
+        """Record a request; return None if allowed, else seconds until it would be."""
+        while self.history and self.history[0] <= now - self.period + self.tolerance:
+            self.history.popleft()
+        if len(self.history) >= self.calls:
+            return self.history[0] + self.period - now
+        self.history.append(now)
+        return None
+
+class StandInServer:
+    def __init__(
+        self,
+        time_scale: float = 1.0,
+        enforce_limits: bool = True,
+        category_size: int = 2000,
+        matches: int = 300,
+        response_delay: float = 0.0,
+    ):
+        self.time_scale = time_scale
+        self.enforce_limits = enforce_limits
+        self.category_size = category_size
+        self.matches = matches
+        self.response_delay = response_delay
+        self.windows = {
+            (service, budget): RateWindow(limit['calls'], limit['period'] * time_scale)
+            for service, budgets in RATE_LIMITS.items()
+            for budget, limit in budgets.items()
+        }
+        self.stats: Dict[str, int] = defaultdict(int)
+        self.revisions: Dict[str, int] = {}
+        # recentchanges log, oldest first
+        self.changes: List[Dict[str, Any]] = []
+        # Session cookies the wiki accepts; clear to expire every login
+        self.sessions: Set[str] = set()
+        # action=login answer for any credentials
+        self.login_result = 'Success'
+        self.url: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self) -> None:
+        """Start serving on a random localhost port in a background thread."""
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start_site())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='liquipedia-stand-in', daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    async def _start_site(self) -> None:
+        app = web.Application()
+        app.router.add_route('*', '/api.php', self.api_php)
+        app.router.add_route('*', '/api.php/', self.api_php)
+        app.router.add_get('/api/v3/{kind}/{ident}', self.v3_entity)
+        app.router.add_get('/api/v3/search/{kind}', self.v3_search)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}'
+
+    # -- helpers -----------------------------------------------------------
+
+    def _throttle(self, service: str, budget: str) -> Optional[web.Response]:
+        if not self.enforce_limits:
+            return None
+        wait = self.windows[(service, budget)].check(time.monotonic())
+        if wait is None:
+            return None
+        self.stats['throttled'] += 1
+        self.stats[f'throttled:{service}:{budget}'] += 1
+        # Whole seconds as on the real API; fractions when time is scaled down
+        retry_after = str(max(1, math.ceil(wait))) if self.time_scale >= 1 else f'{wait:.3f}'
+        return web.json_response(
+            {'error': {'code': 'ratelimited', 'info': 'Rate limit exceeded'}},
+            status=429,
+            headers={'Retry-After': retry_after},
+        )
+
+    def revision_of(self, title: str) -> int:
+        return self.revisions.setdefault(title, 100000 + _seed_for(title))
+
+    def edit(self, title: str, timestamp: Optional[str] = None) -> Dict[str, Any]:
+        """Record a new revision of title and log it in recentchanges."""
+        previous = self.revision_of(title)
+        self.revisions[title] = max(self.revisions.values()) + 1
+        change = {
+            'type': 'edit',
+            'ns': 0,
+            'title': title,
+            'rcid': len(self.changes) + 1,
+            'revid': self.revisions[title],
+            'old_revid': previous,
+            'timestamp': timestamp or datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        }
+        self.changes.append(change)
+        return change
+
+    # -- api.php -----------------------------------------------------------
+
+    async def api_php(self, request: web.Request) -> web.Response:
+        params = dict(request.query)
+        if request.method == 'POST':
+            params.update(await request.post())
+        action = params.get('action', '')
+        budget = 'parse' if action == 'parse' else 'general'
+        throttled = self._throttle('liquipedia', budget)
+        if throttled is not None:
+            return throttled
+        self.stats['requests'] += 1
+        self.stats[f'action:{action}'] += 1
+        if self.response_delay:
+            await asyncio.sleep(self.response_delay)
+
+        if action == 'login':
+            response = web.json_response({'login': {'result': self.login_result, 'lgusername': params.get('lgname')}})
+            if self.login_result == 'Success':
+                session = f"stand-in-{params.get('lgname')}"
+                self.sessions.add(session)
+                response.set_cookie('liquipedia_session', session, max_age=3600)
+            return response
+        if action == 'query' and params.get('meta') == 'userinfo':
+            session = request.cookies.get('liquipedia_session')
+            if session in self.sessions:
+                return web.json_response({'query': {'userinfo': {'id': 1, 'name': session[len('stand-in-'):]}}})
+            return web.json_response({'query': {'userinfo': {'id': 0, 'name': request.remote, 'anon': ''}}})
+        if action == 'parse':
+            return web.json_response(self._parse(params['page']))
+        if action == 'query':
+            return web.json_response(self._query(params))
+        return web.json_response({'error': {'code': 'badvalue', 'info': f'Unrecognized action: {action}'}})
+
+    def _parse(self, title: str) -> Dict[str, Any]:
+        if title.startswith('Missing'):
+            return {'error': {'code': 'missingtitle', 'info': "The page you specified doesn't exist."}}
+        return {
+            'parse': {
+                'title': title,
+                'pageid': zlib.crc32(title.encode('utf-8')),
+                'revid': self.revision_of(title),
+                'text': {'*': _cached_html(_seed_for(title), self.matches)},
+            }
+        }
+
+    def _query(self, params: Dict[str, str]) -> Dict[str, Any]:
+        if params.get('meta') == 'tokens':
+            return {'batchcomplete': '', 'query': {'tokens': {'logintoken': 'stand-in+\\'}}}
+        if params.get('list') == 'categorymembers':
+            return self._category_members(params)
+        if params.get('list') == 'recentchanges':
+            return self._recent_changes(params)
+        titles = [t for t in params.get('titles', '').split('|') if t]
+        pages = {}
+        for i, title in enumerate(titles):
+            if title.startswith('Missing'):
+                pages[str(-1 - i)] = {'ns': 0, 'title': title, 'missing': ''}
+                continue
+            pageid = zlib.crc32(title.encode('utf-8'))
+            page = {'pageid': pageid, 'ns': 0, 'title': title}
+            if 'revisions' in params.get('prop', ''):
+                page['revisions'] = [{'revid': self.revision_of(title), 'parentid': 0}]
+            pages[str(pageid)] = page
+        return {'batchcomplete': '', 'query': {'pages': pages}}
+
+    def _category_members(self, params: Dict[str, str]) -> Dict[str, Any]:
+        limit = params.get('cmlimit', '10')
+        limit = 500 if limit == 'max' else int(limit)
+        offset = int(params.get('cmcontinue', '0') or 0)
+        end = min(offset + limit, self.category_size)
+        members = [
+            {'pageid': i, 'ns': 0, 'title': f'Tournament {i}'}
+            for i in range(offset, end)
+        ]
+        response: Dict[str, Any] = {'query': {'categorymembers': members}}
+        if end < self.category_size:
+            response['continue'] = {'cmcontinue': str(end), 'continue': '-||'}
+        else:
+            response['batchcomplete'] = ''
+        return response
+
+    def _recent_changes(self, params: Dict[str, str]) -> Dict[str, Any]:
+        # Only rcdir=newer, the direction an incremental crawler reads in
+        limit = params.get('rclimit', '10')
+        limit = 500 if limit == 'max' else int(limit)
+        if params.get('rccontinue'):
+            timestamp, rcid = params['rccontinue'].split('|')
+            matching = [c for c in self.changes if (c['timestamp'], c['rcid']) >= (timestamp, int(rcid))]
+        else:
+            start = params.get('rcstart', '')
+            matching = [c for c in self.changes if c['timestamp'] >= start]
+        batch = matching[:limit]
+        response: Dict[str, Any] = {'query': {'recentchanges': batch}}
+        if len(matching) > limit:
+            following = matching[limit]
+            response['continue'] = {'rccontinue': f"{following['timestamp']}|{following['rcid']}", 'continue': '-||'}
+        else:
+            response['batchcomplete'] = ''
+        return response
+
+    # -- LiquipediaDB v3 ---------------------------------------------------
+
+    async def v3_entity(self, request: web.Request) -> web.Response:
+        throttled = self._throttle('liquipediadb', 'general')
+        if throttled is not None:
+            return throttled
+        self.stats['requests'] += 1
+        self.stats[f'v3:{request.match_info["kind"]}'] += 1
+        ident = request.match_info['ident']
+        if ident.startswith('missing'):
+            return web.json_response({'error': ['Not found']}, status=404)
+        record = make_player_record(zlib.crc32(ident.encode('utf-8')) % 10000)
+        record['id'] = ident
+        return web.json_response({'result': [record]})
+
+    async def v3_search(self, request: web.Request) -> web.Response:
+        throttled = self._throttle('liquipediadb', 'general')
+        if throttled is not None:
+            return throttled
+        self.stats['requests'] += 1
+        self.stats[f'v3:search:{request.match_info["kind"]}'] += 1
+        query = request.query.get('query', '')
+        return web.json_response({'result': [make_player_record(i) | {'name': f'{query}{i}'} for i in range(10)]})
@@ -0,0 +1,457 @@
+"""
+Extraction of tournament results from parsed Liquipedia pages.
+
+Pages are tokenized incrementally with html.parser and records are
+yielded as soon as their closing tag is seen, so no DOM is built and
+memory stays bounded by nesting depth and the size of one fed chunk,
+however large the page is.
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from src.cache import RedisCache, RevisionParseCache
+from src.cache.cache_manager import FILE_BACKENDS
+from src.config import CACHE_CONFIG
+
+# Characters of HTML handed to the tokenizer at a time
+CHUNK_SIZE = 64 * 1024
+
+# Elements that never get an end tag
+_VOID_TAGS = frozenset((
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr',
+))
+
+@dataclass(slots=True, frozen=True)
+class Match:
+    """One bracket match; winner is None when the match has not been decided."""
+    round: Optional[str]
+    player1: Optional[str]
+    player2: Optional[str]
+    score1: Optional[int]
+    score2: Optional[int]
+    winner: Optional[str]
+    best_of: Optional[int]
+    timestamp: Optional[int]
+
+@dataclass(slots=True, frozen=True)
+class Participant:
+    name: str
+    race: Optional[str]
+
+@dataclass(slots=True, frozen=True)
+class Placement:
+    place: str
+    player: Optional[str]
+    prize: Optional[float]
+
+@dataclass(slots=True, frozen=True)
+class PrizePool:
+    amount: float
+    currency: Optional[str]
+
+Record = Union[Match, Participant, Placement, PrizePool]
+
+def _parse_int(text: str) -> Optional[int]:
+    try:
+        return int(text.strip())
+    except ValueError:
+        return None
+
+def _parse_money(text: str) -> Tuple[Optional[float], Optional[str]]:
+    """'$100,000 USD' -> (100000.0, 'USD')."""
+    parts = text.replace('\xa0', ' ').split()
+    if not parts:
+        return None, None
+    try:
+        amount = float(parts[0].lstrip('$€£').replace(',', ''))
+    except ValueError:
+        return None, None
+    return amount, parts[1] if len(parts) > 1 else None
+
+class _Player:
+    __slots__ = ('name', 'race')
+
+    def __init__(self):
+        self.name: Optional[str] = None
+        self.race: Optional[str] = None
+
+class _MatchState:
+    __slots__ = ('opponents', 'scores', 'winner', 'best_of', 'timestamp')
+
+    def __init__(self):
+        self.opponents: List[Optional[str]] = []
+        self.scores: List[Optional[int]] = []
+        self.winner: Optional[str] = None
+        self.best_of: Optional[int] = None
+        self.timestamp: Optional[int] = None
+
+class _PlacementState:
+    __slots__ = ('place', 'player', 'prize')
+
+    def __init__(self):
+        self.place: Optional[str] = None
+        self.player: Optional[str] = None
+        self.prize: Optional[float] = None
+
+class RecordExtractor(HTMLParser):
+    """
+    Tokenizer that turns Liquipedia template markup into records.
+
+    Only the elements of the bracket, participant table, prize pool table
+    and infobox templates are tracked; everything else is skipped as it
+    streams past. Completed records collect in `records` until the caller
+    drains them with pop_records().
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.records: List[Record] = []
+        # (tag, role) for every open element; role is None for uninteresting ones
+        self._stack: List[Tuple[str, Optional[str]]] = []
+        # Text buffers of the open elements whose text is wanted, innermost last
+        self._buffers: List[List[str]] = []
+        self._round: Optional[str] = None
+        self._match: Optional[_MatchState] = None
+        self._opponent: Optional[List[Any]] = None    # [name, score, won]
+        self._player: Optional[_Player] = None
+        self._placement: Optional[_PlacementState] = None
+        self._in_popup = 0
+        self._in_participants = 0
+        self._in_prizepool = 0
+        self._prize_pool_next = False
+
+    def pop_records(self) -> List[Record]:
+        records, self.records = self.records, []
+        return records
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        classes = ()
+        for name, value in attrs:
+            if name == 'class' and value:
+                classes = value.split()
+                break
+        if tag in _VOID_TAGS:
+            if tag == 'img' and self._player is not None and self._stack and self._stack[-1][1] == 'race':
+                self._player.race = dict(attrs).get('alt')
+            return
+        role = self._role(tag, classes, attrs) if classes else None
+        self._stack.append((tag, role))
+        if role in _CAPTURED:
+            self._buffers.append([])
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag not in _VOID_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _VOID_TAGS:
+            return
+        # Tolerate stray end tags; unclosed children are closed with their parent
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth][0] == tag:
+                break
+        else:
+            return
+        while len(self._stack) > depth:
+            _, role = self._stack.pop()
+            if role is not None:
+                self._close(role)
+
+    def handle_data(self, data: str) -> None:
+        for buffer in self._buffers:
+            buffer.append(data)
+
+    def _role(self, tag: str, classes: List[str], attrs: List[Tuple[str, Optional[str]]]) -> Optional[str]:
+        if self._match is not None:
+            if 'brkts-match-info-popup' in classes:
+                self._in_popup += 1
+                return 'popup'
+            if self._in_popup:
+                if 'timer-object' in classes:
+                    self._match.timestamp = _parse_int(dict(attrs).get('data-timestamp') or '')
+                elif 'brkts-popup-comment' in classes:
+                    return 'best_of'
+                # Players in the popup header repeat the opponents
+                return None
+            if 'brkts-opponent-entry' in classes:
+                self._opponent = [dict(attrs).get('aria-label'), None, False]
+                return 'opponent'
+            if 'brkts-opponent-score-inner' in classes and self._opponent is not None:
+                self._opponent[2] = 'brkts-opponent-win' in classes
+                return 'score'
+        elif 'brkts-match' in classes:
+            self._match = _MatchState()
+            return 'match'
+        elif 'brkts-header' in classes:
+            return 'round'
+
+        if 'block-player' in classes:
+            self._player = _Player()
+            return 'player'
+        if self._player is not None:
+            if 'race-icon' in classes:
+                return 'race'
+            if 'name' in classes:
+                return 'name'
+
+        if 'participantTable' in classes:
+            self._in_participants += 1
+            return 'participants'
+        if 'prizepooltable' in classes:
+            self._in_prizepool += 1
+            return 'prizepool'
+        if self._in_prizepool:
+            if 'csstable-widget-row' in classes:
+                self._placement = _PlacementState()
+                return 'placement'
+            if self._placement is not None:
+                if 'placement-text' in classes:
+                    return 'place'
+                if 'csstable-widget-cell' in classes:
+                    return 'prize'
+        if 'infobox-description' in classes:
+            return 'description'
+        if self._prize_pool_next and 'infobox-cell-2' in classes:
+            self._prize_pool_next = False
+            return 'prize_pool'
+        return None
+
+    def _close(self, role: str) -> None:
+        text = ''.join(self._buffers.pop()).strip() if role in _CAPTURED else None
+
+        if role == 'player':
+            player, self._player = self._player, None
+            if player.name is None:
+                return
+            if self._opponent is not None:
+                self._opponent[0] = self._opponent[0] or player.name
+            elif self._placement is not None:
+                self._placement.player = player.name
+            elif self._in_participants:
+                self.records.append(Participant(player.name, player.race))
+        elif role == 'name':
+            self._player.name = text or None
+        elif role == 'score':
+            self._opponent[1] = _parse_int(text)
+        elif role == 'opponent':
+            opponent, self._opponent = self._opponent, None
+            self._match.opponents.append(opponent[0])
+            self._match.scores.append(opponent[1])
+            if opponent[2]:
+                self._match.winner = opponent[0]
+        elif role == 'best_of':
+            if text.startswith('Best of'):
+                self._match.best_of = _parse_int(text[len('Best of'):])
+        elif role == 'popup':
+            self._in_popup -= 1
+        elif role == 'match':
+            self._emit_match()
+        elif role == 'round':
+            self._round = text or None
+        elif role == 'participants':
+            self._in_participants -= 1
+        elif role == 'place':
+            self._placement.place = text or None
+        elif role == 'prize':
+            if text.startswith(('$', '€', '£')):
+                self._placement.prize = _parse_money(text)[0]
+        elif role == 'placement':
+            placement, self._placement = self._placement, None
+            if placement.place:
+                self.records.append(Placement(placement.place, placement.player, placement.prize))
+        elif role == 'prizepool':
+            self._in_prizepool -= 1
+        elif role == 'description':
+            self._prize_pool_next = text.rstrip(':') == 'Prize Pool'
+        elif role == 'prize_pool':
+            amount, currency = _parse_money(text)
+            if amount is not None:
+                self.records.append(PrizePool(amount, currency))
+
+    def _emit_match(self) -> None:
+        match, self._match = self._match, None
+        opponents = (match.opponents + [None, None])[:2]
+        scores = (match.scores + [None, None])[:2]
+        self.records.append(Match(
+            self._round, opponents[0], opponents[1], scores[0], scores[1],
+            match.winner, match.best_of, match.timestamp,
+        ))
+
+# Roles whose text content is collected
+_CAPTURED = frozenset(('round', 'score', 'best_of', 'name', 'place', 'prize', 'description', 'prize_pool'))
+
+def _chunks(source: Union[str, Iterable[str]], chunk_size: int) -> Iterator[str]:
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    else:
+        yield from source
+
+def iter_records(source: Union[str, Iterable[str]], chunk_size: int = CHUNK_SIZE) -> Iterator[Record]:
+    """
+    Yield records from page HTML as it is tokenized.
+
+    `source` is either the whole HTML string, which is fed in slices of
+    `chunk_size`, or any iterable of text chunks (e.g. a file opened in
+    text mode), which is consumed lazily.
+    """
+    extractor = RecordExtractor()
+    for chunk in _chunks(source, chunk_size):
+        extractor.feed(chunk)
+        yield from extractor.pop_records()
+    extractor.close()
+    yield from extractor.pop_records()
+
+class PageRecords:
+    """Records extracted from one tournament page."""
+    __slots__ = ('title', 'revid', 'matches', 'participants', 'placements', 'prize_pool')
+
+    def __init__(self, title: Optional[str], revid: Optional[int]):
+        self.title = title
+        self.revid = revid
+        self.matches: List[Match] = []
+        self.participants: List[Participant] = []
+        self.placements: List[Placement] = []
+        self.prize_pool: Optional[PrizePool] = None
+
+    def add(self, record: Record) -> None:
+        if isinstance(record, Match):
+            self.matches.append(record)
+        elif isinstance(record, Participant):
+            self.participants.append(record)
+        elif isinstance(record, Placement):
+            self.placements.append(record)
+        elif self.prize_pool is None:
+            self.prize_pool = record
+
+def extract_page(payload: Dict[str, Any], chunk_size: int = CHUNK_SIZE) -> PageRecords:
+    """Extract the records of an action=parse response (as returned by get_parsed_page)."""
+    parse = payload.get('parse', payload)
+    page = PageRecords(parse.get('title'), parse.get('revid'))
+    text = parse.get('text') or ''
+    if isinstance(text, dict):
+        text = text.get('*', '')
+    for record in iter_records(text, chunk_size):
+        page.add(record)
+    return page
+
+# Cache layers of a pipeline worker, slowest last; set up once per process by _init_worker
+_worker_layers: List[Any] = []
+
+def _init_worker(cache_dir: str, redis_url: Optional[str], file_backend: str, namespace: Optional[str] = None) -> None:
+    """Open the Redis and file layers in this process; connections are never inherited."""
+    layers = []
+    if redis_url:
+        # Same key prefix as the CacheManager that wrote the pages
+        layers.append(RedisCache(redis_url, namespace=namespace))
+    layers.append(FILE_BACKENDS[file_backend](cache_dir))
+    _worker_layers[:] = layers
+
+def _read(key: str, allow_stale: bool = True) -> Optional[Any]:
+    """Read a 'parse' entry; like CacheManager.get, one past its TTL is a miss unless allow_stale."""
+    for layer in _worker_layers:
+        entry = layer.get_entry(key)
+        if entry is not None:
+            value, expires_at = entry
+            if not allow_stale and expires_at - CACHE_CONFIG['stale_ttls']['parse'] < time.time():
+                return None
+            return value
+    return None
+
+def _extract_key(key: str) -> Optional[PageRecords]:
+    # The parse of a given revision never goes out of date
+    payload = _read(key)
+    return extract_page(payload) if payload is not None else None
+
+def _extract_title(title: str) -> Optional[PageRecords]:
+    revid = _read(RevisionParseCache._revision_key(title), allow_stale=False)
+    if revid is None:
+        return None
+    return _extract_key(RevisionParseCache._page_key(title, revid))
+
+class PagePipeline:
+    """
+    Extract records from cached parsed pages on a pool of worker processes.
+
+    Workers open the Redis and file cache layers themselves and read pages
+    by key, so only keys go to the workers and only the compact records
+    come back; HTML never crosses a process boundary. Results are yielded
+    in input order with at most `window` pages in flight, which bounds
+    memory however many keys are fed in. Pages held only in the parent's
+    memory layer are not visible to the workers.
+
+    With workers=0 pages are processed in this process, through the same
+    code path.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = CACHE_CONFIG['file']['directory'],
+        redis_url: Optional[str] = None,
+        file_backend: Optional[str] = None,
+        workers: Optional[int] = None,
+        window: Optional[int] = None,
+        namespace: Optional[str] = None,
+    ):
+        file_backend = file_backend or CACHE_CONFIG['file'].get('backend', 'json')
+        if file_backend not in FILE_BACKENDS:
+            raise ValueError(f"Unknown file cache backend: {file_backend}")
+        namespace = namespace or CACHE_CONFIG['redis'].get('namespace')
+        self._layer_args = (cache_dir, redis_url, file_backend, namespace)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.window = window or max(1, self.workers) * 4
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _submit(self, fn: Callable[[str], Optional[PageRecords]], item: str) -> Future:
+        if not self.workers:
+            future: Future = Future()
+            try:
+                future.set_result(fn(item))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=self._layer_args,
+            )
+        return self._executor.submit(fn, item)
+
+    def _run(
+        self, fn: Callable[[str], Optional[PageRecords]], items: Iterable[str],
+    ) -> Iterator[Tuple[str, Optional[PageRecords]]]:
+        if not self.workers:
+            _init_worker(*self._layer_args)
+        in_flight: Deque[Tuple[str, Future]] = deque()
+        for item in items:
+            if len(in_flight) >= self.window:
+                done, future = in_flight.popleft()
+                yield done, future.result()
+            in_flight.append((item, self._submit(fn, item)))
+        while in_flight:
+            done, future = in_flight.popleft()
+            yield done, future.result()
+
+    def process_keys(self, keys: Iterable[str]) -> Iterator[Tuple[str, Optional[PageRecords]]]:
+        """Yield (key, records) for cached action=parse responses, in order; None if a key is not cached."""
+        return self._run(_extract_key, keys)
+
+    def process_titles(self, titles: Iterable[str]) -> Iterator[Tuple[str, Optional[PageRecords]]]:
+        """Yield (title, records) for the latest cached parse of each title, as stored by RevisionParseCache."""
+        return self._run(_extract_title, titles)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> 'PagePipeline':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
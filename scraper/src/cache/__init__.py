@@ -1,6 +1,49 @@
-from .cache_manager import CacheManager
-from .redis_cache import RedisCache
-from .file_cache import FileCache
-from .memory_cache import MemoryCache
+"""
+Cache layers and the manager combining them.
 
-__all__ = ['CacheManager', 'RedisCache', 'FileCache', 'MemoryCache']
+Names are imported on first access (PEP 562), so importing the package
+does not load redis, sqlite or the codec libraries until they are used.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+_EXPORTS = {
+    'CacheManager': '.cache_manager',
+    'RedisCache': '.redis_cache',
+    'FileCache': '.file_cache',
+    'MemoryCache': '.memory_cache',
+    'SQLiteCache': '.sqlite_cache',
+    'RevisionParseCache': '.parse_cache',
+    'TagIndex': '.tag_index',
+    'CacheSnapshot': '.cache_snapshot',
+    'Codec': '.codecs',
+    'CodecError': '.codecs',
+    'get_codec': '.codecs',
+}
+
+__all__ = [
+    'CacheManager', 'RedisCache', 'FileCache', 'MemoryCache', 'SQLiteCache', 'RevisionParseCache', 'TagIndex',
+    'CacheSnapshot', 'Codec', 'CodecError', 'get_codec',
+]
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+if TYPE_CHECKING:
+    from .cache_manager import CacheManager
+    from .redis_cache import RedisCache
+    from .file_cache import FileCache
+    from .memory_cache import MemoryCache
+    from .sqlite_cache import SQLiteCache
+    from .parse_cache import RevisionParseCache
+    from .tag_index import TagIndex
+    from .cache_snapshot import CacheSnapshot
+    from .codecs import Codec, CodecError, get_codec
@@ -1,71 +1,582 @@
+import dataclasses
+import hashlib
+import inspect
+import threading
 import time
-from typing import Any, Optional, Dict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from enum import Enum
+from types import CodeType
+from typing import TYPE_CHECKING, Any, Optional, Dict, Callable, Awaitable, Tuple, Set, Iterable, Iterator, Union
 from functools import wraps
-import redis
 import json
 import os
 from .memory_cache import MemoryCache
-from .redis_cache import RedisCache
 from .file_cache import FileCache
+from .sqlite_cache import SQLiteCache
+from .single_flight import SingleFlight, AsyncSingleFlight
+from .codecs import get_codec
+from .tag_index import TagIndex
+from .cache_snapshot import CacheSnapshot, write_snapshot
+from ..config import CACHE_CONFIG
+from ..metrics import CACHE_LATENCY, CACHE_LOOKUPS, CACHE_REFRESHES, is_enabled as metrics_enabled
+
+if TYPE_CHECKING:
+    import asyncio
+    from .redis_cache import RedisCache
+
+# asyncio is imported inside the async paths: callers running an event loop
+# have already loaded it, and sync-only processes skip its import cost
+
+# Persistent layer implementations selectable via CACHE_CONFIG['file']['backend']
+FILE_BACKENDS = {
+    'json': FileCache,
+    'sqlite': SQLiteCache,
+}
+
+# Layer not built yet (None means there is no Redis layer)
+_UNSET = object()
 
 class CacheManager:
-    def __init__(self, redis_url: Optional[str] = None, cache_dir: str = "cache"):
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        cache_dir: str = "cache",
+        distributed_lock: bool = False,
+        lock_timeout: int = 60,
+        refresh_workers: int = 2,
+        max_pending_refreshes: int = 100,
+        file_backend: Optional[str] = None,
+        namespace: Optional[str] = None,
+    ):
         # Initialize cache layers
-        self.memory_cache = MemoryCache()
-        self.redis_cache = RedisCache(redis_url) if redis_url else None
-        self.file_cache = FileCache(cache_dir)
+        self.memory_cache = MemoryCache(
+            max_size=CACHE_CONFIG['memory']['max_size'],
+            max_bytes=CACHE_CONFIG['memory'].get('max_bytes'),
+        )
+        file_backend = file_backend or CACHE_CONFIG['file'].get('backend', 'json')
+        if file_backend not in FILE_BACKENDS:
+            raise ValueError(f"Unknown file cache backend: {file_backend}")
+        # The Redis and file layers are built on first use, so a short-lived
+        # process that only touches memory never imports redis or opens files
+        self.redis_url = redis_url
+        self.namespace = namespace or CACHE_CONFIG['redis'].get('namespace')
+        self.cache_dir = cache_dir
+        self.file_backend = file_backend
+        self._redis_cache: Any = _UNSET
+        self._file_cache: Any = _UNSET
+        self._layers_lock = threading.Lock()
+        # Layer label in metrics
+        self._file_layer = 'file' if file_backend == 'json' else file_backend
+        # Tags of memory and file entries; Redis keeps its own in sets
+        self.tag_index = TagIndex(os.path.join(cache_dir, '_tags'))
+        # Read-only layer loaded by load_snapshot(), consulted last
+        self.snapshot: Optional[CacheSnapshot] = None
+
+        # Coalesce concurrent loads of the same key (threads and asyncio tasks),
+        # optionally across processes through a Redis lock
+        self.single_flight = SingleFlight()
+        self.async_single_flight = AsyncSingleFlight()
+        self.distributed_lock = distributed_lock
+        self.lock_timeout = lock_timeout
         
         # Default TTLs for different types of data (in seconds)
         self.ttls = {
             'tournament': 3600,  # 1 hour for tournament data
             'player': 7200,     # 2 hours for player data
             'static': 86400,    # 24 hours for static data
+            'parse': 604800,    # 1 week for parsed pages
+            'missing': 300,     # 5 minutes for titles known not to exist
         }
 
-    def get(self, key: str, data_type: str = 'static') -> Optional[Any]:
+        # Grace period after the TTL during which a stale value is still
+        # served while it is refreshed in the background (stale-while-revalidate).
+        # Entries are stored with a hard TTL of ttl + grace.
+        self.stale_ttls = dict(CACHE_CONFIG['stale_ttls'])
+
+        # Background refreshes are bounded and deduplicated per key
+        self.refresh_workers = refresh_workers
+        self.max_pending_refreshes = max_pending_refreshes
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+        self._refresh_lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._refresh_tasks: Set['asyncio.Task'] = set()
+
+    @property
+    def redis_cache(self) -> Optional['RedisCache']:
+        layer = self._redis_cache
+        if layer is _UNSET:
+            with self._layers_lock:
+                if self._redis_cache is _UNSET:
+                    self._redis_cache = self._create_redis_cache()
+                layer = self._redis_cache
+        return layer
+
+    @redis_cache.setter
+    def redis_cache(self, layer: Optional['RedisCache']) -> None:
+        self._redis_cache = layer
+
+    @property
+    def file_cache(self):
+        layer = self._file_cache
+        if layer is _UNSET:
+            with self._layers_lock:
+                if self._file_cache is _UNSET:
+                    self._file_cache = FILE_BACKENDS[self.file_backend](self.cache_dir)
+                layer = self._file_cache
+        return layer
+
+    @file_cache.setter
+    def file_cache(self, layer) -> None:
+        self._file_cache = layer
+
+    def _create_redis_cache(self) -> Optional['RedisCache']:
+        if not self.redis_url:
+            return None
+        from .redis_cache import RedisCache
+        redis_config = CACHE_CONFIG['redis']
+        return RedisCache(
+            self.redis_url,
+            max_connections=redis_config.get('max_connections'),
+            socket_timeout=redis_config.get('socket_timeout'),
+            socket_connect_timeout=redis_config.get('socket_connect_timeout'),
+            pool_timeout=redis_config.get('pool_timeout'),
+            namespace=self.namespace,
+        )
+
+    def _hard_ttl(self, data_type: str, ttl: Optional[int] = None) -> int:
+        """Storage TTL: the fresh TTL (the data type's unless overridden) plus the stale grace period."""
+        return (self.ttls[data_type] if ttl is None else ttl) + self.stale_ttls.get(data_type, 0)
+
+    def get(
+        self,
+        key: str,
+        data_type: Optional[str] = None,
+        loader: Optional[Callable[[], Any]] = None,
+        allow_stale: bool = False,
+    ) -> Optional[Any]:
         """
         Get data from cache, trying each layer in order:
         1. Memory cache (fastest)
         2. Redis cache (if available)
         3. File cache (slowest)
+        4. Snapshot (if one was loaded)
+
+        Values past their data type's TTL are a miss. Within the stale grace
+        period they are returned if a loader is given, which is then run in
+        a background refresh, or if allow_stale is set. Without a data type
+        the fresh TTL is unknown and only the stored expiry applies.
         """
+        typed = data_type is not None
+        data_type = data_type or 'static'
+        entry = self._lookup(key, data_type)
+        if entry is None:
+            return None
+        data, stale = entry
+        if stale and typed:
+            if loader is not None:
+                self._schedule_refresh(key, loader, data_type)
+            elif not allow_stale:
+                return None
+        return data
+
+    def _lookup(self, key: str, data_type: str) -> Optional[Tuple[Any, bool]]:
+        """Walk the layers and return (value, is_stale), backfilling faster layers on a hit."""
         # Try memory cache first
-        data = self.memory_cache.get(key)
-        if data is not None:
-            return data
+        entry = self.memory_cache.get_entry(key)
+        stale = self._record_lookup('memory', data_type, entry)
+        if entry is not None:
+            return entry[0], stale
+
+        # Layer latencies are only timed while metrics are on
+        timed = metrics_enabled()
 
         # Try Redis if available
         if self.redis_cache:
-            data = self.redis_cache.get(key)
-            if data is not None:
-                # Populate memory cache
-                self.memory_cache.set(key, data, self.ttls[data_type])
-                return data
+            start = time.perf_counter() if timed else 0.0
+            entry = self.redis_cache.get_entry(key)
+            if timed:
+                CACHE_LATENCY.observe(time.perf_counter() - start, ('redis', 'get'))
+            stale = self._record_lookup('redis', data_type, entry)
+            if entry is not None:
+                data, expires_at = entry
+                # Populate memory cache for the remaining lifetime
+                self.memory_cache.set(key, data, self._remaining_ttl(expires_at, data_type))
+                return data, stale
 
         # Try file cache last
-        data = self.file_cache.get(key)
-        if data is not None:
+        start = time.perf_counter() if timed else 0.0
+        entry = self.file_cache.get_entry(key)
+        if timed:
+            CACHE_LATENCY.observe(time.perf_counter() - start, (self._file_layer, 'get'))
+        stale = self._record_lookup(self._file_layer, data_type, entry)
+        if entry is not None:
+            data, expires_at = entry
             # Populate faster caches
-            self.memory_cache.set(key, data, self.ttls[data_type])
+            ttl = self._remaining_ttl(expires_at, data_type)
+            self.memory_cache.set(key, data, ttl)
             if self.redis_cache:
-                self.redis_cache.set(key, data, self.ttls[data_type])
-            return data
+                self.redis_cache.set(key, data, ttl, codec=get_codec(data_type))
+            return data, stale
+
+        snapshot = self.snapshot
+        if snapshot is not None:
+            entry = snapshot.get_entry(key)
+            stale = self._record_lookup('snapshot', data_type, entry)
+            if entry is not None:
+                data, expires_at = entry
+                # Decoded once; memory serves it from now on
+                self.memory_cache.set(key, data, self._remaining_ttl(expires_at, data_type))
+                return data, stale
 
         return None
 
-    def set(self, key: str, value: Any, data_type: str = 'static') -> None:
-        """Set data in all cache layers."""
-        ttl = self.ttls[data_type]
+    def _record_lookup(self, layer: str, data_type: str, entry: Optional[Tuple[Any, float]]) -> bool:
+        """Count a hit, stale hit or miss for one layer; returns whether the entry is stale."""
+        if entry is None:
+            CACHE_LOOKUPS.inc((layer, data_type, 'miss'))
+            return False
+        stale = self._is_stale(entry[1], data_type)
+        CACHE_LOOKUPS.inc((layer, data_type, 'stale' if stale else 'hit'))
+        return stale
+
+    def _record_bulk(self, layer: str, data_type: str, requested: int, found: int) -> None:
+        CACHE_LOOKUPS.inc((layer, data_type, 'hit'), found)
+        CACHE_LOOKUPS.inc((layer, data_type, 'miss'), requested - found)
+
+    def get_many(
+        self,
+        keys: Iterable[str],
+        data_type: Optional[str] = None,
+        allow_stale: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Get many keys, resolving them layer by layer.
+
+        Memory is checked first, then a single pipelined Redis read for the
+        misses, then the file layer and a loaded snapshot for what remains.
+        Hits from slower layers are backfilled into the faster ones in bulk.
+        Missing keys, and as in get() stale ones unless allow_stale is set,
+        are omitted.
+        """
+        if data_type is None:
+            allow_stale, data_type = True, 'static'
+        timed = metrics_enabled()
+        keys = list(dict.fromkeys(keys))
+        results = self.memory_cache.get_entries(keys)
+        self._record_bulk('memory', data_type, len(keys), len(results))
+        missing = [key for key in keys if key not in results]
+
+        if missing and self.redis_cache:
+            start = time.perf_counter() if timed else 0.0
+            entries = self.redis_cache.get_entries(missing)
+            if timed:
+                CACHE_LATENCY.observe(time.perf_counter() - start, ('redis', 'get_many'))
+            self._record_bulk('redis', data_type, len(missing), len(entries))
+            if entries:
+                self._backfill(entries, data_type, include_redis=False)
+                results.update(entries)
+                missing = [key for key in missing if key not in entries]
+
+        if missing:
+            start = time.perf_counter() if timed else 0.0
+            entries = self.file_cache.get_entries(missing)
+            if timed:
+                CACHE_LATENCY.observe(time.perf_counter() - start, (self._file_layer, 'get_many'))
+            self._record_bulk(self._file_layer, data_type, len(missing), len(entries))
+            if entries:
+                self._backfill(entries, data_type, include_redis=True)
+                results.update(entries)
+                missing = [key for key in missing if key not in entries]
+
+        snapshot = self.snapshot
+        if missing and snapshot is not None:
+            entries = snapshot.get_entries(missing)
+            self._record_bulk('snapshot', data_type, len(missing), len(entries))
+            if entries:
+                self._backfill(entries, data_type, include_redis=False)
+                results.update(entries)
+
+        if allow_stale:
+            return {key: value for key, (value, _) in results.items()}
+        return {key: value for key, (value, expires_at) in results.items() if not self._is_stale(expires_at, data_type)}
+
+    def _backfill(self, entries: Dict[str, Tuple[Any, float]], data_type: str, include_redis: bool) -> None:
+        """Copy entries found in a slower layer into the faster ones, keeping their remaining lifetime."""
+        values = {key: value for key, (value, _) in entries.items()}
+        ttls = {key: self._remaining_ttl(expires_at, data_type) for key, (_, expires_at) in entries.items()}
+        ttl = self._hard_ttl(data_type)
+        self.memory_cache.set_many(values, ttl, ttls=ttls)
+        if include_redis and self.redis_cache:
+            self.redis_cache.set_many(values, ttl, codec=get_codec(data_type), ttls=ttls)
+
+    def set_many(self, mapping: Dict[str, Any], data_type: str = 'static', tags: Iterable[str] = ()) -> None:
+        """Set many values in all cache layers, in bulk where the layer supports it."""
+        ttl = self._hard_ttl(data_type)
+        codec = get_codec(data_type)
+        tags = tuple(tags)
+        self.memory_cache.set_many(mapping, ttl)
+        if self.redis_cache:
+            self.redis_cache.set_many(mapping, ttl, codec=codec, tags=tags)
+        self.file_cache.set_many(mapping, ttl, codec=codec)
+        if self.snapshot is not None:
+            self.snapshot.delete_many(mapping)
+        if tags:
+            self.tag_index.add(mapping, tags)
+
+    def _is_stale(self, expires_at: float, data_type: str) -> bool:
+        return expires_at - self.stale_ttls.get(data_type, 0) < time.time()
+
+    def _remaining_ttl(self, expires_at: float, data_type: str) -> int:
+        return max(1, int(min(expires_at - time.time(), self._hard_ttl(data_type))))
+
+    def _schedule_refresh(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        data_type: str,
+        tags: Iterable[str] = (),
+        ttl: Optional[int] = None,
+    ) -> bool:
+        """Queue a background reload of a stale key. Returns False if deduplicated or over the bound."""
+        with self._refresh_lock:
+            if key in self._refreshing or len(self._refreshing) >= self.max_pending_refreshes:
+                CACHE_REFRESHES.inc(('skipped',))
+                return False
+            self._refreshing.add(key)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers,
+                    thread_name_prefix='cache-refresh',
+                )
+        self._refresh_executor.submit(self._refresh, key, loader, data_type, tags, ttl)
+        return True
+
+    def _refresh(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        data_type: str,
+        tags: Iterable[str] = (),
+        ttl: Optional[int] = None,
+    ) -> None:
+        try:
+            # Share the load with any foreground caller missing on the same key
+            data = self.single_flight.do(key, loader)
+            if data is not None:
+                self.set(key, data, data_type, tags, ttl)
+            CACHE_REFRESHES.inc(('completed',))
+        except Exception:
+            # Keep serving the stale value; the next read will retry
+            CACHE_REFRESHES.inc(('failed',))
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+
+    def _schedule_async_refresh(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        data_type: str,
+        tags: Iterable[str] = (),
+        ttl: Optional[int] = None,
+    ) -> bool:
+        """Queue a background reload of a stale key on the running event loop."""
+        with self._refresh_lock:
+            if key in self._refreshing or len(self._refreshing) >= self.max_pending_refreshes:
+                CACHE_REFRESHES.inc(('skipped',))
+                return False
+            self._refreshing.add(key)
+        import asyncio
+        task = asyncio.get_running_loop().create_task(self._refresh_async(key, loader, data_type, tags, ttl))
+        # Hold a reference so the task is not garbage collected mid-flight
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+        return True
+
+    async def _refresh_async(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        data_type: str,
+        tags: Iterable[str] = (),
+        ttl: Optional[int] = None,
+    ) -> None:
+        try:
+            data = await self.async_single_flight.do(key, loader)
+            if data is not None:
+                self.set(key, data, data_type, tags, ttl)
+            CACHE_REFRESHES.inc(('completed',))
+        except Exception:
+            CACHE_REFRESHES.inc(('failed',))
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+
+    def close(self) -> None:
+        """Wait for queued background refreshes and stop the refresh workers."""
+        with self._refresh_lock:
+            executor, self._refresh_executor = self._refresh_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        data_type: str = 'static',
+        tags: Iterable[str] = (),
+        ttl: Optional[int] = None,
+    ) -> None:
+        """Set data in all cache layers; tags group keys for invalidate_tag(), ttl overrides the data type's."""
+        ttl = self._hard_ttl(data_type, ttl)
+        codec = get_codec(data_type)
+        timed = metrics_enabled()
         
         # Set in memory cache
         self.memory_cache.set(key, value, ttl)
         
         # Set in Redis if available
         if self.redis_cache:
-            self.redis_cache.set(key, value, ttl)
+            start = time.perf_counter() if timed else 0.0
+            self.redis_cache.set(key, value, ttl, codec=codec, tags=tags)
+            if timed:
+                CACHE_LATENCY.observe(time.perf_counter() - start, ('redis', 'set'))
         
         # Set in file cache
-        self.file_cache.set(key, value)
+        start = time.perf_counter() if timed else 0.0
+        self.file_cache.set(key, value, ttl, codec=codec)
+        if timed:
+            CACHE_LATENCY.observe(time.perf_counter() - start, (self._file_layer, 'set'))
+
+        if self.snapshot is not None:
+            self.snapshot.delete_many((key,))
+        if tags:
+            self.tag_index.add((key,), tags)
+
+    def touch(self, key: str, data_type: str = 'static') -> bool:
+        """Reset the expiration of an existing key in every layer without rewriting its value."""
+        ttl = self._hard_ttl(data_type)
+        found = self.memory_cache.touch(key, ttl)
+        if self.redis_cache:
+            found = self.redis_cache.touch(key, ttl) or found
+        found = self.file_cache.touch(key, ttl, codec=get_codec(data_type)) or found
+        return found
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        data_type: str = 'static',
+        tags: Iterable[str] = (),
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """
+        Get data from cache, or call loader once to fill it.
+
+        Concurrent callers that miss on the same key wait for a single
+        in-flight loader instead of each spending a rate-limited request.
+        Stale hits return immediately and refresh in the background.
+        """
+        entry = self._lookup(key, data_type)
+        if entry is not None:
+            data, stale = entry
+            if stale:
+                self._schedule_refresh(key, loader, data_type, tags, ttl)
+            return data
+        return self.single_flight.do(key, lambda: self._load(key, loader, data_type, tags, ttl))
+
+    def _load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        data_type: str,
+        tags: Iterable[str] = (),
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """Run loader as the single-flight leader and store its result."""
+        # A previous leader may have filled the cache since our miss
+        data = self.get(key, data_type)
+        if data is not None:
+            return data
+
+        lock = self._acquire_distributed_lock(key)
+        try:
+            if lock is not None:
+                # Another process may have loaded it while we waited for the lock
+                data = self.get(key, data_type)
+                if data is not None:
+                    return data
+            data = loader()
+            if data is not None:
+                self.set(key, data, data_type, tags, ttl)
+            return data
+        finally:
+            self._release_distributed_lock(lock)
+
+    async def get_or_load_async(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        data_type: str = 'static',
+        tags: Iterable[str] = (),
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """Asyncio counterpart of get_or_load for coroutine loaders."""
+        entry = self._lookup(key, data_type)
+        if entry is not None:
+            data, stale = entry
+            if stale:
+                self._schedule_async_refresh(key, loader, data_type, tags, ttl)
+            return data
+        return await self.async_single_flight.do(key, lambda: self._load_async(key, loader, data_type, tags, ttl))
+
+    async def _load_async(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        data_type: str,
+        tags: Iterable[str] = (),
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """Run an async loader as the single-flight leader and store its result."""
+        data = self.get(key, data_type)
+        if data is not None:
+            return data
+
+        import asyncio
+        lock = None
+        if self.distributed_lock and self.redis_cache:
+            lock = await asyncio.to_thread(self._acquire_distributed_lock, key)
+        try:
+            if lock is not None:
+                data = self.get(key, data_type)
+                if data is not None:
+                    return data
+            data = await loader()
+            if data is not None:
+                self.set(key, data, data_type, tags, ttl)
+            return data
+        finally:
+            if lock is not None:
+                await asyncio.to_thread(self._release_distributed_lock, lock)
+
+    def _acquire_distributed_lock(self, key: str):
+        """Take the cross-process lock for key, if enabled. Returns None when not held."""
+        if not (self.distributed_lock and self.redis_cache):
+            return None
+        return self.redis_cache.lock(key, timeout=self.lock_timeout, blocking_timeout=self.lock_timeout)
+
+    @staticmethod
+    def _release_distributed_lock(lock) -> None:
+        if lock is None:
+            return
+        import redis
+        try:
+            lock.release()
+        except redis.RedisError:
+            # Lock expired while loading; another process may already hold it
+            pass
 
     def invalidate(self, key: str) -> None:
         """Invalidate a key from all cache layers."""
@@ -73,35 +584,232 @@ class CacheManager:
         if self.redis_cache:
             self.redis_cache.delete(key)
         self.file_cache.delete(key)
+        if self.snapshot is not None:
+            self.snapshot.delete_many((key,))
+
+    def invalidate_tag(self, *tags: str) -> int:
+        """
+        Invalidate every key carrying any of the tags, in bulk on each layer.
+
+        Keys are collected from the local tag index and the Redis tag sets,
+        so keys tagged by other processes sharing Redis or the cache
+        directory are included. Returns the number of keys invalidated.
+        """
+        keys = self.tag_index.pop(tags)
+        if self.redis_cache:
+            keys |= self.redis_cache.pop_tags(tags)
+        snapshot = self.snapshot
+        if snapshot is not None:
+            keys |= snapshot.pop_tags(tags)
+            snapshot.delete_many(keys)
+        if not keys:
+            return 0
+        self.memory_cache.delete_many(keys)
+        if self.redis_cache:
+            self.redis_cache.delete_many(keys)
+        self.file_cache.delete_many(keys)
+        return len(keys)
 
     def clear_all(self) -> None:
-        """Clear all cache layers."""
+        """Clear all cache layers; in Redis only this cache's namespace is removed."""
         self.memory_cache.clear()
         if self.redis_cache:
             self.redis_cache.clear()
         self.file_cache.clear()
+        self.tag_index.clear()
+        # Left for the garbage collector to unmap; lookups may still be reading it
+        self.snapshot = None
 
     def warmup(self, data_dict: Dict[str, Any], data_type: str = 'static') -> None:
         """Warm up the cache with initial data."""
-        for key, value in data_dict.items():
-            self.set(key, value, data_type)
+        self.set_many(data_dict, data_type)
+
+    def export_snapshot(self, path: str) -> int:
+        """
+        Write every live local entry to a snapshot file for load_snapshot().
+
+        Entries come from the file layer, memory and any loaded snapshot,
+        newest copy first; Redis is left out, as replicas sharing it already
+        see its entries. Expiry times are stored as wall-clock times, so
+        each entry keeps its remaining TTL. Tags are exported with their
+        keys. Returns the number of entries written.
+        """
+        codec = get_codec('snapshot')
+        # key -> (value, expires_at, already encoded)
+        entries: Dict[str, Tuple[Any, float, bool]] = {}
+        if self.snapshot is not None:
+            for key, blob, expires_at in self.snapshot.raw_entries():
+                entries[key] = (blob, expires_at, True)
+        for key, value, expires_at in self.file_cache.items():
+            entries[key] = (value, expires_at, False)
+        for key, value, expires_at in self.memory_cache.items():
+            entries[key] = (value, expires_at, False)
+
+        tags = self.snapshot.tags() if self.snapshot is not None else {}
+        for tag, keys in self.tag_index.items().items():
+            tags[tag] = tags.get(tag, set()) | keys
+
+        def encoded() -> Iterator[Tuple[str, bytes, float]]:
+            for key, (value, expires_at, raw) in entries.items():
+                if raw:
+                    yield key, value, expires_at
+                    continue
+                try:
+                    yield key, codec.encode(value), expires_at
+                except TypeError:
+                    continue
+
+        return write_snapshot(path, encoded(), tags)
+
+    def load_snapshot(self, path: str) -> int:
+        """
+        Serve the entries of a snapshot written by export_snapshot().
+
+        Only the snapshot's index is read here; the file is memory-mapped and
+        each value is decoded on its first lookup, then kept in memory. The
+        snapshot is consulted after the other layers, and writes and
+        invalidations drop its copy of a key. Replaces any snapshot loaded
+        before. Returns the number of live entries.
+        """
+        snapshot = CacheSnapshot(path)
+        self.snapshot = snapshot
+        return len(snapshot)
+
+# Stored in place of a None result, which the cache layers treat as a miss
+NONE_SENTINEL = {'__cached_none__': True}
+
+def _canonical(value: Any) -> Any:
+    """json.dumps default for argument types without a JSON form."""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=_stable_json)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    raise TypeError(f"Cannot build a cache key from {type(value).__name__}")
+
+def _stable_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=_canonical)
+
+def _code_digest(code: CodeType, digest: Any) -> None:
+    digest.update(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            _code_digest(const, digest)
+        elif isinstance(const, frozenset):
+            # Set iteration order depends on the per-process string hash seed
+            digest.update(repr(sorted(map(repr, const))).encode('utf-8'))
+        else:
+            digest.update(repr(const).encode('utf-8'))
+    digest.update(repr(code.co_names).encode('utf-8'))
+
+def code_version(func: Callable) -> str:
+    """
+    Short digest of a function's bytecode, constants and referenced names.
+
+    It changes when the function body changes, but not for edits to
+    comments, formatting or line numbers, and is identical across processes.
+    """
+    digest = hashlib.blake2b(digest_size=4)
+    _code_digest(inspect.unwrap(func).__code__, digest)
+    return digest.hexdigest()
+
+def cache_decorator(
+    cache_manager: CacheManager,
+    key_prefix: str,
+    data_type: str = 'static',
+    ttl: Optional[int] = None,
+    none_ttl: Optional[int] = None,
+    schema: Optional[Union[int, str]] = None,
+    tags: Union[Iterable[str], Callable[..., Iterable[str]]] = (),
+    ignore: Iterable[str] = ('self', 'cls'),
+):
+    """
+    Decorator memoizing a function or coroutine function in cache_manager.
+
+    Keys look like '<prefix>:<qualname>:<code version>[:s<schema>]:<args digest>'.
+    The arguments are bound to the signature (so f(1, b=2) and f(b=2, a=1)
+    share an entry), serialized as canonical JSON and hashed with blake2b,
+    giving keys that match across processes and restarts. Arguments named
+    in `ignore` (self/cls by default) are left out. Calls whose arguments
+    cannot be serialized bypass the cache.
+
+    Changing the function body, or bumping `schema` when the stored format
+    changes, moves to new keys; old entries simply expire.
+
+    ttl overrides the data type's TTL, and each call may pass cache_ttl=
+    to override it again. None results are cached as a sentinel, for
+    none_ttl seconds if given (0 disables). tags are applied to every
+    entry; a callable receives the call's arguments and returns them.
+    """
+    ignore = frozenset(ignore)
 
-def cache_decorator(cache_manager: CacheManager, key_prefix: str, data_type: str = 'static'):
-    """Decorator for caching function results."""
     def decorator(func):
+        signature = inspect.signature(func)
+        takes_cache_ttl = 'cache_ttl' in signature.parameters
+        prefix = f"{key_prefix}:{func.__qualname__}:{code_version(func)}"
+        if schema is not None:
+            prefix += f":s{schema}"
+
+        def resolve(args, kwargs) -> Tuple[Optional[str], Optional[int], Tuple[str, ...]]:
+            call_ttl = None if takes_cache_ttl else kwargs.pop('cache_ttl', None)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {name: value for name, value in bound.arguments.items() if name not in ignore}
+            try:
+                encoded = _stable_json(arguments).encode('utf-8')
+            except (TypeError, ValueError):
+                return None, None, ()
+            key = f"{prefix}:{hashlib.blake2b(encoded, digest_size=16).hexdigest()}"
+            call_tags = tuple(tags(*args, **kwargs) if callable(tags) else tags)
+            return key, call_ttl if call_ttl is not None else ttl, call_tags
+
+        def cache_key(*args, **kwargs) -> Optional[str]:
+            """Key a call with these arguments would use, e.g. to delete it."""
+            return resolve(args, kwargs)[0]
+
+        def store_none(key: str, call_ttl: Optional[int], call_tags: Tuple[str, ...]) -> None:
+            if none_ttl != 0:
+                cache_manager.set(key, NONE_SENTINEL, data_type, call_tags, none_ttl if none_ttl is not None else call_ttl)
+
+        def unwrap(data: Any) -> Any:
+            return None if data == NONE_SENTINEL else data
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key, call_ttl, call_tags = resolve(args, kwargs)
+                if key is None:
+                    return await func(*args, **kwargs)
+
+                async def load():
+                    data = await func(*args, **kwargs)
+                    if data is None:
+                        store_none(key, call_ttl, call_tags)
+                    return data
+
+                return unwrap(await cache_manager.get_or_load_async(key, load, data_type, call_tags, call_ttl))
+            async_wrapper.cache_key = cache_key
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Create cache key from function name and arguments
-            cache_key = f"{key_prefix}:{func.__name__}:{hash(str(args) + str(kwargs))}"
-            
-            # Try to get from cache
-            result = cache_manager.get(cache_key, data_type)
-            if result is not None:
-                return result
-            
-            # Call function and cache result
-            result = func(*args, **kwargs)
-            cache_manager.set(cache_key, result, data_type)
-            return result
+            key, call_ttl, call_tags = resolve(args, kwargs)
+            if key is None:
+                return func(*args, **kwargs)
+
+            def load():
+                data = func(*args, **kwargs)
+                if data is None:
+                    store_none(key, call_ttl, call_tags)
+                return data
+
+            # Concurrent misses on the same key share one call to func
+            return unwrap(cache_manager.get_or_load(key, load, data_type, call_tags, call_ttl))
+        wrapper.cache_key = cache_key
         return wrapper
     return decorator
@@ -0,0 +1,163 @@
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .codecs import Codec, CodecError, decode
+from ..metrics import CACHE_ERRORS
+
+# magic, index offset, index length, created at
+HEADER = struct.Struct('<8sQQd')
+MAGIC = b'ESCSNAP1'
+
+# The index is read in one go on load; msgpack decodes its long columns fastest
+INDEX_CODEC = Codec('msgpack', 'zstd', threshold=0)
+
+def write_snapshot(
+    path: str,
+    entries: Iterable[Tuple[str, bytes, float]],
+    tags: Optional[Dict[str, Iterable[str]]] = None,
+) -> int:
+    """
+    Write (key, encoded value, expires_at) entries to a snapshot file.
+
+    Layout: a fixed header, the codec-encoded values back to back, then one
+    compressed index holding keys, offsets, lengths and expiry times as
+    columns, plus the tag -> entry positions map. Values are stored as
+    their codec bytes, so readers can decode any one of them in place. The
+    file is written next to `path` and moved over it when complete.
+    Returns the number of entries written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    keys: List[str] = []
+    offsets: List[int] = []
+    lengths: List[int] = []
+    expiries: List[float] = []
+    with tmp_path.open('wb') as f:
+        f.write(bytes(HEADER.size))
+        offset = HEADER.size
+        for key, blob, expires_at in entries:
+            f.write(blob)
+            keys.append(key)
+            offsets.append(offset)
+            lengths.append(len(blob))
+            expiries.append(expires_at)
+            offset += len(blob)
+
+        positions = {key: i for i, key in enumerate(keys)}
+        tag_positions = {}
+        for tag, tagged in (tags or {}).items():
+            members = [positions[key] for key in tagged if key in positions]
+            if members:
+                tag_positions[tag] = members
+        index = INDEX_CODEC.encode({
+            'keys': keys,
+            'offsets': offsets,
+            'lengths': lengths,
+            'expires_at': expiries,
+            'tags': tag_positions,
+        })
+        f.write(index)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, offset, len(index), time.time()))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(keys)
+
+class CacheSnapshot:
+    """
+    Read-only view of a snapshot file written by write_snapshot().
+
+    The file is memory-mapped and only the index is decoded on open;
+    entries already expired are skipped. A value is decoded from the
+    mapping when it is requested. Entries can be dropped (after a write or
+    an invalidation elsewhere) but never added.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with self.path.open('rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset, index_length, self.created_at = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise CodecError(f"{path} is not a cache snapshot")
+        index = decode(self._mmap[index_offset:index_offset + index_length])
+        self._keys: List[str] = index['keys']
+        self._offsets: List[int] = index['offsets']
+        self._lengths: List[int] = index['lengths']
+        self._expires: List[float] = index['expires_at']
+        self._tags: Dict[str, List[int]] = index['tags']
+        now = time.time()
+        self._positions: Dict[str, int] = {
+            key: i for i, (key, expires_at) in enumerate(zip(self._keys, self._expires)) if expires_at > now
+        }
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    def _blob(self, i: int) -> bytes:
+        offset = self._offsets[i]
+        return self._mmap[offset:offset + self._lengths[i]]
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Decode and return (value, expires_at) for a live entry."""
+        i = self._positions.get(key)
+        if i is None:
+            return None
+        expires_at = self._expires[i]
+        if expires_at < time.time():
+            self._positions.pop(key, None)
+            return None
+        try:
+            return decode(self._blob(i)), expires_at
+        except CodecError:
+            CACHE_ERRORS.inc(('snapshot', 'get'))
+            self._positions.pop(key, None)
+            return None
+
+    def get_entries(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, float]]:
+        results = {}
+        for key in keys:
+            entry = self.get_entry(key)
+            if entry is not None:
+                results[key] = entry
+        return results
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._positions.pop(key, None)
+
+    def pop_tags(self, tags: Iterable[str]) -> Set[str]:
+        """
+        Remove the tags and return the keys that carried any of them.
+
+        Like TagIndex, a key stays tagged after its entry is dropped here,
+        since the other layers may hold a newer copy of it.
+        """
+        keys = set()
+        for tag in tags:
+            keys.update(self._keys[i] for i in self._tags.pop(tag, ()))
+        return keys
+
+    def raw_entries(self) -> Iterator[Tuple[str, bytes, float]]:
+        """(key, encoded value, expires_at) of every live entry, without decoding."""
+        now = time.time()
+        for key, i in list(self._positions.items()):
+            if self._expires[i] > now:
+                yield key, self._blob(i), self._expires[i]
+
+    def tags(self) -> Dict[str, Set[str]]:
+        """Tag -> keys, as in pop_tags()."""
+        return {tag: {self._keys[i] for i in positions} for tag, positions in self._tags.items()}
+
+    def close(self) -> None:
+        self._positions = {}
+        self._mmap.close()
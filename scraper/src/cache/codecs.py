@@ -0,0 +1,141 @@
+import json
+import zlib
+from typing import Any, Dict, Optional, Union
+
+from ..config import CACHE_CONFIG
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Encoded values start with MAGIC, a format byte and a compression byte.
+# Anything without the header is legacy plain JSON text.
+MAGIC = b'\x00C'
+HEADER_SIZE = len(MAGIC) + 2
+
+FORMATS = {'json': 1, 'orjson': 2, 'msgpack': 3}
+COMPRESSIONS = {'none': 0, 'zlib': 1, 'zstd': 2}
+_FORMAT_NAMES = {v: k for k, v in FORMATS.items()}
+_COMPRESSION_NAMES = {v: k for k, v in COMPRESSIONS.items()}
+
+class CodecError(ValueError):
+    """Raised when a stored value cannot be decoded."""
+
+class Codec:
+    def __init__(
+        self,
+        format: str = 'json',
+        compression: Optional[str] = None,
+        threshold: int = 1024,
+        level: Optional[int] = None,
+    ):
+        """
+        Serializer plus optional compression for values above `threshold` bytes.
+
+        Unavailable optional libraries fall back to json / zlib; the header
+        records what was actually used so any reader can decode it.
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Unknown codec format: {format}")
+        compression = compression or 'none'
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown codec compression: {compression}")
+
+        if format == 'orjson' and orjson is None:
+            format = 'json'
+        if format == 'msgpack' and msgpack is None:
+            format = 'json'
+        if compression == 'zstd' and zstandard is None:
+            compression = 'zlib'
+
+        self.format = format
+        self.compression = compression
+        self.threshold = threshold
+        self.level = level
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize (and possibly compress) a value. Raises TypeError if it is not serializable."""
+        payload = _serialize(self.format, value)
+        compression = 'none'
+        if self.compression != 'none' and len(payload) >= self.threshold:
+            payload = _compress(self.compression, payload, self.level)
+            compression = self.compression
+        return MAGIC + bytes((FORMATS[self.format], COMPRESSIONS[compression])) + payload
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        return decode(data)
+
+def decode(data: Union[bytes, str]) -> Any:
+    """Decode a value written by any codec, or legacy plain JSON."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    try:
+        if not data.startswith(MAGIC):
+            return json.loads(data)
+        format_id, compression_id = data[len(MAGIC)], data[len(MAGIC) + 1]
+        payload = data[HEADER_SIZE:]
+        compression = _COMPRESSION_NAMES[compression_id]
+        if compression != 'none':
+            payload = _decompress(compression, payload)
+        return _deserialize(_FORMAT_NAMES[format_id], payload)
+    except CodecError:
+        raise
+    except Exception as e:
+        raise CodecError(f"Cannot decode cached value: {e}") from e
+
+def _serialize(format: str, value: Any) -> bytes:
+    if format == 'orjson':
+        try:
+            # Match json.dumps, which coerces non-string dict keys
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError as e:
+            raise TypeError(str(e)) from e
+    if format == 'msgpack':
+        return msgpack.packb(value, use_bin_type=True)
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+def _deserialize(format: str, payload: bytes) -> Any:
+    if format == 'msgpack':
+        if msgpack is None:
+            raise CodecError("msgpack is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    # orjson output is plain JSON, so either parser can read it. json
+    # values are left to json: orjson rejects NaN/Infinity and turns
+    # integers beyond 64 bits into floats
+    if format == 'orjson' and orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+def _compress(compression: str, payload: bytes, level: Optional[int]) -> bytes:
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor(level=level or 3).compress(payload)
+    return zlib.compress(payload, level if level is not None else 6)
+
+def _decompress(compression: str, payload: bytes) -> bytes:
+    if compression == 'zstd':
+        if zstandard is None:
+            raise CodecError("zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return zlib.decompress(payload)
+
+_codecs: Dict[str, Codec] = {}
+
+def get_codec(data_type: str = 'default') -> Codec:
+    """Return the codec configured for a data type in CACHE_CONFIG['codecs']."""
+    codec = _codecs.get(data_type)
+    if codec is None:
+        config = CACHE_CONFIG.get('codecs', {})
+        codec = Codec(**config.get(data_type, config.get('default', {})))
+        _codecs[data_type] = codec
+    return codec
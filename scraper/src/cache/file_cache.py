@@ -1,57 +1,129 @@
 import os
-import json
 import time
-from typing import Any, Optional
+import shutil
+import hashlib
+import logging
+import uuid
+from typing import Any, Optional, Tuple, Dict, Iterable, Iterator
 from pathlib import Path
+from .codecs import Codec, CodecError, decode, get_codec
+from ..metrics import CACHE_ERRORS
+
+logger = logging.getLogger(__name__)
 
 class FileCache:
+    # Expiry index files each cover one window of expiration times
+    EXPIRY_BUCKET_SECONDS = 3600
+
     def __init__(self, cache_dir: str = "cache"):
         """Initialize file cache with specified directory."""
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        
+        self.index_dir = self.cache_dir / "_expiry"
+        self.index_dir.mkdir(exist_ok=True)
+
+    @staticmethod
+    def _hash_key(key: str) -> str:
+        """Stable digest of a key; unlike hash() it is identical across processes and restarts."""
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _path_for_hash(self, hashed_key: str) -> Path:
+        # Two levels of 256-way sharding keep directories small
+        return self.cache_dir / hashed_key[:2] / hashed_key[2:4] / f"{hashed_key}.json"
+
     def _get_cache_path(self, key: str) -> Path:
         """Get the file path for a cache key."""
-        # Use hash of key to avoid filesystem issues with long/special characters
-        hashed_key = str(hash(key))
-        return self.cache_dir / f"{hashed_key}.json"
-        
+        return self._path_for_hash(self._hash_key(key))
+
+    def _index_path(self, expires_at: float) -> Path:
+        bucket = int(expires_at // self.EXPIRY_BUCKET_SECONDS)
+        return self.index_dir / f"{bucket}.idx"
+
     def get(self, key: str) -> Optional[Any]:
         """Get value from file cache."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Get (value, expires_at) from file cache."""
         cache_path = self._get_cache_path(key)
-        
+
         try:
-            if not cache_path.exists():
+            data = decode(cache_path.read_bytes())
+
+            # Guard against digest collisions
+            if data.get('key', key) != key:
                 return None
-                
-            with cache_path.open('r') as f:
-                data = json.load(f)
-                
+
             # Check if data has expired
             if data['expires_at'] < time.time():
                 self.delete(key)
                 return None
-                
-            return data['value']
-        except (json.JSONDecodeError, KeyError, IOError):
+
+            return data['value'], data['expires_at']
+        except FileNotFoundError:
+            return None
+        except (CodecError, KeyError, TypeError, AttributeError, IOError):
+            CACHE_ERRORS.inc(('file', 'get'))
             return None
-            
-    def set(self, key: str, value: Any, ttl: int = 86400) -> None:
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get all live values for the given keys; missing keys are omitted."""
+        return {key: value for key, (value, _) in self.get_entries(keys).items()}
+
+    def get_entries(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, float]]:
+        """Get (value, expires_at) for all live keys among the given ones."""
+        results = {}
+        for key in keys:
+            entry = self.get_entry(key)
+            if entry is not None:
+                results[key] = entry
+        return results
+
+    def set_many(self, mapping: Dict[str, Any], ttl: int = 86400, codec: Optional[Codec] = None) -> None:
+        """Set many values with the same TTL."""
+        for key, value in mapping.items():
+            self.set(key, value, ttl, codec)
+
+    def set(self, key: str, value: Any, ttl: int = 86400, codec: Optional[Codec] = None) -> None:
         """Set value in file cache with expiration."""
-        cache_path = self._get_cache_path(key)
-        
+        hashed_key = self._hash_key(key)
+        cache_path = self._path_for_hash(hashed_key)
+
         try:
+            expires_at = time.time() + ttl
             data = {
+                'key': key,
                 'value': value,
-                'expires_at': time.time() + ttl
+                'expires_at': expires_at
             }
-            
-            with cache_path.open('w') as f:
-                json.dump(data, f)
+
+            encoded = (codec or get_codec()).encode(data)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # Readers see either the old file or the new one, never a partial write
+            tmp_path = cache_path.with_name(f"{cache_path.name}.{uuid.uuid4().hex}.tmp")
+            try:
+                tmp_path.write_bytes(encoded)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+
+            # Record the entry in the bucket for its expiry window
+            with self._index_path(expires_at).open('a') as f:
+                f.write(f"{hashed_key} {expires_at}\n")
         except (IOError, TypeError):
             # Log error but don't raise - cache failures shouldn't break the app
-            pass
-            
+            CACHE_ERRORS.inc(('file', 'set'))
+
+    def touch(self, key: str, ttl: int, codec: Optional[Codec] = None) -> bool:
+        """Extend the expiration of a live entry. Returns False if it is missing or expired."""
+        value = self.get(key)
+        if value is None:
+            return False
+        self.set(key, value, ttl, codec)
+        return True
+
     def delete(self, key: str) -> None:
         """Remove a key from file cache."""
         cache_path = self._get_cache_path(key)
@@ -59,26 +131,122 @@ class FileCache:
             cache_path.unlink(missing_ok=True)
         except IOError:
             pass
-            
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Remove many keys from file cache."""
+        for key in keys:
+            self.delete(key)
+
     def clear(self) -> None:
-        """Clear all entries from file cache."""
+        """
+        Clear all entries from file cache.
+
+        Each shard is moved into a trash directory inside the cache
+        directory, so the cache is empty at once even if the directory
+        itself is a mount point, and the trash is deleted afterwards. A
+        shard that cannot be moved is deleted in place; entries that cannot
+        be removed at all are counted and logged, not raised.
+        """
+        trash = self.cache_dir / f".trash-{uuid.uuid4().hex}"
+        failed = []
         try:
-            for cache_file in self.cache_dir.glob('*.json'):
-                cache_file.unlink()
+            trash.mkdir(parents=True)
+            children = [path for path in self.cache_dir.iterdir() if self._is_cache_path(path)]
+        except OSError as e:
+            CACHE_ERRORS.inc(('file', 'clear'))
+            logger.warning("Could not clear file cache %s: %s", self.cache_dir, e)
+            return
+        for path in children:
+            try:
+                path.rename(trash / path.name)
+            except OSError:
+                try:
+                    _remove_tree(path)
+                except OSError:
+                    failed.append(path)
+        self.index_dir.mkdir(exist_ok=True)
+        # Also sweep trash left behind by an interrupted clear
+        for old_trash in self.cache_dir.glob('.trash-*'):
+            shutil.rmtree(old_trash, ignore_errors=True)
+        if failed:
+            CACHE_ERRORS.inc(('file', 'clear'))
+            logger.warning("Could not clear %d paths in %s, e.g. %s", len(failed), self.cache_dir, failed[0])
+
+    def _is_cache_path(self, path: Path) -> bool:
+        """Shard directories, the expiry index and legacy flat files; other files in the directory are left alone."""
+        if path.suffix == '.json':
+            return True
+        return path == self.index_dir or (len(path.name) == 2 and path.is_dir())
+
+    def items(self) -> Iterator[Tuple[str, Any, float]]:
+        """(key, value, expires_at) of every live entry, read shard by shard."""
+        now = time.time()
+        for cache_path in self.cache_dir.glob('??/??/*.json'):
+            try:
+                data = decode(cache_path.read_bytes())
+                if 'key' in data and data['expires_at'] >= now:
+                    yield data['key'], data['value'], data['expires_at']
+            except FileNotFoundError:
+                continue
+            except (CodecError, KeyError, TypeError, AttributeError, IOError):
+                CACHE_ERRORS.inc(('file', 'items'))
+
+    def cleanup_expired(self) -> None:
+        """
+        Remove expired cache files.
+
+        Only index buckets whose whole window has passed are read, and only
+        the entries they list are checked, so the cost follows the number of
+        expired entries rather than the size of the cache.
+        """
+        now = time.time()
+        current_bucket = int(now // self.EXPIRY_BUCKET_SECONDS)
+        try:
+            index_files = list(self.index_dir.glob('*.idx'))
         except IOError:
+            return
+
+        for index_file in index_files:
+            try:
+                bucket = int(index_file.stem)
+            except ValueError:
+                continue
+            if bucket >= current_bucket:
+                continue
+            try:
+                with index_file.open('r') as f:
+                    hashed_keys = {line.split(' ', 1)[0] for line in f if line.strip()}
+            except IOError:
+                continue
+            for hashed_key in hashed_keys:
+                self._remove_if_expired(self._path_for_hash(hashed_key), now)
+            index_file.unlink(missing_ok=True)
+
+        self._remove_legacy_files()
+
+    @staticmethod
+    def _remove_if_expired(cache_path: Path, now: float) -> None:
+        """Delete a cache file unless it was rewritten with a later expiry."""
+        try:
+            data = decode(cache_path.read_bytes())
+            if data['expires_at'] < now:
+                cache_path.unlink()
+        except FileNotFoundError:
             pass
-            
-    def cleanup_expired(self) -> None:
-        """Remove all expired cache files."""
+        except (CodecError, KeyError, TypeError, IOError):
+            # Delete corrupt cache files
+            cache_path.unlink(missing_ok=True)
+
+    def _remove_legacy_files(self) -> None:
+        """Drop flat files from the old per-process hash() layout; they can never be read again."""
         try:
             for cache_file in self.cache_dir.glob('*.json'):
-                try:
-                    with cache_file.open('r') as f:
-                        data = json.load(f)
-                    if data['expires_at'] < time.time():
-                        cache_file.unlink()
-                except (json.JSONDecodeError, KeyError, IOError):
-                    # Delete corrupt cache files
-                    cache_file.unlink()
+                cache_file.unlink(missing_ok=True)
         except IOError:
             pass
+
+def _remove_tree(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path)
+    else:
+        path.unlink(missing_ok=True)
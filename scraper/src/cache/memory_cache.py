@@ -1,54 +1,192 @@
+import heapq
+import sys
+import threading
 import time
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Tuple, Iterable, List
 from collections import OrderedDict
 
+from ..metrics import CACHE_EVICTIONS
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'size')
+
+    def __init__(self, value: Any, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
 class MemoryCache:
-    def __init__(self, max_size: int = 1000):
+    def __init__(self, max_size: int = 1000, max_bytes: Optional[int] = None):
+        """
+        Thread-safe LRU cache bounded by entry count and, optionally, by estimated bytes.
+
+        Expirations are tracked in a min-heap so that expired entries are
+        removed in O(log n) each instead of scanning the whole cache.
+        """
         self.max_size = max_size
-        self.cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
-    
+        self.max_bytes = max_bytes
+        self.cache: OrderedDict[str, _Entry] = OrderedDict()
+        self.current_bytes = 0
+        # (expires_at, key) pairs; stale pairs are skipped lazily when popped
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._lock = threading.RLock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache if it exists and hasn't expired."""
-        if key not in self.cache:
-            return None
-            
-        entry = self.cache[key]
-        if entry['expires_at'] < time.time():
-            self.delete(key)
-            return None
-            
-        # Move to end to implement LRU
-        self.cache.move_to_end(key)
-        return entry['value']
-    
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Get (value, expires_at) from cache if it exists and hasn't expired."""
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            if entry.expires_at < time.time():
+                self._remove(key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            # Move to end to implement LRU
+            self.cache.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry.value, entry.expires_at
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get all live values for the given keys; missing keys are omitted."""
+        return {key: value for key, (value, _) in self.get_entries(keys).items()}
+
+    def get_entries(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, float]]:
+        """Get (value, expires_at) for all live keys among the given ones."""
+        results = {}
+        with self._lock:
+            for key in keys:
+                entry = self.get_entry(key)
+                if entry is not None:
+                    results[key] = entry
+        return results
+
+    def set_many(self, mapping: Dict[str, Any], ttl: int, ttls: Optional[Dict[str, int]] = None) -> None:
+        """Set many values; ttls optionally overrides the TTL per key."""
+        ttls = ttls or {}
+        with self._lock:
+            for key, value in mapping.items():
+                self.set(key, value, ttls.get(key, ttl))
+
     def set(self, key: str, value: Any, ttl: int) -> None:
         """Set value in cache with expiration time."""
-        # Enforce max size limit using LRU
-        if len(self.cache) >= self.max_size:
-            self.cache.popitem(last=False)
-            
-        self.cache[key] = {
-            'value': value,
-            'expires_at': time.time() + ttl
-        }
-        
-        # Move to end to implement LRU
-        self.cache.move_to_end(key)
-    
+        size = estimate_size(value)
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            # Overwriting replaces the old entry; it must not evict anything else
+            self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Would evict the whole cache and still not fit
+                return
+
+            self.cache[key] = _Entry(value, expires_at, size)
+            self.current_bytes += size
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+
+            # Free expired entries before evicting live ones
+            self._expire(now)
+            while self.cache and (
+                len(self.cache) > self.max_size
+                or (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+            ):
+                _, evicted = self.cache.popitem(last=False)
+                self.current_bytes -= evicted.size
+                self.stats['evictions'] += 1
+                CACHE_EVICTIONS.inc(('memory',))
+            self._compact_heap()
+
+    def touch(self, key: str, ttl: int) -> bool:
+        """Extend the expiration of a live entry. Returns False if it is missing or expired."""
+        with self._lock:
+            entry = self.cache.get(key)
+            now = time.time()
+            if entry is None or entry.expires_at < now:
+                return False
+            entry.expires_at = now + ttl
+            heapq.heappush(self._expiry_heap, (entry.expires_at, key))
+            self._compact_heap()
+            return True
+
     def delete(self, key: str) -> None:
         """Remove a key from cache."""
-        self.cache.pop(key, None)
-    
+        with self._lock:
+            self._remove(key)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Remove many keys under a single lock acquisition."""
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
     def clear(self) -> None:
         """Clear all entries from cache."""
-        self.cache.clear()
-    
+        with self._lock:
+            self.cache.clear()
+            self._expiry_heap.clear()
+            self.current_bytes = 0
+
     def cleanup(self) -> None:
         """Remove all expired entries."""
+        with self._lock:
+            self._expire(time.time())
+            self._compact_heap()
+
+    def items(self) -> List[Tuple[str, Any, float]]:
+        """(key, value, expires_at) of every live entry, least recently used first."""
         now = time.time()
-        expired_keys = [
-            key for key, entry in self.cache.items()
-            if entry['expires_at'] < now
-        ]
-        for key in expired_keys:
-            self.delete(key)
+        with self._lock:
+            return [(key, entry.value, entry.expires_at) for key, entry in self.cache.items() if entry.expires_at >= now]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit, miss, eviction and expiration counters plus current usage."""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'hit_ratio': self.stats['hits'] / lookups if lookups else 0.0,
+                'entries': len(self.cache),
+                'bytes': self.current_bytes,
+            }
+
+    def _remove(self, key: str) -> None:
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+
+    def _expire(self, now: float) -> None:
+        """Pop heap entries whose time has passed, dropping those still current in the cache."""
+        heap = self._expiry_heap
+        while heap and heap[0][0] < now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self.cache.get(key)
+            # Skip pairs left behind by overwrites and touches
+            if entry is not None and entry.expires_at <= expires_at:
+                self._remove(key)
+                self.stats['expirations'] += 1
+
+    def _compact_heap(self) -> None:
+        """Rebuild the heap when stale pairs outnumber live entries."""
+        if len(self._expiry_heap) > 2 * len(self.cache) + 64:
+            self._expiry_heap = [(entry.expires_at, key) for key, entry in self.cache.items()]
+            heapq.heapify(self._expiry_heap)
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a JSON-like value in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k) + estimate_size(v)
+    elif isinstance(value, (list, tuple, set)):
+        for item in value:
+            size += estimate_size(item)
+    return size
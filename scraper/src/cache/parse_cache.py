@@ -0,0 +1,154 @@
+from typing import Any, Dict, Iterable, Optional, Set
+from ..errors import CircuitOpenError
+from .cache_manager import CacheManager
+
+class RevisionParseCache:
+    """
+    Cache of action=parse results keyed by (title, revid).
+
+    Before parsing, one batched prop=revisions query finds the current
+    revision of every requested title. Titles whose revision is already
+    cached are served from cache and have their TTL refreshed; only titles
+    that changed (or were never parsed) spend a call from the parse budget.
+
+    Titles found not to exist are remembered for the short 'missing' TTL
+    and left out of revision checks. While the API's circuit breaker is
+    open, the last parse seen for each title is served instead.
+    """
+
+    def __init__(self, client, cache_manager: CacheManager, data_type: str = 'parse'):
+        self.client = client
+        self.cache_manager = cache_manager
+        self.data_type = data_type
+        self.stats = {
+            'revision_checks': 0,
+            'parse_calls': 0,
+            'parse_calls_avoided': 0,
+            'known_missing': 0,
+            'served_stale': 0,
+        }
+
+    @staticmethod
+    def _page_key(title: str, revid: int) -> str:
+        return f"parse:{title}@{revid}"
+
+    @staticmethod
+    def _revision_key(title: str) -> str:
+        return f"parse:revid:{title}"
+
+    @staticmethod
+    def _missing_key(title: str) -> str:
+        return f"missing:{title}"
+
+    @staticmethod
+    def page_tag(title: str) -> str:
+        """Tag shared by every cache entry derived from a page; see CacheManager.invalidate_tag."""
+        return f"page:{title}"
+
+    def get_parsed_page(self, title: str) -> Optional[Dict[str, Any]]:
+        """Get the parsed page for a single title, or None if the page does not exist."""
+        return self.get_parsed_pages([title]).get(title)
+
+    def get_parsed_pages(self, titles: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Get parsed pages for many titles, parsing only those whose revision changed."""
+        titles = list(dict.fromkeys(titles))
+        missing = self.known_missing(titles)
+        titles = [title for title in titles if title not in missing]
+        if not titles:
+            return {}
+        try:
+            revisions = self.client.get_latest_revisions(titles)
+        except CircuitOpenError:
+            return self._serve_stale(titles)
+        self.stats['revision_checks'] += 1
+
+        results = {}
+        for title in titles:
+            revid = revisions.get(title)
+            if revid is None:
+                self.mark_missing(title)
+                continue
+
+            cached = self.get_cached(title, revid)
+            if cached is not None:
+                results[title] = cached
+                continue
+
+            try:
+                parsed = self.client.get_parsed_page(title)
+            except CircuitOpenError:
+                results.update(self._serve_stale([title]))
+                continue
+            self.stats['parse_calls'] += 1
+            if 'parse' not in parsed:
+                # e.g. the page was deleted after the revision query
+                self.mark_missing(title)
+                continue
+            # The page may have been edited since the revision query; file
+            # the result under the revision that was actually parsed
+            revid = parsed['parse'].get('revid') or revid
+            self.store(title, revid, parsed)
+            results[title] = parsed
+        return results
+
+    def get_cached(self, title: str, revid: int) -> Optional[Dict[str, Any]]:
+        """Return the cached parse of this exact revision, refreshing its TTL, or None."""
+        key = self._page_key(title, revid)
+        # A parse of this exact revision is current however old the entry is
+        cached = self.cache_manager.get(key, self.data_type, allow_stale=True)
+        if cached is not None:
+            # Unchanged revision: keep it alive without spending a parse call
+            self.cache_manager.touch(key, self.data_type)
+            self.cache_manager.touch(self._revision_key(title), self.data_type)
+            self.stats['parse_calls_avoided'] += 1
+        return cached
+
+    def get_latest_cached(self, title: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Return the parse of the last revision seen for title, without checking for a newer one.
+
+        Past its TTL the last revision seen is not trusted and None is
+        returned, unless allow_stale is set.
+        """
+        revid = self.cache_manager.get(self._revision_key(title), self.data_type, allow_stale=allow_stale)
+        if revid is None:
+            return None
+        return self.cache_manager.get(self._page_key(title, revid), self.data_type, allow_stale=True)
+
+    def _serve_stale(self, titles: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        for title in titles:
+            cached = self.get_latest_cached(title, allow_stale=True)
+            if cached is not None:
+                self.stats['served_stale'] += 1
+                results[title] = cached
+        return results
+
+    def known_missing(self, titles: Iterable[str]) -> Set[str]:
+        """The titles recently found not to exist."""
+        keys = {self._missing_key(title): title for title in titles}
+        found = self.cache_manager.get_many(keys, 'missing')
+        self.stats['known_missing'] += len(found)
+        return {keys[key] for key in found}
+
+    def mark_missing(self, title: str) -> None:
+        """Remember that title does not exist, until the 'missing' TTL or a change to the page."""
+        self.cache_manager.set(self._missing_key(title), True, 'missing', (self.page_tag(title),))
+
+    def invalidate(self, title: str) -> None:
+        """Forget the parse of the last revision seen for title, and everything else tagged with the page."""
+        self.cache_manager.invalidate_tag(self.page_tag(title))
+        # Entries cached before they were tagged
+        revid = self.cache_manager.get(self._revision_key(title), self.data_type, allow_stale=True)
+        if revid is not None:
+            self.cache_manager.invalidate(self._page_key(title, revid))
+        self.cache_manager.invalidate(self._revision_key(title))
+
+    def store(self, title: str, revid: int, parsed: Dict[str, Any]) -> None:
+        """Cache a parse result and drop the entry for the revision it supersedes."""
+        previous = self.cache_manager.get(self._revision_key(title), self.data_type, allow_stale=True)
+        if previous is not None and previous != revid:
+            self.cache_manager.invalidate(self._page_key(title, previous))
+        tags = (self.page_tag(title),)
+        self.cache_manager.set(self._page_key(title, revid), parsed, self.data_type, tags)
+        self.cache_manager.set(self._revision_key(title), revid, self.data_type, tags)
@@ -1,53 +1,245 @@
-from typing import Any, Optional
+import re
+import time
+from typing import Any, Optional, Tuple, Dict, Iterable, Set
 import redis
-import json
+import redis.lock
 from datetime import timedelta
+from .codecs import Codec, CodecError, decode, get_codec
+from ..metrics import CACHE_ERRORS
 
 class RedisCache:
-    def __init__(self, redis_url: Optional[str] = None):
-        """Initialize Redis connection."""
+    # Keys per pipeline when reading or writing in bulk
+    BATCH_SIZE = 1000
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        socket_timeout: Optional[float] = None,
+        socket_connect_timeout: Optional[float] = None,
+        namespace: Optional[str] = None,
+        pool_timeout: Optional[float] = None,
+    ):
+        """
+        Initialize Redis connection backed by a shared connection pool.
+
+        When all `max_connections` are in use, callers wait up to
+        `pool_timeout` seconds for one to be released instead of failing.
+
+        With a namespace every key is stored as '<namespace>:<key>', so that
+        clear() only removes this cache's keys from a shared database.
+        """
+        pool_options = {
+            'max_connections': max_connections,
+            'socket_timeout': socket_timeout,
+            'socket_connect_timeout': socket_connect_timeout,
+            'timeout': pool_timeout,
+            'health_check_interval': 30,
+        }
+        pool_options = {k: v for k, v in pool_options.items() if v is not None}
         if redis_url:
-            self.redis = redis.from_url(redis_url)
+            pool = redis.BlockingConnectionPool.from_url(redis_url, **pool_options)
         else:
-            self.redis = redis.Redis(host='localhost', port=6379, db=0)
-            
+            pool = redis.BlockingConnectionPool(host='localhost', port=6379, db=0, **pool_options)
+        self.redis = redis.Redis(connection_pool=pool)
+        self.namespace = namespace
+        self._prefix = f"{namespace}:" if namespace else ''
+
+    def _key(self, key: str) -> str:
+        return self._prefix + key
+
+    def _tag_key(self, tag: str) -> str:
+        return self._key(f"_tag:{tag}")
+
     def get(self, key: str) -> Optional[Any]:
         """Get value from Redis cache."""
         try:
-            value = self.redis.get(key)
+            value = self.redis.get(self._key(key))
             if value is None:
                 return None
-            return json.loads(value)
-        except (redis.RedisError, json.JSONDecodeError):
+            return decode(value)
+        except (redis.RedisError, CodecError):
+            CACHE_ERRORS.inc(('redis', 'get'))
             return None
             
-    def set(self, key: str, value: Any, ttl: int) -> None:
-        """Set value in Redis cache with expiration."""
-        try:
-            serialized = json.dumps(value)
-            self.redis.setex(
-                name=key,
-                time=timedelta(seconds=ttl),
-                value=serialized
-            )
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Get (value, expires_at) from Redis cache in a single round trip."""
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(self._key(key))
+            pipe.pttl(self._key(key))
+            value, pttl = pipe.execute()
+            if value is None:
+                return None
+            # PTTL is -1 for keys without an expiry
+            expires_at = time.time() + pttl / 1000 if pttl >= 0 else float('inf')
+            return decode(value), expires_at
+        except (redis.RedisError, CodecError):
+            CACHE_ERRORS.inc(('redis', 'get'))
+            return None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get all values for the given keys; missing keys are omitted."""
+        return {key: value for key, (value, _) in self.get_entries(keys).items()}
+
+    def get_entries(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, float]]:
+        """Get (value, expires_at) for many keys with one MGET + PTTL pipeline per batch."""
+        keys = list(dict.fromkeys(keys))
+        results = {}
+        for start in range(0, len(keys), self.BATCH_SIZE):
+            batch = keys[start:start + self.BATCH_SIZE]
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.mget([self._key(key) for key in batch])
+                for key in batch:
+                    pipe.pttl(self._key(key))
+                values, *pttls = pipe.execute()
+            except redis.RedisError:
+                CACHE_ERRORS.inc(('redis', 'get_many'))
+                continue
+            now = time.time()
+            for key, value, pttl in zip(batch, values, pttls):
+                if value is None:
+                    continue
+                try:
+                    decoded = decode(value)
+                except CodecError:
+                    CACHE_ERRORS.inc(('redis', 'get_many'))
+                    continue
+                results[key] = (decoded, now + pttl / 1000 if pttl >= 0 else float('inf'))
+        return results
+
+    def set_many(
+        self,
+        mapping: Dict[str, Any],
+        ttl: int,
+        codec: Optional[Codec] = None,
+        ttls: Optional[Dict[str, int]] = None,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """Set many values in pipelined batches; ttls optionally overrides the TTL per key."""
+        codec = codec or get_codec()
+        ttls = ttls or {}
+        tags = list(tags)
+        items = list(mapping.items())
+        for start in range(0, len(items), self.BATCH_SIZE):
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                written = []
+                for key, value in items[start:start + self.BATCH_SIZE]:
+                    try:
+                        serialized = codec.encode(value)
+                    except TypeError:
+                        continue
+                    pipe.setex(name=self._key(key), time=timedelta(seconds=ttls.get(key, ttl)), value=serialized)
+                    written.append(key)
+                if written:
+                    for tag in tags:
+                        pipe.sadd(self._tag_key(tag), *written)
+                pipe.execute()
+            except redis.RedisError:
+                # Log error but don't raise - cache failures shouldn't break the app
+                CACHE_ERRORS.inc(('redis', 'set_many'))
+
+    def set(self, key: str, value: Any, ttl: int, codec: Optional[Codec] = None, tags: Iterable[str] = ()) -> None:
+        """Set value in Redis cache with expiration, adding the key to each tag's set."""
+        try:
+            serialized = (codec or get_codec()).encode(value)
+            if not tags:
+                self.redis.setex(name=self._key(key), time=timedelta(seconds=ttl), value=serialized)
+                return
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.setex(name=self._key(key), time=timedelta(seconds=ttl), value=serialized)
+            for tag in tags:
+                pipe.sadd(self._tag_key(tag), key)
+            pipe.execute()
         except (redis.RedisError, TypeError):
             # Log error but don't raise - cache failures shouldn't break the app
-            pass
+            CACHE_ERRORS.inc(('redis', 'set'))
             
+    def touch(self, key: str, ttl: int) -> bool:
+        """Extend the expiration of an existing key. Returns False if it is missing."""
+        try:
+            return bool(self.redis.expire(self._key(key), timedelta(seconds=ttl)))
+        except redis.RedisError:
+            return False
+
     def delete(self, key: str) -> None:
         """Remove a key from Redis cache."""
         try:
-            self.redis.delete(key)
+            self.redis.delete(self._key(key))
         except redis.RedisError:
             pass
-            
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Remove many keys with one UNLINK per batch; memory is reclaimed off the main thread."""
+        keys = [self._key(key) for key in keys]
+        for start in range(0, len(keys), self.BATCH_SIZE):
+            try:
+                self.redis.unlink(*keys[start:start + self.BATCH_SIZE])
+            except redis.RedisError:
+                CACHE_ERRORS.inc(('redis', 'delete_many'))
+
+    def pop_tags(self, tags: Iterable[str]) -> Set[str]:
+        """
+        Remove the given tag sets and return the keys they held.
+
+        Members are read and the sets dropped in one MULTI, so a key tagged
+        concurrently is either returned here or kept in a new set.
+        """
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        if not tag_keys:
+            return set()
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            pipe.unlink(*tag_keys)
+            *members, _ = pipe.execute()
+        except redis.RedisError:
+            CACHE_ERRORS.inc(('redis', 'pop_tags'))
+            return set()
+        return {key.decode('utf-8') if isinstance(key, bytes) else key for keys in members for key in keys}
+
     def clear(self) -> None:
-        """Clear all entries from Redis cache."""
+        """
+        Clear all entries from Redis cache.
+
+        With a namespace only its keys are removed, found with SCAN and
+        dropped with UNLINK in batches; other tenants of the database are
+        left alone. Without one the whole database is flushed.
+        """
         try:
-            self.redis.flushdb()
+            if not self.namespace:
+                self.redis.flushdb()
+                return
+            pattern = re.sub(r'([*?\[\]\\])', r'\\\1', self._prefix) + '*'
+            batch = []
+            for key in self.redis.scan_iter(match=pattern, count=self.BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= self.BATCH_SIZE:
+                    self.redis.unlink(*batch)
+                    batch = []
+            if batch:
+                self.redis.unlink(*batch)
         except redis.RedisError:
-            pass
+            CACHE_ERRORS.inc(('redis', 'clear'))
             
+    def lock(self, key: str, timeout: float = 60, blocking_timeout: float = 60) -> Optional[redis.lock.Lock]:
+        """
+        Acquire a cross-process lock for a cache key.
+
+        Returns the held lock, or None if it could not be acquired within
+        blocking_timeout or Redis is unavailable.
+        """
+        try:
+            lock = self.redis.lock(self._key(f"lock:{key}"), timeout=timeout, blocking_timeout=blocking_timeout)
+            if lock.acquire():
+                return lock
+        except redis.RedisError:
+            pass
+        return None
+
     def ping(self) -> bool:
         """Check if Redis connection is alive."""
         try:
@@ -0,0 +1,77 @@
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+if TYPE_CHECKING:
+    import asyncio
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Run at most one loader per key at a time; concurrent callers share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Call fn, or wait for the in-flight call for the same key and return its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+class AsyncSingleFlight:
+    """
+    Asyncio counterpart of SingleFlight: concurrent tasks await one shared loader.
+
+    The loader runs as its own task and every caller, the first one
+    included, awaits it through shield(); a cancelled caller stops waiting
+    without cancelling the load for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple[int, Hashable], 'asyncio.Task'] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn, or the in-flight call for the same key on this event loop."""
+        # Imported here: a running loop means asyncio is already loaded, and
+        # sync-only processes skip its import cost
+        import asyncio
+        loop = asyncio.get_running_loop()
+        call_key = (id(loop), key)
+        task = self._calls.get(call_key)
+        if task is None:
+            task = self._calls[call_key] = loop.create_task(fn())
+            task.add_done_callback(lambda done: self._finish(call_key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, call_key: Tuple[int, Hashable], task: 'asyncio.Task') -> None:
+        if self._calls.get(call_key) is task:
+            del self._calls[call_key]
+        # Mark retrieved so a failure whose callers all gave up is not logged by asyncio
+        if not task.cancelled():
+            task.exception()
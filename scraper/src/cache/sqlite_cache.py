@@ -0,0 +1,193 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .codecs import Codec, CodecError, decode, get_codec
+from ..metrics import CACHE_ERRORS
+
+class SQLiteCache:
+    """
+    Persistent cache layer stored in a single SQLite database.
+
+    Drop-in alternative to FileCache. WAL mode gives atomic writes and lets
+    readers in other processes proceed while one process writes; expired
+    rows are found through an index on expires_at.
+    """
+
+    # Stay well below SQLite's bound-parameter limit
+    BATCH_SIZE = 500
+
+    def __init__(self, cache_dir: str = "cache", filename: str = "cache.sqlite3"):
+        """Initialize the database in the specified directory."""
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.cache_dir / filename
+        # sqlite3 connections must not be shared between threads
+        self._local = threading.local()
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL'
+                ') WITHOUT ROWID'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get value from the database."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Get (value, expires_at) from the database."""
+        try:
+            row = self._connect().execute(
+                'SELECT value, expires_at FROM cache WHERE key = ? AND expires_at >= ?',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                return None
+            return decode(row[0]), row[1]
+        except (sqlite3.Error, CodecError):
+            CACHE_ERRORS.inc(('sqlite', 'get'))
+            return None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get all live values for the given keys; missing keys are omitted."""
+        return {key: value for key, (value, _) in self.get_entries(keys).items()}
+
+    def get_entries(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, float]]:
+        """Get (value, expires_at) for all live keys among the given ones."""
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        results = {}
+        try:
+            conn = self._connect()
+            for batch in _batches(keys, self.BATCH_SIZE):
+                placeholders = ','.join('?' * len(batch))
+                rows = conn.execute(
+                    f'SELECT key, value, expires_at FROM cache '
+                    f'WHERE key IN ({placeholders}) AND expires_at >= ?',
+                    (*batch, now),
+                )
+                for key, value, expires_at in rows:
+                    try:
+                        results[key] = (decode(value), expires_at)
+                    except CodecError:
+                        CACHE_ERRORS.inc(('sqlite', 'get_many'))
+                        continue
+        except sqlite3.Error:
+            CACHE_ERRORS.inc(('sqlite', 'get_many'))
+        return results
+
+    def set(self, key: str, value: Any, ttl: int = 86400, codec: Optional[Codec] = None) -> None:
+        """Set value in the database with expiration."""
+        self.set_many({key: value}, ttl, codec)
+
+    def set_many(self, mapping: Dict[str, Any], ttl: int = 86400, codec: Optional[Codec] = None) -> None:
+        """Set many values atomically in a single transaction."""
+        codec = codec or get_codec()
+        expires_at = time.time() + ttl
+        try:
+            rows = [(key, codec.encode(value), expires_at) for key, value in mapping.items()]
+        except TypeError:
+            # Log error but don't raise - cache failures shouldn't break the app
+            CACHE_ERRORS.inc(('sqlite', 'set'))
+            return
+        try:
+            conn = self._connect()
+            with _transaction(conn):
+                conn.executemany(
+                    'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                    rows,
+                )
+        except sqlite3.Error:
+            CACHE_ERRORS.inc(('sqlite', 'set'))
+
+    def touch(self, key: str, ttl: int, codec: Optional[Codec] = None) -> bool:
+        """Extend the expiration of a live entry. Returns False if it is missing or expired."""
+        # The stored bytes are kept as-is; codec is accepted for FileCache parity
+        now = time.time()
+        try:
+            cursor = self._connect().execute(
+                'UPDATE cache SET expires_at = ? WHERE key = ? AND expires_at >= ?',
+                (now + ttl, key, now),
+            )
+            return cursor.rowcount > 0
+        except sqlite3.Error:
+            return False
+
+    def delete(self, key: str) -> None:
+        """Remove a key from the database."""
+        try:
+            self._connect().execute('DELETE FROM cache WHERE key = ?', (key,))
+        except sqlite3.Error:
+            pass
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Remove many keys in one transaction."""
+        keys = list(keys)
+        try:
+            conn = self._connect()
+            with _transaction(conn):
+                for batch in _batches(keys, self.BATCH_SIZE):
+                    placeholders = ','.join('?' * len(batch))
+                    conn.execute(f'DELETE FROM cache WHERE key IN ({placeholders})', batch)
+        except sqlite3.Error:
+            CACHE_ERRORS.inc(('sqlite', 'delete_many'))
+
+    def clear(self) -> None:
+        """Clear all entries from the database."""
+        try:
+            self._connect().execute('DELETE FROM cache')
+        except sqlite3.Error:
+            pass
+
+    def items(self) -> Iterator[Tuple[str, Any, float]]:
+        """(key, value, expires_at) of every live entry."""
+        try:
+            rows = self._connect().execute(
+                'SELECT key, value, expires_at FROM cache WHERE expires_at >= ?', (time.time(),)
+            ).fetchall()
+        except sqlite3.Error:
+            CACHE_ERRORS.inc(('sqlite', 'items'))
+            return
+        for key, value, expires_at in rows:
+            try:
+                yield key, decode(value), expires_at
+            except CodecError:
+                CACHE_ERRORS.inc(('sqlite', 'items'))
+
+    def cleanup_expired(self) -> None:
+        """Remove all expired entries using the expires_at index."""
+        try:
+            self._connect().execute('DELETE FROM cache WHERE expires_at < ?', (time.time(),))
+        except sqlite3.Error:
+            pass
+
+def _batches(items: List[str], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class _transaction:
+    """Explicit BEGIN/COMMIT for connections in autocommit mode."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
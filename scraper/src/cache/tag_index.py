@@ -0,0 +1,101 @@
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+
+class TagIndex:
+    """
+    Local tag -> keys index for the memory and file layers.
+
+    With a directory, each tag is also persisted as an append-only file of
+    JSON-encoded keys, so tags on file cache entries survive restarts and
+    are shared by processes using the same cache directory. A tag's file
+    starts with a {"tag": ...} header line naming it, and is read the first time the tag is used and removed when it is popped.
+    Keys are never dropped from a tag on their own; an index entry for a
+    key that has since expired only costs a no-op delete.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory) if directory else None
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, tag: str) -> Path:
+        digest = hashlib.blake2b(tag.encode('utf-8'), digest_size=16).hexdigest()
+        return self.directory / f"{digest}.tag"
+
+    def _read(self, tag: str) -> Set[str]:
+        if self.directory is None:
+            return set()
+        try:
+            with self._path(tag).open() as f:
+                keys = (json.loads(line) for line in f if line.strip())
+                return {key for key in keys if isinstance(key, str)}
+        except (IOError, ValueError):
+            return set()
+
+    def _members(self, tag: str) -> Set[str]:
+        keys = self._tags.get(tag)
+        if keys is None:
+            keys = self._tags[tag] = self._read(tag)
+        return keys
+
+    def add(self, keys: Iterable[str], tags: Iterable[str]) -> None:
+        """Tag every key with every tag."""
+        keys = list(keys)
+        with self._lock:
+            for tag in tags:
+                members = self._members(tag)
+                new = [key for key in keys if key not in members]
+                if not new:
+                    continue
+                members.update(new)
+                if self.directory is not None:
+                    try:
+                        self.directory.mkdir(parents=True, exist_ok=True)
+                        path = self._path(tag)
+                        header = '' if path.exists() else json.dumps({'tag': tag}) + '\n'
+                        with path.open('a') as f:
+                            f.write(header + ''.join(json.dumps(key) + '\n' for key in new))
+                    except IOError:
+                        pass
+
+    def keys(self, tags: Iterable[str]) -> Set[str]:
+        """Keys carrying any of the tags."""
+        with self._lock:
+            return set().union(*(self._members(tag) for tag in tags))
+
+    def items(self) -> Dict[str, Set[str]]:
+        """Every tag with its keys, including tags persisted by other processes."""
+        with self._lock:
+            tags = {tag: set(keys) for tag, keys in self._tags.items()}
+            if self.directory is None:
+                return tags
+            for path in self.directory.glob('*.tag'):
+                try:
+                    with path.open() as f:
+                        header = json.loads(f.readline() or 'null')
+                except (IOError, ValueError):
+                    continue
+                if isinstance(header, dict) and header.get('tag') not in tags:
+                    tags[header['tag']] = self._read(header['tag'])
+            return tags
+
+    def pop(self, tags: Iterable[str]) -> Set[str]:
+        """Remove the tags and return the keys that carried any of them."""
+        keys: Set[str] = set()
+        with self._lock:
+            for tag in tags:
+                # Re-read: another process may have tagged keys since we loaded it
+                keys |= self._tags.pop(tag, set()) | self._read(tag)
+                if self.directory is not None:
+                    self._path(tag).unlink(missing_ok=True)
+        return keys
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tags.clear()
+            if self.directory is not None:
+                for path in self.directory.glob('*.tag'):
+                    path.unlink(missing_ok=True)
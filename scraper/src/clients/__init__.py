@@ -1,5 +1,57 @@
-from .base_client import BaseClient
-from .liquipedia_client import LiquipediaClient
-from .liquipediadb_client import LiquipediaDBClient
+"""
+HTTP clients for Liquipedia's api.php and the LiquipediaDB v3 API.
 
-__all__ = ['BaseClient', 'LiquipediaClient', 'LiquipediaDBClient']
+Names are imported on first access (PEP 562): requests and aiohttp are
+only loaded by code that actually builds a client.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+_EXPORTS = {
+    'BaseClient': '.base_client',
+    'LiquipediaClient': '.liquipedia_client',
+    'LiquipediaDBClient': '.liquipediadb_client',
+    'AsyncBaseClient': '.async_base_client',
+    'AsyncLiquipediaClient': '.async_liquipedia_client',
+    'AsyncLiquipediaDBClient': '.async_liquipediadb_client',
+    'TokenBucket': '.rate_limiter',
+    'RedisTokenBucket': '.rate_limiter',
+    'get_limiter': '.rate_limiter',
+    'parse_retry_after': '.rate_limiter',
+    'CircuitBreaker': '.health',
+    'CircuitOpenError': '..errors',
+    'MissingResponses': '.health',
+    'get_breaker': '.health',
+    'SessionStore': '.session_store',
+}
+
+__all__ = [
+    'BaseClient', 'LiquipediaClient', 'LiquipediaDBClient',
+    'AsyncBaseClient', 'AsyncLiquipediaClient', 'AsyncLiquipediaDBClient',
+    'TokenBucket', 'RedisTokenBucket', 'get_limiter', 'parse_retry_after',
+    'CircuitBreaker', 'CircuitOpenError', 'MissingResponses', 'get_breaker',
+    'SessionStore',
+]
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+if TYPE_CHECKING:
+    from .base_client import BaseClient
+    from .liquipedia_client import LiquipediaClient
+    from .liquipediadb_client import LiquipediaDBClient
+    from .async_base_client import AsyncBaseClient
+    from .async_liquipedia_client import AsyncLiquipediaClient
+    from .async_liquipediadb_client import AsyncLiquipediaDBClient
+    from .rate_limiter import RedisTokenBucket, TokenBucket, get_limiter, parse_retry_after
+    from .health import CircuitBreaker, MissingResponses, get_breaker
+    from ..errors import CircuitOpenError
+    from .session_store import SessionStore
@@ -0,0 +1,123 @@
+import asyncio
+import time
+from typing import Optional, Dict, Any
+import aiohttp
+from ..metrics import HTTP_LATENCY, HTTP_REQUESTS, endpoint_label
+from .health import CircuitBreaker, CircuitOpenError, MissingResponses, get_breaker
+from .rate_limiter import TokenBucket, get_limiter, parse_retry_after
+
+class AsyncBaseClient:
+    # Same policy as BaseClient
+    RETRY_TOTAL = 3
+    RETRY_BACKOFF = 1
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    MISSING_STATUSES = {404, 410}
+
+    def __init__(
+        self,
+        base_url: str,
+        user_agent: str,
+        limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.base_url = base_url
+        self.headers = {
+            'User-Agent': user_agent,
+            'Accept-Encoding': 'gzip',
+        }
+        self.limiter = limiter or get_limiter('liquipedia', 'general')
+        self.breaker = breaker or get_breaker('liquipedia')
+        self.missing = MissingResponses()
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self) -> None:
+        """Open the HTTP session. Must be called from inside the event loop."""
+        if self.session is None:
+            self.session = aiohttp.ClientSession(headers=self.headers)
+
+    async def close(self) -> None:
+        """Close the HTTP session."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        limiter: Optional[TokenBucket] = None,
+        data: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """Make a rate-limited request to the API and return the decoded JSON body; see BaseClient._make_request."""
+        if self.session is None:
+            await self.start()
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        limiter = limiter or self.limiter
+        labels = (type(self).__name__, endpoint_label(endpoint, params))
+        missing_key = MissingResponses.key(method, url, params)
+        missing = self.missing.get(missing_key)
+        if missing is not None:
+            HTTP_REQUESTS.inc(labels + ('missing',))
+            raise missing.with_traceback(None)
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            HTTP_REQUESTS.inc(labels + ('circuit_open',))
+            raise
+
+        for attempt in range(self.RETRY_TOTAL + 1):
+            # Every attempt, retries included, spends a token from the budget
+            await limiter.acquire_async()
+            start = time.perf_counter()
+            try:
+                response = await self.session.request(method, url, params=params, data=data, headers=headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                HTTP_REQUESTS.inc(labels + ('error',))
+                self.breaker.record_failure()
+                raise
+            async with response:
+                latency = time.perf_counter() - start
+                HTTP_LATENCY.observe(latency, labels)
+                HTTP_REQUESTS.inc(labels + (str(response.status),))
+                code = response.status
+                if code == 429:
+                    limiter.throttled()
+                elif code < 500:
+                    limiter.record_response(latency)
+                if code in self.RETRY_STATUSES:
+                    if code != 429:
+                        self.breaker.record_failure()
+                    if attempt < self.RETRY_TOTAL and self.breaker.state != CircuitBreaker.OPEN:
+                        backoff = self.RETRY_BACKOFF * (2 ** attempt)
+                        if code == 429:
+                            # Hold back every caller sharing the budget; the next
+                            # acquire waits out Retry-After
+                            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                            limiter.penalize(retry_after if retry_after is not None else backoff)
+                        else:
+                            await asyncio.sleep(backoff)
+                        continue
+                    if code == 429:
+                        self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                try:
+                    response.raise_for_status()
+                except aiohttp.ClientResponseError as e:
+                    if code in self.MISSING_STATUSES:
+                        self.missing.add(missing_key, e)
+                    raise
+                return await response.json(content_type=None)
+
+    async def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Make a GET request to the API."""
+        return await self._make_request('GET', endpoint, params=params)
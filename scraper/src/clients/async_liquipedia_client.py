@@ -0,0 +1,157 @@
+import asyncio
+import os
+import time
+from http.cookies import SimpleCookie
+from typing import Dict, Any, Iterable, Optional
+from yarl import URL
+from ..config import API_CONFIG
+from .async_base_client import AsyncBaseClient
+from .health import CircuitBreaker, get_breaker
+from .rate_limiter import TokenBucket, get_limiter
+from .session_store import SessionStore
+
+class AsyncLiquipediaClient(AsyncBaseClient):
+    # Same policy as LiquipediaClient
+    LOGIN_RETRY_SECONDS = 300
+
+    def __init__(
+        self,
+        base_url: str = "https://liquipedia.net/api.php",
+        limiter: Optional[TokenBucket] = None,
+        parse_limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        session_store: Optional[SessionStore] = None,
+    ):
+        super().__init__(
+            base_url=base_url,
+            user_agent=API_CONFIG['liquipedia']['user_agent'],
+            limiter=limiter or get_limiter('liquipedia', 'general'),
+            breaker=breaker or get_breaker('liquipedia'),
+        )
+        self.parse_limiter = parse_limiter or get_limiter('liquipedia', 'parse')
+
+        # Set authentication if credentials are provided
+        self.api_username = os.getenv('LIQUIPEDIA_USERNAME')
+        self.api_password = os.getenv('LIQUIPEDIA_PASSWORD')
+        self.session_store = session_store or SessionStore()
+        self._logged_in = not (self.api_username and self.api_password)
+        self._login_retry_at = 0.0
+        self._login_lock: Optional[asyncio.Lock] = None
+
+    async def start(self) -> None:
+        """Open the session; logging in waits for the first request, as in LiquipediaClient."""
+        if self.session is None:
+            await super().start()
+            # A new session has none of the old one's cookies
+            self._logged_in = not (self.api_username and self.api_password)
+            self._login_retry_at = 0.0
+            self._login_lock = asyncio.Lock()
+
+    async def _make_request(self, method: str, endpoint: str, *args, **kwargs) -> Any:
+        if self.session is None:
+            await self.start()
+        if not self._logged_in and time.monotonic() >= self._login_retry_at:
+            async with self._login_lock:
+                if not self._logged_in and time.monotonic() >= self._login_retry_at:
+                    try:
+                        self._logged_in = await self._authenticate()
+                    except Exception:
+                        # A failed login must not fail the request that triggered it
+                        self.session.cookie_jar.clear()
+                        self._logged_in = False
+                    if not self._logged_in:
+                        self._login_retry_at = time.monotonic() + self.LOGIN_RETRY_SECONDS
+        return await super()._make_request(method, endpoint, *args, **kwargs)
+
+    async def _authenticate(self) -> bool:
+        """Asyncio counterpart of LiquipediaClient._authenticate."""
+        cookies = await asyncio.to_thread(self.session_store.load, self.api_username)
+        if cookies is not None:
+            jar = SimpleCookie()
+            for cookie in cookies:
+                jar[cookie['name']] = cookie['value']
+                jar[cookie['name']]['path'] = cookie.get('path') or '/'
+                if cookie.get('domain'):
+                    jar[cookie['name']]['domain'] = cookie['domain']
+            self.session.cookie_jar.update_cookies(jar, response_url=URL(self.base_url))
+            userinfo = (await super()._make_request('GET', '', params={
+                'action': 'query',
+                'meta': 'userinfo',
+                'format': 'json',
+            })).get('query', {}).get('userinfo', {})
+            if 'anon' not in userinfo:
+                return True
+            self.session.cookie_jar.clear()
+            await asyncio.to_thread(self.session_store.clear)
+
+        token_response = await super()._make_request('GET', '', params={
+            'action': 'query',
+            'meta': 'tokens',
+            'type': 'login',
+            'format': 'json',
+        })
+        auth_data = {
+            'action': 'login',
+            'lgname': self.api_username,
+            'lgpassword': self.api_password,
+            'lgtoken': token_response.get('query', {}).get('tokens', {}).get('logintoken', ''),
+            'format': 'json',
+        }
+        # Credentials go in the POST body, never the query string
+        response = await super()._make_request('POST', '', params={'action': 'login', 'format': 'json'}, data=auth_data)
+        if response.get('login', {}).get('result') != 'Success':
+            return False
+        await asyncio.to_thread(self.session_store.save, self.api_username, [
+            {
+                'name': morsel.key,
+                'value': morsel.value,
+                'domain': morsel['domain'],
+                'path': morsel['path'],
+                # aiohttp keeps expiry internally; max_age bounds the session
+                'expires': None,
+                'secure': bool(morsel['secure']),
+            }
+            for morsel in self.session.cookie_jar
+        ])
+        return True
+
+    async def get_parsed_page(self, title: str) -> Dict[str, Any]:
+        """Get parsed page content, drawing from the parse budget."""
+        params = {
+            'action': 'parse',
+            'page': title,
+            'format': 'json'
+        }
+        return await self._make_request('GET', '', params=params, limiter=self.parse_limiter)
+
+    async def get_page_info(self, title: str) -> Dict[str, Any]:
+        """Get basic page information using regular rate limit."""
+        params = {
+            'action': 'query',
+            'titles': title,
+            'format': 'json'
+        }
+        return await self.get('', params=params)
+
+    async def get_category_members(self, category: str) -> Dict[str, Any]:
+        """Get members of a category."""
+        params = {
+            'action': 'query',
+            'list': 'categorymembers',
+            'cmtitle': category,
+            'format': 'json'
+        }
+        return await self.get('', params=params)
+
+    async def gather_pages(self, titles: Iterable[str], parsed: bool = False) -> Dict[str, Any]:
+        """
+        Fetch many pages concurrently and return them keyed by title.
+
+        All requests are started at once and queue on the shared token bucket,
+        so each one is released the moment its slot opens while earlier
+        responses are still in flight.
+        """
+        titles = list(dict.fromkeys(titles))
+        fetch = self.get_parsed_page if parsed else self.get_page_info
+        results = await asyncio.gather(*(fetch(title) for title in titles))
+        return dict(zip(titles, results))
@@ -0,0 +1,46 @@
+import os
+from typing import Dict, Any, Optional
+from ..config import API_CONFIG
+from .async_base_client import AsyncBaseClient
+from .health import CircuitBreaker, get_breaker
+from .rate_limiter import TokenBucket, get_limiter
+
+class AsyncLiquipediaDBClient(AsyncBaseClient):
+    def __init__(
+        self,
+        base_url: str = "https://api.liquipedia.net/api/v3",
+        limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        super().__init__(
+            base_url=base_url,
+            user_agent=API_CONFIG['liquipedia']['user_agent'],
+            limiter=limiter or get_limiter('liquipediadb', 'general'),
+            breaker=breaker or get_breaker('liquipediadb'),
+        )
+
+        # Set up API key authentication
+        self.api_key = os.getenv('LIQUIPEDIADB_API_KEY')
+        if not self.api_key:
+            raise ValueError("LIQUIPEDIADB_API_KEY environment variable is required")
+
+        # Add API key to default headers
+        self.headers['Authorization'] = f'Apikey {self.api_key}'
+
+    async def get_player_info(self, player_id: str) -> Dict[str, Any]:
+        """Get detailed player information."""
+        return await self.get(f'/player/{player_id}')
+
+    async def get_tournament_info(self, tournament_id: str) -> Dict[str, Any]:
+        """Get detailed tournament information."""
+        return await self.get(f'/tournament/{tournament_id}')
+
+    async def search_players(self, query: str) -> Dict[str, Any]:
+        """Search for players."""
+        params = {'query': query}
+        return await self.get('/search/players', params=params)
+
+    async def search_tournaments(self, query: str) -> Dict[str, Any]:
+        """Search for tournaments."""
+        params = {'query': query}
+        return await self.get('/search/tournaments', params=params)
@@ -3,59 +3,156 @@ from typing import Optional, Dict, Any
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from ratelimit import limits, sleep_and_retry
+
+from ..metrics import HTTP_LATENCY, HTTP_REQUESTS, endpoint_label
+from .health import CircuitBreaker, CircuitOpenError, MissingResponses, get_breaker
+from .rate_limiter import TokenBucket, get_limiter, parse_retry_after
 
 class BaseClient:
-    def __init__(self, base_url: str, user_agent: str):
+    # Status retries happen here rather than in urllib3, so that every
+    # attempt spends a token, Retry-After holds back every caller sharing
+    # the limiter and failures reach the circuit breaker
+    RETRY_TOTAL = 3
+    RETRY_BACKOFF = 1
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    # Answers remembered by MissingResponses
+    MISSING_STATUSES = {404, 410}
+
+    def __init__(
+        self,
+        base_url: str,
+        user_agent: str,
+        limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
         self.base_url = base_url
-        self.session = self._create_session(user_agent)
+        self.headers = {
+            'User-Agent': user_agent,
+            'Accept-Encoding': 'gzip',
+        }
+        self.limiter = limiter or get_limiter('liquipedia', 'general')
+        self.breaker = breaker or get_breaker('liquipedia')
+        self.missing = MissingResponses()
+        self._session: Optional[requests.Session] = None
+
+    @property
+    def session(self) -> requests.Session:
+        """The HTTP session, created on first use from self.headers."""
+        if self._session is None:
+            self._session = self._create_session()
+        return self._session
+
+    @session.setter
+    def session(self, session: requests.Session) -> None:
+        self._session = session
     
-    def _create_session(self, user_agent: str) -> requests.Session:
+    def _create_session(self) -> requests.Session:
         """Create a session with retry logic and proper headers."""
         session = requests.Session()
         
-        # Configure retry strategy
+        # Connection errors only; responses are retried by _make_request
         retry_strategy = Retry(
             total=3,
             backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504]
+            status=0,
+            respect_retry_after_header=False,
         )
         
         adapter = HTTPAdapter(max_retries=retry_strategy)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         
-        # Set default headers
-        session.headers.update({
-            'User-Agent': user_agent,
-            'Accept-Encoding': 'gzip',
-        })
+        session.headers.update(self.headers)
         
         return session
     
-    @sleep_and_retry
-    @limits(calls=1, period=2)  # Default rate limit of 1 call per 2 seconds
     def _make_request(
         self,
         method: str,
         endpoint: str,
         params: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
+        limiter: Optional[TokenBucket] = None,
+        data: Optional[Dict[str, Any]] = None,
     ) -> requests.Response:
-        """Make a rate-limited request to the API."""
+        """
+        Make a rate-limited request to the API.
+
+        429s and response times adjust the limiter's adaptive rate. Server
+        errors, connection failures and exhausted retries count towards the
+        circuit breaker; while it is open this raises CircuitOpenError
+        without a request. A 404/410 is re-raised from memory for a while.
+        """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        
-        response = self.session.request(
-            method=method,
-            url=url,
-            params=params,
-            headers=headers,
-        )
-        
-        response.raise_for_status()
-        return response
+        limiter = limiter or self.limiter
+        labels = (type(self).__name__, endpoint_label(endpoint, params))
+        missing_key = MissingResponses.key(method, url, params)
+        missing = self.missing.get(missing_key)
+        if missing is not None:
+            HTTP_REQUESTS.inc(labels + ('missing',))
+            raise missing.with_traceback(None)
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            HTTP_REQUESTS.inc(labels + ('circuit_open',))
+            raise
+
+        for attempt in range(self.RETRY_TOTAL + 1):
+            limiter.acquire()
+            status = 'error'
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    data=data,
+                    headers=headers,
+                )
+                status = str(response.status_code)
+            except requests.RequestException:
+                self.breaker.record_failure()
+                raise
+            finally:
+                latency = time.perf_counter() - start
+                HTTP_LATENCY.observe(latency, labels)
+                HTTP_REQUESTS.inc(labels + (status,))
+
+            code = response.status_code
+            if code == 429:
+                limiter.throttled()
+            elif code < 500:
+                limiter.record_response(latency)
+            if code in self.RETRY_STATUSES:
+                if code != 429:
+                    self.breaker.record_failure()
+                # No point retrying once the failures have opened the circuit
+                if attempt < self.RETRY_TOTAL and self.breaker.state != CircuitBreaker.OPEN:
+                    backoff = self.RETRY_BACKOFF * (2 ** attempt)
+                    if code == 429:
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        limiter.penalize(retry_after if retry_after is not None else backoff)
+                    else:
+                        time.sleep(backoff)
+                    continue
+                if code == 429:
+                    self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            try:
+                response.raise_for_status()
+            except requests.HTTPError as e:
+                if code in self.MISSING_STATUSES:
+                    self.missing.add(missing_key, e)
+                raise
+            return response
     
-    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def get(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        limiter: Optional[TokenBucket] = None,
+    ) -> Dict[str, Any]:
         """Make a GET request to the API."""
-        response = self._make_request('GET', endpoint, params=params)
+        response = self._make_request('GET', endpoint, params=params, limiter=limiter)
         return response.json()
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from ..config import CIRCUIT_BREAKER_CONFIG
+# CircuitOpenError lives in the neutral errors module, so the cache layer
+# can catch it without importing the clients
+from ..errors import CircuitOpenError
+from ..metrics import CIRCUIT_TRANSITIONS
+
+class CircuitBreaker:
+    """
+    Stops calling an API that keeps failing.
+
+    After `failure_threshold` consecutive failures (server errors, timeouts,
+    429s that outlast the retries) the circuit opens: calls raise
+    CircuitOpenError straight away for `reset_timeout` seconds, and callers
+    serve what they have cached. Then a single trial call is let through;
+    success closes the circuit, failure reopens it for twice as long, up to
+    `max_reset_timeout`.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        max_reset_timeout: Optional[float] = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold or CIRCUIT_BREAKER_CONFIG['failure_threshold']
+        self.reset_timeout = reset_timeout or CIRCUIT_BREAKER_CONFIG['reset_timeout']
+        self.max_reset_timeout = max_reset_timeout or CIRCUIT_BREAKER_CONFIG['max_reset_timeout']
+        self.state = self.CLOSED
+        self.failures = 0
+        self._timeout = self.reset_timeout
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        CIRCUIT_TRANSITIONS.inc((self.name, state))
+
+    def retry_in(self) -> float:
+        """Seconds until a call would be let through (0 unless open)."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self._timeout - time.monotonic())
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go ahead."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            retry_in = self.retry_in()
+            if self.state == self.OPEN and retry_in == 0:
+                # This caller makes the trial call; others keep failing fast
+                self._transition(self.HALF_OPEN)
+                return
+            raise CircuitOpenError(self.name, retry_in or self._timeout)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self._timeout = self.reset_timeout
+                self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                self._timeout = min(self._timeout * 2, self.max_reset_timeout)
+            elif self.state == self.OPEN or self.failures < self.failure_threshold:
+                return
+            self._opened_at = time.monotonic()
+            self._transition(self.OPEN)
+
+class MissingResponses:
+    """
+    Short-lived memo of requests the API answered with 'not found'.
+
+    Repeats within `ttl` seconds re-raise the stored error without a
+    request. Bounded; the oldest entries go first.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_size: int = 10000):
+        self.ttl = CIRCUIT_BREAKER_CONFIG['missing_ttl'] if ttl is None else ttl
+        self.max_size = max_size
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(method: str, url: str, params: Optional[Dict[str, Any]] = None) -> Hashable:
+        return method, url, tuple(sorted((k, str(v)) for k, v in (params or {}).items()))
+
+    def get(self, key: Hashable) -> Optional[BaseException]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, error = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return error
+
+    def add(self, key: Hashable, error: BaseException) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, error)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(service: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for a service in RATE_LIMITS."""
+    with _breakers_lock:
+        breaker = _breakers.get(service)
+        if breaker is None:
+            breaker = _breakers[service] = CircuitBreaker(service)
+        return breaker
@@ -1,48 +1,123 @@
 import os
-from typing import Dict, Any, Optional
-from functools import wraps
-from ratelimit import limits, sleep_and_retry
+import threading
+import time
+from typing import Dict, Any, Optional, Iterable, Iterator, List
+import requests
+from ..config import API_CONFIG
 from .base_client import BaseClient
+from .health import CircuitBreaker, get_breaker
+from .rate_limiter import TokenBucket, get_limiter
+from .session_store import SessionStore
 
 class LiquipediaClient(BaseClient):
-    def __init__(self):
-        user_agent = (
-            f"StarCraft-Tournament-Tracker/1.0 "
-            f"(contact@email.com; "  # TODO: Replace with actual contact
-            f"Project: https://github.com/yourusername/starcraft-tournament-tracker)"
-        )
+    # MediaWiki caps multi-value parameters at 50 (500 with apihighlimits)
+    MAX_TITLES_PER_QUERY = 50
+    # Seconds before a failed login is tried again; requests go out anonymously meanwhile
+    LOGIN_RETRY_SECONDS = 300
+
+    def __init__(
+        self,
+        base_url: str = "https://liquipedia.net/api.php",
+        limiter: Optional[TokenBucket] = None,
+        parse_limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        session_store: Optional[SessionStore] = None,
+    ):
         super().__init__(
-            base_url="https://liquipedia.net/api.php",
-            user_agent=user_agent
+            base_url=base_url,
+            user_agent=API_CONFIG['liquipedia']['user_agent'],
+            limiter=limiter or get_limiter('liquipedia', 'general'),
+            breaker=breaker or get_breaker('liquipedia'),
         )
+        self.parse_limiter = parse_limiter or get_limiter('liquipedia', 'parse')
         
-        # Set authentication if credentials are provided
+        # Set authentication if credentials are provided. Logging in waits
+        # for the first request, and reuses a persisted session if one is live
         self.api_username = os.getenv('LIQUIPEDIA_USERNAME')
         self.api_password = os.getenv('LIQUIPEDIA_PASSWORD')
-        if self.api_username and self.api_password:
-            self._authenticate()
+        self.session_store = session_store or SessionStore()
+        self._logged_in = not (self.api_username and self.api_password)
+        self._login_retry_at = 0.0
+        self._login_lock = threading.Lock()
+
+    def _make_request(self, method: str, endpoint: str, *args, **kwargs) -> requests.Response:
+        if not self._logged_in and time.monotonic() >= self._login_retry_at:
+            with self._login_lock:
+                if not self._logged_in and time.monotonic() >= self._login_retry_at:
+                    try:
+                        self._logged_in = self._authenticate()
+                    except Exception:
+                        # A failed login must not fail the request that triggered it
+                        self.session.cookies.clear()
+                        self._logged_in = False
+                    if not self._logged_in:
+                        self._login_retry_at = time.monotonic() + self.LOGIN_RETRY_SECONDS
+        return super()._make_request(method, endpoint, *args, **kwargs)
+
+    def _authenticate(self) -> bool:
+        """
+        Log in with the configured credentials, or restore the cookies of an earlier login.
 
-    def _authenticate(self):
-        """Authenticate with Liquipedia API using credentials."""
-        auth_params = {
+        Restored cookies are checked with one meta=userinfo query; if the
+        wiki no longer accepts them they are discarded and a fresh login
+        is made. Returns whether the client is logged in.
+        """
+        cookies = self.session_store.load(self.api_username)
+        if cookies is not None:
+            for cookie in cookies:
+                self.session.cookies.set(
+                    cookie['name'], cookie['value'],
+                    domain=cookie.get('domain'), path=cookie.get('path') or '/',
+                    expires=cookie.get('expires'), secure=cookie.get('secure', False),
+                )
+            userinfo = super()._make_request('GET', '', params={
+                'action': 'query',
+                'meta': 'userinfo',
+                'format': 'json',
+            }).json().get('query', {}).get('userinfo', {})
+            if 'anon' not in userinfo:
+                return True
+            self.session.cookies.clear()
+            self.session_store.clear()
+
+        token_response = super()._make_request('GET', '', params={
+            'action': 'query',
+            'meta': 'tokens',
+            'type': 'login',
+            'format': 'json',
+        }).json()
+        auth_data = {
             'action': 'login',
             'lgname': self.api_username,
             'lgpassword': self.api_password,
-            'format': 'json'
+            'lgtoken': token_response.get('query', {}).get('tokens', {}).get('logintoken', ''),
+            'format': 'json',
         }
-        response = self._make_request('POST', '', params=auth_params)
-        # Handle token if required by API
-        
-    @sleep_and_retry
-    @limits(calls=1, period=30)  # Specific limit for parse actions
+        # Credentials go in the POST body, never the query string
+        response = super()._make_request('POST', '', params={'action': 'login', 'format': 'json'}, data=auth_data)
+        if response.json().get('login', {}).get('result') != 'Success':
+            return False
+        self.session_store.save(self.api_username, [
+            {
+                'name': cookie.name,
+                'value': cookie.value,
+                'domain': cookie.domain,
+                'path': cookie.path,
+                'expires': cookie.expires,
+                'secure': cookie.secure,
+            }
+            for cookie in self.session.cookies
+        ])
+        return True
+
     def get_parsed_page(self, title: str) -> Dict[str, Any]:
-        """Get parsed page content with specific rate limit."""
+        """Get parsed page content, drawing from the parse budget."""
         params = {
             'action': 'parse',
             'page': title,
             'format': 'json'
         }
-        return self.get('', params=params)
+        return self.get('', params=params, limiter=self.parse_limiter)
     
     def get_page_info(self, title: str) -> Dict[str, Any]:
         """Get basic page information using regular rate limit."""
@@ -62,3 +137,118 @@ class LiquipediaClient(BaseClient):
             'format': 'json'
         }
         return self.get('', params=params)
+
+    def get_recent_changes(
+        self,
+        start: Optional[str] = None,
+        continue_params: Optional[Dict[str, Any]] = None,
+        **params,
+    ) -> Dict[str, Any]:
+        """
+        Get one batch of recent changes, oldest first.
+
+        start is an ISO 8601 timestamp; continue_params is the `continue`
+        object of the previous batch, to read on from exactly where it ended.
+        """
+        query = {
+            'action': 'query',
+            'list': 'recentchanges',
+            'rcdir': 'newer',
+            'rcprop': 'title|ids|timestamp|loginfo',
+            'rclimit': 'max',
+            'format': 'json',
+            'continue': '',
+            **params,
+        }
+        if start:
+            query['rcstart'] = start
+        if continue_params:
+            query.update(continue_params)
+        return self.get('', params=query)
+
+    def iter_query(self, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield each response of an action=query, following continue tokens lazily.
+
+        The next batch is only requested once the caller has consumed the
+        previous one, so stopping early costs no extra requests.
+        """
+        base_params = {
+            'action': 'query',
+            'format': 'json',
+            'continue': '',
+            **params,
+        }
+        continue_params: Dict[str, Any] = {}
+        while True:
+            response = self.get('', params={**base_params, **continue_params})
+            yield response
+            if 'continue' not in response:
+                break
+            continue_params = response['continue']
+
+    def iter_category_members(self, category: str, **params) -> Iterator[Dict[str, Any]]:
+        """Yield every member of a category across all continuation pages."""
+        query = {
+            'list': 'categorymembers',
+            'cmtitle': category,
+            'cmlimit': 'max',
+            **params,
+        }
+        for response in self.iter_query(query):
+            yield from response.get('query', {}).get('categorymembers', [])
+
+    def get_pages_info(self, titles: Iterable[str], **params) -> Dict[str, Dict[str, Any]]:
+        """
+        Get page information for many titles, packing them into as few requests as possible.
+
+        Returns a dict keyed by the titles as given, resolving the API's
+        title normalization and redirects. Missing pages are included with
+        the API's `missing` marker.
+        """
+        titles = list(dict.fromkeys(titles))
+        results: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(titles), self.MAX_TITLES_PER_QUERY):
+            chunk = titles[start:start + self.MAX_TITLES_PER_QUERY]
+            results.update(self._query_titles(chunk, params))
+        return results
+
+    def get_latest_revisions(self, titles: Iterable[str]) -> Dict[str, Optional[int]]:
+        """Get the current revision id for many titles in batched requests (None if missing)."""
+        info = self.get_pages_info(titles, prop='revisions', rvprop='ids')
+        revisions = {}
+        for title, page in info.items():
+            page_revisions = page.get('revisions')
+            revisions[title] = page_revisions[0]['revid'] if page_revisions else None
+        return revisions
+
+    def _query_titles(self, titles: List[str], params: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Run one batched query and split the merged result back per requested title."""
+        pages: Dict[str, Dict[str, Any]] = {}
+        aliases: Dict[str, str] = {}
+        for response in self.iter_query({'titles': '|'.join(titles), **params}):
+            query = response.get('query', {})
+            for entry in query.get('normalized', []) + query.get('redirects', []):
+                aliases[entry['from']] = entry['to']
+            for page in query.get('pages', {}).values():
+                _merge_page(pages.setdefault(page['title'], {}), page)
+
+        results = {}
+        for title in titles:
+            resolved = title
+            # Follow normalization then redirect, guarding against cycles
+            for _ in range(len(aliases) + 1):
+                if resolved not in aliases:
+                    break
+                resolved = aliases[resolved]
+            if resolved in pages:
+                results[title] = pages[resolved]
+        return results
+
+def _merge_page(target: Dict[str, Any], page: Dict[str, Any]) -> None:
+    """Merge a page entry from a continuation batch; prop lists are concatenated."""
+    for key, value in page.items():
+        if isinstance(value, list) and isinstance(target.get(key), list):
+            target[key].extend(value)
+        else:
+            target[key] = value
@@ -1,18 +1,22 @@
 import os
 from typing import Dict, Any, Optional
-from ratelimit import limits, sleep_and_retry
+from ..config import API_CONFIG
 from .base_client import BaseClient
+from .health import CircuitBreaker, get_breaker
+from .rate_limiter import TokenBucket, get_limiter
 
 class LiquipediaDBClient(BaseClient):
-    def __init__(self):
-        user_agent = (
-            f"StarCraft-Tournament-Tracker/1.0 "
-            f"(contact@email.com; "  # TODO: Replace with actual contact
-            f"Project: https://github.com/yourusername/starcraft-tournament-tracker)"
-        )
+    def __init__(
+        self,
+        base_url: str = "https://api.liquipedia.net/api/v3",
+        limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
         super().__init__(
-            base_url="https://api.liquipedia.net/api/v3",
-            user_agent=user_agent
+            base_url=base_url,
+            user_agent=API_CONFIG['liquipedia']['user_agent'],
+            limiter=limiter or get_limiter('liquipediadb', 'general'),
+            breaker=breaker or get_breaker('liquipediadb'),
         )
         
         # Set up API key authentication
@@ -21,15 +25,7 @@ class LiquipediaDBClient(BaseClient):
             raise ValueError("LIQUIPEDIADB_API_KEY environment variable is required")
         
         # Add API key to default headers
-        self.session.headers.update({
-            'Authorization': f'Apikey {self.api_key}'
-        })
-
-    @sleep_and_retry
-    @limits(calls=60, period=3600)  # 60 requests per hour
-    def _make_request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None, **kwargs):
-        """Override base request method with specific rate limit."""
-        return super()._make_request(method, endpoint, params, **kwargs)
+        self.headers['Authorization'] = f'Apikey {self.api_key}'
 
     def get_player_info(self, player_id: str) -> Dict[str, Any]:
         """Get detailed player information."""
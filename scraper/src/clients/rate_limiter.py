@@ -0,0 +1,240 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from ..config import ADAPTIVE_RATE_CONFIG, RATE_LIMITER_CONFIG, RATE_LIMITS
+from ..metrics import LIMITER_PENALTIES, LIMITER_RATE_CHANGES, LIMITER_WAIT
+
+if TYPE_CHECKING:
+    import redis
+
+class TokenBucket:
+    def __init__(self, calls: int, period: float, name: Optional[str] = None, adaptive: Optional[bool] = None):
+        """
+        Token bucket allowing `calls` requests per `period` seconds.
+
+        When adaptive (ADAPTIVE_RATE_CONFIG by default), that budget is a
+        ceiling: clients report each response through throttled() and
+        record_response(), and the rate follows AIMD between the ceiling
+        and min_fraction of it.
+        """
+        self.name = name or f'bucket:{calls}/{period:g}s'
+        self.capacity = float(calls)
+        self.rate = calls / period
+        self.max_rate = self.rate
+        self.min_rate = self.rate * ADAPTIVE_RATE_CONFIG['min_fraction']
+        self.adaptive = ADAPTIVE_RATE_CONFIG['enabled'] if adaptive is None else adaptive
+        self.latency: Optional[float] = None
+        self._tokens = float(calls)
+        self._updated = time.monotonic()
+        self._last_decrease = float('-inf')
+        self._lock = threading.Lock()
+
+    def _reserve(self, cost: int = 1, penalty: float = 0.0, commit: bool = True) -> float:
+        """
+        Take `cost` tokens and return how long the caller must wait before using them.
+
+        Tokens may go negative: each caller reserves the next free slot, so
+        concurrent waiters are released exactly one interval apart and the
+        budget never idles while work is queued. A penalty pushes the next
+        free slot at least `penalty` seconds out. With commit=False the
+        bucket is left untouched.
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            tokens = min(self.capacity, self._tokens + elapsed * self.rate) - cost
+            if penalty > 0:
+                tokens = min(tokens, 1 - penalty * self.rate)
+            if commit:
+                self._tokens = tokens
+                self._updated = now
+            if tokens >= 0:
+                return 0.0
+            return -tokens / self.rate
+
+    def acquire(self) -> None:
+        """Block the current thread until a token is available."""
+        delay = self._reserve()
+        LIMITER_WAIT.observe(delay, (self.name,))
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Wait on the event loop until a token is available."""
+        import asyncio
+        delay = self._reserve()
+        LIMITER_WAIT.observe(delay, (self.name,))
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def ready_in(self) -> float:
+        """Seconds until acquire() would return immediately, without taking a token."""
+        return self._reserve(commit=False)
+
+    def penalize(self, seconds: float) -> None:
+        """Hold every caller back for `seconds`, e.g. after a 429 with Retry-After."""
+        LIMITER_PENALTIES.inc((self.name,))
+        self._reserve(cost=0, penalty=seconds)
+
+    # -- adaptive rate -------------------------------------------------------
+
+    def _set_rate(self, rate: float, reason: str) -> None:
+        """Change the refill rate; call with the lock held."""
+        rate = min(self.max_rate, max(self.min_rate, rate))
+        if rate == self.rate:
+            return
+        now = time.monotonic()
+        tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        if tokens < 0:
+            # Keep reserved slots where they are in time, not in tokens
+            tokens *= rate / self.rate
+        self._tokens, self._updated, self.rate = tokens, now, rate
+        LIMITER_RATE_CHANGES.inc((self.name, reason))
+
+    def _decrease(self, factor: float, reason: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            # Responses to requests sent before the last cut say nothing
+            # about the new rate; cut at most once per request interval
+            if now - self._last_decrease < 1 / self.rate:
+                return
+            self._last_decrease = now
+            self._set_rate(self.rate * factor, reason)
+
+    def throttled(self) -> None:
+        """Report a 429: cut the rate (call before penalize() so the penalty holds in seconds)."""
+        if self.adaptive:
+            self._decrease(ADAPTIVE_RATE_CONFIG['decrease'], 'throttled')
+
+    def record_response(self, latency: float) -> None:
+        """Report a completed request: ease off while responses are slow, recover otherwise."""
+        if not self.adaptive:
+            return
+        config = ADAPTIVE_RATE_CONFIG
+        with self._lock:
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            slow = self.latency > config['latency_target']
+            if not slow and self.rate < self.max_rate:
+                self._set_rate(self.rate + self.max_rate * config['increase'], 'recovered')
+        if slow:
+            self._decrease(config['latency_decrease'], 'slow')
+
+# Same algorithm as TokenBucket._reserve, run atomically inside Redis.
+# The server clock is used so that hosts with skewed clocks agree.
+_RESERVE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local penalty = tonumber(ARGV[4])
+local commit = ARGV[5] == '1'
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate) - cost
+if penalty > 0 then
+    tokens = math.min(tokens, 1 - penalty * rate)
+end
+if commit then
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    -- A bucket left alone refills completely; drop it once it would be full
+    redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+end
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+"""
+
+class RedisTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in Redis, shared by every process using the same key.
+
+    Each reservation is one atomic script call. If Redis is unreachable the
+    bucket falls back to limiting this process on its own. The adaptive
+    rate is per process: each one slows down on the 429s it sees, while
+    Retry-After penalties are shared.
+    """
+
+    def __init__(
+        self,
+        client: 'redis.Redis',
+        key: str,
+        calls: int,
+        period: float,
+        name: Optional[str] = None,
+        adaptive: Optional[bool] = None,
+    ):
+        super().__init__(calls, period, name=name or key, adaptive=adaptive)
+        self.client = client
+        self.key = key
+        self._script = client.register_script(_RESERVE_SCRIPT)
+
+    def _reserve(self, cost: int = 1, penalty: float = 0.0, commit: bool = True) -> float:
+        import redis
+        try:
+            delay = self._script(keys=[self.key], args=[self.capacity, self.rate, cost, penalty, int(commit)])
+            return float(delay)
+        except redis.RedisError:
+            return super()._reserve(cost, penalty, commit)
+
+    async def acquire_async(self) -> None:
+        """Wait on the event loop until a token is available, reserving it off-loop."""
+        import asyncio
+        delay = await asyncio.to_thread(self._reserve)
+        LIMITER_WAIT.observe(delay, (self.name,))
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+_limiters: Dict[Tuple[str, str], TokenBucket] = {}
+_limiters_lock = threading.Lock()
+_redis_client: Optional['redis.Redis'] = None
+
+def _create_limiter(service: str, budget: str) -> TokenBucket:
+    global _redis_client
+    limit = RATE_LIMITS[service][budget]
+    name = f'{service}:{budget}'
+    backend = RATE_LIMITER_CONFIG.get('backend', 'local')
+    if backend == 'local':
+        return TokenBucket(limit['calls'], limit['period'], name=name)
+    if backend == 'redis':
+        if _redis_client is None:
+            import redis
+            _redis_client = redis.Redis.from_url(RATE_LIMITER_CONFIG['redis_url'])
+        key = f"{RATE_LIMITER_CONFIG.get('key_prefix', 'ratelimit')}:{name}"
+        return RedisTokenBucket(_redis_client, key, limit['calls'], limit['period'], name=name)
+    raise ValueError(f"Unknown rate limiter backend: {backend}")
+
+def get_limiter(service: str, budget: str = 'general') -> TokenBucket:
+    """
+    Return the process-wide limiter for a budget defined in RATE_LIMITS.
+
+    With the 'redis' backend in RATE_LIMITER_CONFIG, every process pointing
+    at the same Redis shares one budget.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get((service, budget))
+        if limiter is None:
+            limiter = _create_limiter(service, budget)
+            _limiters[(service, budget)] = limiter
+        return limiter
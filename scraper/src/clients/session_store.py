@@ -0,0 +1,53 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import API_CONFIG
+
+Cookie = Dict[str, Any]
+
+class SessionStore:
+    """
+    Login cookies persisted across restarts, so a new worker reuses the
+    session of the last one instead of spending a request on action=login.
+
+    One JSON file per store holds the account name, the save time and the
+    cookies. Cookies past their own expiry are dropped on load; the whole
+    session is discarded after `max_age` seconds, since MediaWiki session
+    cookies usually carry no expiry of their own. The file is written
+    atomically and readable by its owner only.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_age: Optional[float] = None):
+        config = API_CONFIG['liquipedia']
+        self.path = Path(path or config['session_file'])
+        self.max_age = config['session_max_age'] if max_age is None else max_age
+
+    def load(self, username: str) -> Optional[List[Cookie]]:
+        """The cookies saved for username, or None if there is no live session."""
+        try:
+            with self.path.open() as f:
+                saved = json.load(f)
+        except (IOError, ValueError):
+            return None
+        now = time.time()
+        if saved.get('username') != username or saved.get('saved_at', 0) + self.max_age <= now:
+            return None
+        cookies = [c for c in saved.get('cookies', []) if not c.get('expires') or c['expires'] > now]
+        # A session without live cookies is gone, even within max_age
+        if not cookies:
+            return None
+        return cookies
+
+    def save(self, username: str, cookies: List[Cookie]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'username': username, 'saved_at': time.time(), 'cookies': cookies}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
@@ -19,6 +19,9 @@ API_CONFIG = {
             "(contact@email.com; "  # TODO: Replace with actual contact
             "Project: https://github.com/yourusername/starcraft-tournament-tracker)"
         ),
+        # Login cookies reused across restarts instead of logging in again
+        'session_file': os.getenv('LIQUIPEDIA_SESSION_FILE', str(BASE_DIR / "state" / "liquipedia_session.json")),
+        'session_max_age': 12 * 3600,
     },
     'liquipediadb': {
         'api_key': os.getenv('LIQUIPEDIADB_API_KEY'),
@@ -28,20 +31,50 @@ API_CONFIG = {
 # Cache Configuration
 CACHE_CONFIG = {
     'memory': {
-        'max_size': 1000,
+        'max_size': 100000,
+        # Budget for estimated value sizes; large parsed pages count for what they weigh
+        'max_bytes': int(os.getenv('MEMORY_CACHE_MAX_BYTES', str(256 * 1024 * 1024))),
     },
     'redis': {
         'url': os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+        # Connection pool shared by all RedisCache operations
+        'max_connections': int(os.getenv('REDIS_MAX_CONNECTIONS', '20')),
+        'socket_timeout': 5,
+        'socket_connect_timeout': 2,
+        # Seconds to wait for a free pooled connection before raising
+        'pool_timeout': 5,
+        # Prefix of every cache key, so clear_all() leaves other users of the database alone
+        'namespace': os.getenv('CACHE_NAMESPACE', 'esports-tldr'),
     },
     'file': {
         'directory': str(CACHE_DIR),
+        # 'json' (one file per key) or 'sqlite' (single WAL-mode database)
+        'backend': os.getenv('FILE_CACHE_BACKEND', 'json'),
+    },
+    # Serialization for the Redis and file layers, per data type.
+    # format: json | orjson | msgpack; compression: none | zlib | zstd,
+    # applied to values of at least `threshold` bytes
+    'codecs': {
+        'default': {'format': 'json', 'compression': 'zlib', 'threshold': 4096},
+        'parse': {'format': 'orjson', 'compression': 'zstd', 'threshold': 1024},
+        # Values in warm-restart snapshots (CacheManager.export_snapshot)
+        'snapshot': {'format': 'msgpack', 'compression': 'zstd', 'threshold': 512},
     },
     'ttls': {
         'tournament': 3600,    # 1 hour
         'player': 7200,        # 2 hours
         'static': 86400,       # 24 hours
         'parse': 604800,       # 1 week for parsed pages
-    }
+        'missing': 300,        # 5 minutes for titles known not to exist
+    },
+    # Grace period after the TTL during which get_or_load() serves a stale
+    # value while refreshing it; plain reads treat it as a miss
+    'stale_ttls': {
+        'tournament': 600,     # 10 minutes
+        'player': 3600,        # 1 hour
+        'static': 86400,       # 24 hours
+        'parse': 604800,       # 1 week
+    },
 }
 
 # Rate Limiting Configuration
@@ -54,3 +87,61 @@ RATE_LIMITS = {
         'general': {'calls': 60, 'period': 3600}, # 60 requests per hour
     }
 }
+
+# Adaptive rate control: the RATE_LIMITS budgets are ceilings. A 429 cuts
+# the rate multiplicatively, as do responses slower than latency_target;
+# every healthy response wins back `increase` of the ceiling (AIMD)
+ADAPTIVE_RATE_CONFIG = {
+    'enabled': os.getenv('ADAPTIVE_RATE_ENABLED', '1').lower() not in ('0', 'false', 'no'),
+    'decrease': 0.5,           # rate multiplier after a 429
+    'latency_decrease': 0.8,   # rate multiplier after a slow response
+    'increase': 0.05,          # fraction of the ceiling regained per healthy response
+    'min_fraction': 0.1,       # floor, as a fraction of the ceiling
+    'latency_target': 2.0,     # seconds, smoothed over recent responses
+}
+
+# Circuit breaker per API: after `failure_threshold` consecutive failures
+# calls fail fast for `reset_timeout` seconds (doubling up to
+# `max_reset_timeout` while the API stays down) and callers fall back to cache
+CIRCUIT_BREAKER_CONFIG = {
+    'failure_threshold': 5,
+    'reset_timeout': 30,
+    'max_reset_timeout': 600,
+    # Seconds a 404/410 from an API is remembered and answered locally
+    'missing_ttl': 300,
+}
+
+# Where rate limiter state lives: 'local' (per process) or 'redis' (one
+# budget shared by every process and host using the same Redis)
+RATE_LIMITER_CONFIG = {
+    'backend': os.getenv('RATE_LIMITER_BACKEND', 'local'),
+    'redis_url': os.getenv('RATE_LIMITER_REDIS_URL', CACHE_CONFIG['redis']['url']),
+    'key_prefix': 'ratelimit',
+}
+
+# Metrics Configuration
+METRICS_CONFIG = {
+    # Counters and histograms on the cache, client and rate limiter hot paths;
+    # when disabled every update is a single flag check
+    'enabled': os.getenv('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no'),
+}
+
+# Crawler Configuration
+CRAWLER_CONFIG = {
+    # Where the incremental crawler records how far into recentchanges it has read
+    'checkpoint': os.getenv('CRAWLER_CHECKPOINT', str(BASE_DIR / "state" / "crawler_checkpoint.json")),
+    'poll_interval': 60,       # seconds between recentchanges polls
+    'namespaces': '0',         # main namespace only
+    'seed_categories': ['Category:Tournaments', 'Category:Players'],
+}
+
+# Summary Snapshot Configuration
+SNAPSHOT_CONFIG = {
+    # Versioned summary JSON (plus .gz copies) written by SnapshotBuilder
+    'directory': os.getenv('SNAPSHOT_DIR', str(BASE_DIR / "snapshots")),
+    'host': os.getenv('SNAPSHOT_HOST', '127.0.0.1'),
+    'port': int(os.getenv('SNAPSHOT_PORT', '8765')),
+    'history': 1000,           # versions kept for the delta feed
+    'top_players': 10,
+    'min_matches': 5,          # for win rate and form rankings
+}
@@ -0,0 +1,9 @@
+"""Exceptions shared by the client and cache layers."""
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an API whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
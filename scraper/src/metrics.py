@@ -0,0 +1,286 @@
+"""
+Lightweight in-process metrics: counters and histograms with label tuples.
+
+Metrics are declared once at import time and updated from the hot paths of
+the cache layers, API clients and rate limiters. When disabled (the
+METRICS_CONFIG switch or disable()), every update returns after a single
+flag check. Snapshots export as Prometheus text or JSON.
+"""
+import bisect
+import json
+import threading
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .config import METRICS_CONFIG
+
+Labels = Tuple[str, ...]
+
+# Seconds; spans a memory hit (~1us) up to a parse-budget wait (30s)
+DEFAULT_BUCKETS = (
+    0.00001, 0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60,
+)
+
+class _State:
+    enabled = bool(METRICS_CONFIG.get('enabled', True))
+
+_state = _State()
+
+def enable() -> None:
+    _state.enabled = True
+
+def disable() -> None:
+    _state.enabled = False
+
+def is_enabled() -> bool:
+    return _state.enabled
+
+class _Metric:
+    """
+    Base for metrics whose updates go to a per-thread shard.
+
+    Updating a thread's own dict needs no lock, which keeps the cost of a
+    counter increment close to a plain dict update; reads merge all shards.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, Any]] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> Dict[Labels, Any]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._shards.append(values)
+            return values
+
+    def reset(self) -> None:
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+
+class Counter(_Metric):
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        if not _state.enabled:
+            return
+        values = self._shard()
+        values[labels] = values.get(labels, 0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        merged: Dict[Labels, float] = {}
+        with self._lock:
+            for shard in self._shards:
+                for labels, value in list(shard.items()):
+                    merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+    def value(self, labels: Labels = ()) -> float:
+        return self.values().get(labels, 0)
+
+    def _samples(self) -> List[Tuple[str, Labels, float]]:
+        return [(self.name, labels, value) for labels, value in self.values().items()]
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            'type': 'counter',
+            'values': [
+                {'labels': dict(zip(self.label_names, labels)), 'value': value}
+                for labels, value in self.values().items()
+            ],
+        }
+
+class Histogram(_Metric):
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        if not _state.enabled:
+            return
+        values = self._shard()
+        # [bucket counts..., +Inf count, sum]
+        counts = values.get(labels)
+        if counts is None:
+            counts = values[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def values(self) -> Dict[Labels, List[float]]:
+        merged: Dict[Labels, List[float]] = {}
+        with self._lock:
+            for shard in self._shards:
+                for labels, counts in list(shard.items()):
+                    total = merged.get(labels)
+                    if total is None:
+                        merged[labels] = list(counts)
+                    else:
+                        merged[labels] = [a + b for a, b in zip(total, counts)]
+        return merged
+
+    def count(self, labels: Labels = ()) -> int:
+        counts = self.values().get(labels)
+        return int(sum(counts[:-1])) if counts else 0
+
+    def sum(self, labels: Labels = ()) -> float:
+        counts = self.values().get(labels)
+        return counts[-1] if counts else 0.0
+
+    def _samples(self) -> List[Tuple[str, Labels, float]]:
+        samples = []
+        for labels, counts in self.values().items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                samples.append((f'{self.name}_bucket', labels + (le,), cumulative))
+            samples.append((f'{self.name}_count', labels, cumulative))
+            samples.append((f'{self.name}_sum', labels, counts[-1]))
+        return samples
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            'type': 'histogram',
+            'buckets': list(self.buckets),
+            'values': [
+                {
+                    'labels': dict(zip(self.label_names, labels)),
+                    'counts': counts[:-1],
+                    'count': int(sum(counts[:-1])),
+                    'sum': counts[-1],
+                }
+                for labels, counts in self.values().items()
+            ],
+        }
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def reset(self) -> None:
+        """Zero every metric (mainly for tests)."""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            kind = 'counter' if isinstance(metric, Counter) else 'histogram'
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {kind}')
+            label_names = metric.label_names
+            for sample_name, labels, value in metric._samples():
+                names = label_names + ('le',) if sample_name.endswith('_bucket') else label_names
+                rendered = ','.join(
+                    f'{name}="{_escape(str(label))}"' for name, label in zip(names, labels)
+                )
+                lines.append(f'{sample_name}{{{rendered}}} {value}' if rendered else f'{sample_name} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable view of all metrics."""
+        return {name: metric._snapshot() for name, metric in list(self._metrics.items())}
+
+    def write_snapshot(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+REGISTRY = Registry()
+
+# -- metrics used across the package ---------------------------------------
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    'cache_lookups_total', 'Cache lookups by layer and result (hit, miss, stale)',
+    ('layer', 'data_type', 'result'),
+)
+CACHE_LATENCY = REGISTRY.histogram(
+    'cache_operation_seconds', 'Time spent in a cache layer operation',
+    ('layer', 'operation'),
+)
+CACHE_EVICTIONS = REGISTRY.counter(
+    'cache_evictions_total', 'Entries evicted to stay within size limits',
+    ('layer',),
+)
+CACHE_ERRORS = REGISTRY.counter(
+    'cache_errors_total', 'Cache layer operations that failed and were ignored',
+    ('layer', 'operation'),
+)
+CACHE_REFRESHES = REGISTRY.counter(
+    'cache_refreshes_total', 'Stale-while-revalidate background refreshes',
+    ('result',),
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    'http_requests_total', 'API requests by client, endpoint/action and status',
+    ('client', 'endpoint', 'status'),
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    'http_request_duration_seconds', 'API request latency, excluding rate limiter waits',
+    ('client', 'endpoint'),
+)
+LIMITER_WAIT = REGISTRY.histogram(
+    'rate_limiter_wait_seconds', 'Time callers spent waiting for a rate limiter',
+    ('limiter',),
+)
+LIMITER_PENALTIES = REGISTRY.counter(
+    'rate_limiter_penalties_total', 'Retry-After penalties applied to a limiter',
+    ('limiter',),
+)
+
+LIMITER_RATE_CHANGES = REGISTRY.counter(
+    'rate_limiter_rate_changes_total', 'Adaptive rate adjustments by reason (throttled, slow, recovered)',
+    ('limiter', 'reason'),
+)
+CIRCUIT_TRANSITIONS = REGISTRY.counter(
+    'circuit_breaker_transitions_total', 'Circuit breaker state changes',
+    ('breaker', 'state'),
+)
+
+def endpoint_label(endpoint: str, params: Any = None) -> str:
+    """Low-cardinality label for a request: the api.php action, or the v3 resource type."""
+    if params and 'action' in params:
+        action = params['action']
+        detail = params.get('list') or params.get('prop')
+        return f'{action}:{detail}' if detail else action
+    parts = [part for part in endpoint.strip('/').split('/') if part]
+    if not parts:
+        return 'root'
+    # '/search/players' keeps both segments; '/player/<id>' drops the id
+    return '/'.join(parts[:2]) if parts[0] == 'search' else parts[0]
@@ -0,0 +1,368 @@
+"""
+Columnar store of extracted match results and placements.
+
+Players, tournaments and games are dictionary-encoded to int32 codes and
+every field lives in its own NumPy array, so cross-tournament summaries
+are a handful of vectorized passes instead of a scan over cached pages.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+MATCH_SCHEMA = {
+    'tournament': np.int32,
+    'game': np.int32,
+    'player1': np.int32,
+    'player2': np.int32,
+    'score1': np.int16,     # -1 when unknown (walkover, not played)
+    'score2': np.int16,
+    'winner': np.int8,      # 1 or 2; 0 while undecided
+    'timestamp': np.int64,  # unix seconds; 0 when unknown
+    'alive': np.bool_,      # False once the tournament is re-ingested
+}
+PLACEMENT_SCHEMA = {
+    'tournament': np.int32,
+    'game': np.int32,
+    'player': np.int32,
+    'place': np.int16,      # first number of the placement, e.g. 3 for '3rd-4th'
+    'prize': np.float64,    # NaN when unknown
+    'alive': np.bool_,
+}
+
+_PLACE = re.compile(r'\d+')
+
+class Dictionary:
+    """Two-way mapping between strings and dense int32 codes."""
+    __slots__ = ('values', '_codes')
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+        for value in values:
+            self.encode(value)
+
+    def encode(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code(self, value: str) -> Optional[int]:
+        """Code of a known value, without adding it."""
+        return self._codes.get(value)
+
+    def decode(self, code: int) -> str:
+        return self.values[code]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+class _Table:
+    """Equal-length growable columns; appends are amortized O(1) per row."""
+
+    def __init__(self, schema: Dict[str, Any], capacity: int = 1024):
+        self._data = {name: np.empty(capacity, dtype) for name, dtype in schema.items()}
+        self.size = 0
+
+    def append(self, columns: Dict[str, Any]) -> None:
+        rows = len(next(iter(columns.values())))
+        needed = self.size + rows
+        for name, data in self._data.items():
+            if needed > len(data):
+                grown = np.empty(max(needed, 2 * len(data)), data.dtype)
+                grown[:self.size] = data[:self.size]
+                self._data[name] = data = grown
+            data[self.size:needed] = columns[name]
+        self.size = needed
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """View of the filled part of a column."""
+        return self._data[name][:self.size]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: self[name] for name in self._data}
+
+class ResultsStore:
+    """
+    Append-only columnar store of matches and placements.
+
+    Pages are ingested incrementally with add_page(). Re-ingesting a
+    tournament at a new revision marks its previous rows dead rather than
+    rewriting the arrays; the same revision is skipped. Queries work on
+    whole columns with NumPy and only convert the rows they return.
+    """
+
+    def __init__(self):
+        self.players = Dictionary()
+        self.tournaments = Dictionary()
+        self.games = Dictionary()
+        self.matches = _Table(MATCH_SCHEMA)
+        self.placements = _Table(PLACEMENT_SCHEMA)
+        # tournament code -> revid of the ingested page
+        self.revisions: Dict[int, Optional[int]] = {}
+
+    def add_page(self, page, game: str) -> int:
+        """
+        Ingest the records of one page (data_processor.PageRecords) and return the rows added.
+
+        Nothing is added if this revision of the tournament is already stored.
+        """
+        tournament = self.tournaments.encode(page.title)
+        if tournament in self.revisions:
+            if self.revisions[tournament] == page.revid:
+                return 0
+            self._retire(tournament)
+        self.revisions[tournament] = page.revid
+        return self.add_matches(page.title, game, page.matches) + self.add_placements(page.title, game, page.placements)
+
+    def _retire(self, tournament: int) -> None:
+        for table in (self.matches, self.placements):
+            alive = table['alive']
+            alive[table['tournament'] == tournament] = False
+
+    def add_matches(self, tournament: str, game: str, matches: Iterable[Any]) -> int:
+        """Append Match records; matches without both opponents are skipped."""
+        encode = self.players.encode
+        player1, player2, score1, score2, winner, timestamp = [], [], [], [], [], []
+        for match in matches:
+            if match.player1 is None or match.player2 is None:
+                continue
+            player1.append(encode(match.player1))
+            player2.append(encode(match.player2))
+            score1.append(-1 if match.score1 is None else match.score1)
+            score2.append(-1 if match.score2 is None else match.score2)
+            winner.append(1 if match.winner == match.player1 else 2 if match.winner == match.player2 else 0)
+            timestamp.append(match.timestamp or 0)
+        if not player1:
+            return 0
+        rows = len(player1)
+        self.matches.append({
+            'tournament': np.full(rows, self.tournaments.encode(tournament)),
+            'game': np.full(rows, self.games.encode(game)),
+            'player1': player1,
+            'player2': player2,
+            'score1': score1,
+            'score2': score2,
+            'winner': winner,
+            'timestamp': timestamp,
+            'alive': np.ones(rows, np.bool_),
+        })
+        return rows
+
+    def add_placements(self, tournament: str, game: str, placements: Iterable[Any]) -> int:
+        """Append Placement records; rows without a player or a numeric place are skipped."""
+        players, places, prizes = [], [], []
+        for placement in placements:
+            number = _PLACE.search(placement.place or '')
+            if placement.player is None or number is None:
+                continue
+            players.append(self.players.encode(placement.player))
+            places.append(int(number.group()))
+            prizes.append(np.nan if placement.prize is None else placement.prize)
+        if not players:
+            return 0
+        rows = len(players)
+        self.placements.append({
+            'tournament': np.full(rows, self.tournaments.encode(tournament)),
+            'game': np.full(rows, self.games.encode(game)),
+            'player': players,
+            'place': places,
+            'prize': prizes,
+            'alive': np.ones(rows, np.bool_),
+        })
+        return rows
+
+    def _decided(self, game: Optional[str], since: Optional[int]) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """(player1, player2, winner, timestamp) of live, decided matches passing the filters."""
+        mask = self.matches['alive'] & (self.matches['winner'] > 0)
+        if game is not None:
+            code = self.games.code(game)
+            if code is None:
+                return None
+            mask &= self.matches['game'] == code
+        if since is not None:
+            mask &= self.matches['timestamp'] >= since
+        return (
+            self.matches['player1'][mask], self.matches['player2'][mask],
+            self.matches['winner'][mask], self.matches['timestamp'][mask],
+        )
+
+    def _ranking(self, wins: np.ndarray, played: np.ndarray, min_matches: int, limit: Optional[int]) -> List[Dict[str, Any]]:
+        eligible = np.flatnonzero(played >= max(1, min_matches))
+        rates = wins[eligible] / played[eligible]
+        # Best rate first; more matches breaks ties
+        order = eligible[np.lexsort((-played[eligible], -rates))]
+        if limit is not None:
+            order = order[:limit]
+        return [
+            {
+                'player': self.players.decode(code),
+                'wins': int(wins[code]),
+                'matches': int(played[code]),
+                'win_rate': float(wins[code] / played[code]),
+            }
+            for code in order
+        ]
+
+    def win_rates(
+        self,
+        game: Optional[str] = None,
+        since: Optional[int] = None,
+        min_matches: int = 1,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Players ranked by win rate over decided matches, optionally for one game and from a timestamp."""
+        decided = self._decided(game, since)
+        if decided is None:
+            return []
+        player1, player2, winner, _ = decided
+        n = len(self.players)
+        played = np.bincount(player1, minlength=n) + np.bincount(player2, minlength=n)
+        wins = np.bincount(player1[winner == 1], minlength=n) + np.bincount(player2[winner == 2], minlength=n)
+        return self._ranking(wins, played, min_matches, limit)
+
+    def head_to_head(self, first: str, second: str, game: Optional[str] = None) -> Dict[str, int]:
+        """Decided matches between two players and how many each of them won."""
+        a, b = self.players.code(first), self.players.code(second)
+        decided = self._decided(game, None)
+        if a is None or b is None or decided is None:
+            return {'matches': 0, first: 0, second: 0}
+        player1, player2, winner, _ = decided
+        forward = (player1 == a) & (player2 == b)
+        reverse = (player1 == b) & (player2 == a)
+        first_wins = int(np.count_nonzero(forward & (winner == 1)) + np.count_nonzero(reverse & (winner == 2)))
+        matches = int(np.count_nonzero(forward | reverse))
+        return {'matches': matches, first: first_wins, second: matches - first_wins}
+
+    def form(
+        self,
+        game: Optional[str] = None,
+        last: int = 10,
+        min_matches: int = 1,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Players ranked by win rate over their `last` most recent decided matches."""
+        decided = self._decided(game, None)
+        if decided is None:
+            return []
+        player1, player2, winner, timestamp = decided
+        # One row per player appearance
+        players = np.concatenate((player1, player2))
+        won = np.concatenate((winner == 1, winner == 2))
+        times = np.concatenate((timestamp, timestamp))
+
+        # Group by player, newest first, then keep the first `last` of each group.
+        # Player and inverted timestamp are packed into one int64 key: a single
+        # argsort is several times faster than lexsort on two columns.
+        key = (players.astype(np.int64) << 32) | (0xFFFFFFFF - np.clip(times, 0, 0xFFFFFFFF))
+        order = np.argsort(key)
+        players, won = players[order], won[order]
+        starts = np.flatnonzero(np.r_[True, players[1:] != players[:-1]])
+        group = np.cumsum(np.r_[False, players[1:] != players[:-1]])
+        recent = np.arange(len(players)) - starts[group] < last
+        n = len(self.players)
+        played = np.bincount(players[recent], minlength=n)
+        wins = np.bincount(players[recent], weights=won[recent], minlength=n).astype(np.int64)
+        return self._ranking(wins, played, min_matches, limit)
+
+    def upsets(self, game: Optional[str] = None, since: Optional[int] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Decided matches won by the player with the lower overall win rate, biggest gap first."""
+        decided = self._decided(game, None)
+        if decided is None:
+            return []
+        player1, player2, winner, timestamp = decided
+        n = len(self.players)
+        played = np.bincount(player1, minlength=n) + np.bincount(player2, minlength=n)
+        wins = np.bincount(player1[winner == 1], minlength=n) + np.bincount(player2[winner == 2], minlength=n)
+        rates = wins / np.maximum(played, 1)
+
+        winners = np.where(winner == 1, player1, player2)
+        losers = np.where(winner == 1, player2, player1)
+        gap = rates[losers] - rates[winners]
+        if since is not None:
+            gap[timestamp < since] = 0
+        candidates = np.flatnonzero(gap > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-gap[candidates], limit)[:limit]]
+        candidates = candidates[np.argsort(-gap[candidates], kind='stable')]
+        return [
+            {
+                'winner': self.players.decode(winners[i]),
+                'loser': self.players.decode(losers[i]),
+                'winner_rate': float(rates[winners[i]]),
+                'loser_rate': float(rates[losers[i]]),
+                'timestamp': int(timestamp[i]),
+            }
+            for i in candidates
+        ]
+
+    def tournament_games(self) -> Dict[str, str]:
+        """Game of every tournament that still has live rows."""
+        games = {}
+        for table in (self.matches, self.placements):
+            alive = table['alive']
+            codes, first = np.unique(table['tournament'][alive], return_index=True)
+            for code, game in zip(codes.tolist(), table['game'][alive][first].tolist()):
+                games.setdefault(self.tournaments.decode(code), self.games.decode(game))
+        return games
+
+    def tournament_summary(self, title: str, placements: int = 8) -> Optional[Dict[str, Any]]:
+        """Match count, champion and top placements of one tournament, or None if it is not stored."""
+        code = self.tournaments.code(title)
+        if code is None:
+            return None
+        matches = self.matches['alive'] & (self.matches['tournament'] == code)
+        rows = np.flatnonzero(self.placements['alive'] & (self.placements['tournament'] == code))
+        if not matches.any() and not len(rows):
+            return None
+        rows = rows[np.argsort(self.placements['place'][rows], kind='stable')]
+        prizes = self.placements['prize'][rows]
+        top = [
+            {
+                'place': int(self.placements['place'][i]),
+                'player': self.players.decode(self.placements['player'][i]),
+                'prize': None if np.isnan(self.placements['prize'][i]) else float(self.placements['prize'][i]),
+            }
+            for i in rows[:placements]
+        ]
+        timestamps = self.matches['timestamp'][matches]
+        timestamps = timestamps[timestamps > 0]
+        return {
+            'title': title,
+            'revid': self.revisions.get(code),
+            'matches': int(np.count_nonzero(matches)),
+            'champion': top[0]['player'] if top and top[0]['place'] == 1 else None,
+            'placements': top,
+            'prize_total': float(np.nansum(prizes)) if len(prizes) else None,
+            'last_match': int(timestamps.max()) if len(timestamps) else None,
+        }
+
+    def save(self, path: str) -> None:
+        """Write the store to a single .npz file."""
+        arrays = {f'matches.{name}': data for name, data in self.matches.columns().items()}
+        arrays.update({f'placements.{name}': data for name, data in self.placements.columns().items()})
+        for name in ('players', 'tournaments', 'games'):
+            arrays[name] = np.array(getattr(self, name).values, dtype=str)
+        codes = list(self.revisions)
+        arrays['revisions.tournament'] = np.array(codes, dtype=np.int32)
+        arrays['revisions.revid'] = np.array([-1 if self.revisions[c] is None else self.revisions[c] for c in codes], dtype=np.int64)
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'ResultsStore':
+        store = cls()
+        with np.load(path) as arrays:
+            for name in ('players', 'tournaments', 'games'):
+                setattr(store, name, Dictionary(arrays[name].tolist()))
+            for prefix, table in (('matches', store.matches), ('placements', store.placements)):
+                columns = {name: arrays[f'{prefix}.{name}'] for name in table._data}
+                if len(columns['alive']):
+                    table.append(columns)
+            store.revisions = {
+                int(code): None if revid < 0 else int(revid)
+                for code, revid in zip(arrays['revisions.tournament'], arrays['revisions.revid'])
+            }
+        return store
@@ -0,0 +1,516 @@
+import heapq
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .cache import CacheManager, RevisionParseCache
+from .errors import CircuitOpenError
+from .config import CRAWLER_CONFIG
+
+class Priority(IntEnum):
+    """Lower values are fetched first."""
+    LIVE = 0        # events in progress
+    RECENT = 1      # recently finished tournaments
+    BACKFILL = 2    # static history
+
+class FetchJob:
+    __slots__ = ('kind', 'title', 'priority', 'queued_at', 'deadline', 'data_type', 'revid', 'dispatched', 'future')
+
+    def __init__(self, kind: str, title: str, priority: Priority, deadline: Optional[float], data_type: str):
+        self.kind = kind
+        self.title = title
+        self.priority = priority
+        self.queued_at = time.monotonic()
+        self.deadline = deadline
+        self.data_type = data_type
+        self.revid: Optional[int] = None
+        # True while a request for the job is in flight
+        self.dispatched = False
+        self.future: Future = Future()
+
+class _Lane:
+    """Pending jobs for one rate limit budget, one FIFO queue per priority."""
+
+    def __init__(self, name: str, limiter):
+        self.name = name
+        self.limiter = limiter
+        self.queues: Dict[Priority, Deque[FetchJob]] = {p: deque() for p in Priority}
+        # (deadline, sequence, job); entries for finished or promoted jobs are skipped lazily
+        self.deadlines: List[Tuple[float, int, FetchJob]] = []
+        self.size = 0
+
+    def push(self, job: FetchJob) -> None:
+        self.queues[job.priority].append(job)
+        self.size += 1
+
+class FetchScheduler:
+    """
+    Priority scheduler for Liquipedia fetches across the general and parse budgets.
+
+    Each budget is drained by its own worker thread. A worker waits until
+    its limiter has a token and only then picks the most urgent pending
+    jobs, so work queued while it waited is not overtaken by older, less
+    important work. Jobs that wait too long, or approach their deadline,
+    are promoted a priority level.
+
+    'info' jobs and the revision checks of 'parse' jobs share the general
+    budget and are packed into batched queries. A parse job whose current
+    revision is already cached completes there; only changed pages move to
+    the parse lane and spend a parse token. Jobs already answered by the
+    cache, including titles recently found missing, complete on submit
+    without using any budget. While the API's circuit breaker is open,
+    jobs are answered with whatever is cached, however old.
+    """
+
+    # Seconds a job may wait before it is promoted one level
+    PROMOTE_AFTER = {
+        Priority.RECENT: 120,
+        Priority.BACKFILL: 600,
+    }
+    # Jobs this close to their deadline are treated as live
+    DEADLINE_HORIZON = 60
+
+    def __init__(
+        self,
+        client,
+        cache_manager: CacheManager,
+        parse_cache: Optional[RevisionParseCache] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.client = client
+        self.cache_manager = cache_manager
+        self.parse_cache = parse_cache or RevisionParseCache(client, cache_manager)
+        self.batch_size = batch_size or client.MAX_TITLES_PER_QUERY
+        self.promote_after = dict(self.PROMOTE_AFTER)
+        self.deadline_horizon = self.DEADLINE_HORIZON
+
+        self.general = _Lane('general', client.limiter)
+        self.parse = _Lane('parse', client.parse_limiter)
+        self._pending: Dict[Tuple[str, str], FetchJob] = {}
+        self._condition = threading.Condition()
+        self._sequence = 0
+        self._stopping = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self.stats = {
+            'submitted': 0,
+            'deduplicated': 0,
+            'served_from_cache': 0,
+            'served_stale': 0,
+            'promoted': 0,
+            'general_requests': 0,
+            'parse_requests': 0,
+            'failed': 0,
+        }
+
+    @staticmethod
+    def info_key(title: str) -> str:
+        return f"info:{title}"
+
+    # -- submitting ----------------------------------------------------------
+
+    def submit(
+        self,
+        kind: str,
+        title: str,
+        priority: Priority = Priority.BACKFILL,
+        deadline: Optional[float] = None,
+        data_type: str = 'tournament',
+        refresh: bool = False,
+    ) -> Future:
+        """
+        Queue a fetch and return a Future for its result.
+
+        kind is 'info' (page info) or 'parse' (parsed page). deadline is a
+        time.monotonic() value. Resubmitting a pending job returns the same
+        Future and can only raise its priority or bring its deadline forward.
+        With refresh=False a cached result completes the job immediately.
+        """
+        if kind not in ('info', 'parse'):
+            raise ValueError(f"Unknown job kind: {kind}")
+        if not refresh:
+            cached = self._from_cache(kind, title, data_type)
+            if cached is not None or self.parse_cache.known_missing([title]):
+                self._count('served_from_cache')
+                future: Future = Future()
+                future.set_result(cached)
+                return future
+
+        with self._condition:
+            self.stats['submitted'] += 1
+            job = self._pending.get((kind, title))
+            if job is not None:
+                self.stats['deduplicated'] += 1
+                if priority < job.priority:
+                    self._move(job, priority)
+                if deadline is not None and (job.deadline is None or deadline < job.deadline):
+                    self._set_deadline(job, deadline)
+                return job.future
+
+            job = FetchJob(kind, title, priority, deadline, data_type)
+            self._pending[(kind, title)] = job
+            self.general.push(job)
+            if deadline is not None:
+                self._set_deadline(job, deadline)
+            self._condition.notify_all()
+            return job.future
+
+    def _from_cache(self, kind: str, title: str, data_type: str, allow_stale: bool = False) -> Optional[Any]:
+        if kind == 'info':
+            return self.cache_manager.get(self.info_key(title), data_type, allow_stale=allow_stale)
+        return self.parse_cache.get_latest_cached(title, allow_stale)
+
+    def _lane_of(self, job: FetchJob) -> _Lane:
+        # A parse job sits in the general lane until its revision is known
+        return self.parse if job.kind == 'parse' and job.revid is not None else self.general
+
+    def _move(self, job: FetchJob, priority: Priority, front: bool = False) -> None:
+        """
+        Requeue a pending job at a higher priority; its old queue entry is skipped later.
+
+        Promoted jobs go to the front, having already waited longer than
+        anything queued at their new level.
+        """
+        job.priority = priority
+        now = time.monotonic()
+        if job.dispatched:
+            job.queued_at = now
+            return
+        lane = self._lane_of(job)
+        queue = lane.queues[priority]
+        if front:
+            # Keep each queue ordered by queued_at so only its head can be overdue
+            job.queued_at = min(now, queue[0].queued_at) if queue else now
+            queue.appendleft(job)
+            lane.size += 1
+        else:
+            job.queued_at = now
+            lane.push(job)
+
+    def _set_deadline(self, job: FetchJob, deadline: float) -> None:
+        job.deadline = deadline
+        self._sequence += 1
+        heapq.heappush(self._lane_of(job).deadlines, (deadline, self._sequence, job))
+
+    # -- selection -----------------------------------------------------------
+
+    def _is_current(self, job: FetchJob, lane: _Lane, priority: Priority) -> bool:
+        return (
+            job.priority == priority
+            and not job.dispatched
+            and not job.future.done()
+            and self._lane_of(job) is lane
+        )
+
+    def _promote(self, lane: _Lane, now: float) -> None:
+        """Move jobs near their deadline to LIVE and jobs that waited too long up one level."""
+        while lane.deadlines and lane.deadlines[0][0] - now <= self.deadline_horizon:
+            _, _, job = heapq.heappop(lane.deadlines)
+            if job.priority != Priority.LIVE and self._is_current(job, lane, job.priority):
+                self._move(job, Priority.LIVE)
+                self.stats['promoted'] += 1
+
+        for priority in (Priority.RECENT, Priority.BACKFILL):
+            queue = lane.queues[priority]
+            wait = self.promote_after.get(priority)
+            # Queues are FIFO, so only the heads can be overdue
+            while queue:
+                job = queue[0]
+                if not self._is_current(job, lane, priority):
+                    queue.popleft()
+                    continue
+                if wait is None or now - job.queued_at < wait:
+                    break
+                queue.popleft()
+                self._move(job, Priority(priority - 1), front=True)
+                self.stats['promoted'] += 1
+
+    def _take(self, lane: _Lane, limit: int) -> List[FetchJob]:
+        """Remove and return up to `limit` of the most urgent jobs in a lane."""
+        self._promote(lane, time.monotonic())
+        batch: List[FetchJob] = []
+        for priority in Priority:
+            queue = lane.queues[priority]
+            while queue and len(batch) < limit:
+                job = queue.popleft()
+                if self._is_current(job, lane, priority):
+                    job.dispatched = True
+                    batch.append(job)
+            if len(batch) >= limit:
+                break
+        lane.size = sum(len(q) for q in lane.queues.values())
+        return batch
+
+    # -- running -------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start one worker thread per budget."""
+        if self._workers:
+            return
+        self._stopping.clear()
+        for lane in (self.general, self.parse):
+            worker = threading.Thread(target=self._run_lane, args=(lane,), name=f'fetch-{lane.name}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self) -> None:
+        """Stop the workers once their current request finishes; pending jobs stay queued."""
+        self._stopping.set()
+        with self._condition:
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted job has completed. Returns False on timeout."""
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending:
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def _run_lane(self, lane: _Lane) -> None:
+        limit = self.batch_size if lane is self.general else 1
+        while not self._stopping.is_set():
+            with self._condition:
+                while lane.size == 0 and not self._stopping.is_set():
+                    self._condition.wait()
+            # Bind work to the token only once it is available
+            delay = lane.limiter.ready_in()
+            if delay > 0 and self._stopping.wait(delay):
+                break
+            with self._condition:
+                batch = self._take(lane, limit)
+            if batch:
+                self._dispatch(lane, batch)
+
+    def _dispatch(self, lane: _Lane, batch: List[FetchJob]) -> None:
+        try:
+            if lane is self.general:
+                self._fetch_info(batch)
+            else:
+                self._fetch_parse(batch[0])
+        except Exception as e:
+            stale = isinstance(e, CircuitOpenError)
+            for job in batch:
+                # Parse jobs already handed on to the parse lane stay queued
+                if not job.dispatched or job.future.done():
+                    continue
+                cached = self._from_cache(job.kind, job.title, job.data_type, allow_stale=True) if stale else None
+                if cached is not None:
+                    self._count('served_stale')
+                    self._finish(job, cached)
+                else:
+                    self._count('failed')
+                    self._finish(job, exception=e)
+
+    def _fetch_info(self, batch: List[FetchJob]) -> None:
+        """One batched query answers info jobs and resolves revisions for parse jobs."""
+        self._count('general_requests')
+        pages = self.client.get_pages_info([job.title for job in batch], prop='info|revisions', rvprop='ids')
+        for job in batch:
+            page = pages.get(job.title)
+            if page is None or 'missing' in page:
+                if page is not None:
+                    self.parse_cache.mark_missing(job.title)
+                self._finish(job, None)
+            elif job.kind == 'info':
+                self.cache_manager.set(self.info_key(job.title), page, job.data_type, (RevisionParseCache.page_tag(job.title),))
+                self._finish(job, page)
+            else:
+                revid = page['revisions'][0]['revid'] if page.get('revisions') else page.get('lastrevid')
+                if not revid:
+                    self._finish(job, None)
+                    continue
+                cached = self.parse_cache.get_cached(job.title, revid)
+                if cached is not None:
+                    # Unchanged since it was last parsed
+                    self._count('served_from_cache')
+                    self._finish(job, cached)
+                    continue
+                with self._condition:
+                    job.revid = revid
+                    job.dispatched = False
+                    self.parse.push(job)
+                    if job.deadline is not None:
+                        self._set_deadline(job, job.deadline)
+                    self._condition.notify_all()
+
+    def _fetch_parse(self, job: FetchJob) -> None:
+        self._count('parse_requests')
+        parsed = self.client.get_parsed_page(job.title)
+        self.parse_cache.stats['parse_calls'] += 1
+        if 'parse' not in parsed:
+            # e.g. the page was deleted after its revision was checked
+            self._finish(job, None)
+            return
+        # The page may have been edited since its revision was checked
+        self.parse_cache.store(job.title, parsed['parse'].get('revid') or job.revid, parsed)
+        self._finish(job, parsed)
+
+    def _count(self, stat: str) -> None:
+        # Both workers and submitting threads update the counters
+        with self._condition:
+            self.stats[stat] += 1
+
+    def _finish(self, job: FetchJob, result: Any = None, exception: Optional[BaseException] = None) -> None:
+        if exception is not None:
+            job.future.set_exception(exception)
+        else:
+            job.future.set_result(result)
+        with self._condition:
+            self._pending.pop((job.kind, job.title), None)
+            self._condition.notify_all()
+
+class IncrementalCrawler:
+    """
+    Keeps the cache current by following Liquipedia's recentchanges feed.
+
+    Each poll reads the changes made since the persisted checkpoint,
+    invalidates the cached entries of every changed title and submits the
+    titles to a FetchScheduler. The checkpoint (including any continuation
+    token) is written after every batch, so a restarted crawler resumes
+    exactly where the previous one stopped; a batch interrupted before its
+    checkpoint is replayed, which is harmless. A full crawl via seed() is
+    only needed once, to populate an empty system.
+    """
+
+    def __init__(
+        self,
+        client,
+        scheduler: FetchScheduler,
+        checkpoint_path: Optional[str] = None,
+        namespaces: Optional[str] = None,
+        priority: Priority = Priority.RECENT,
+        batch_limit: Any = 'max',
+    ):
+        self.client = client
+        self.scheduler = scheduler
+        self.cache_manager = scheduler.cache_manager
+        self.parse_cache = scheduler.parse_cache
+        self.checkpoint_path = Path(checkpoint_path or CRAWLER_CONFIG['checkpoint'])
+        self.namespaces = namespaces or CRAWLER_CONFIG['namespaces']
+        self.priority = priority
+        self.batch_limit = batch_limit
+        self.checkpoint = self.load_checkpoint()
+        self.stats = {
+            'polls': 0,
+            'changes_seen': 0,
+            'titles_enqueued': 0,
+        }
+
+    # -- checkpoint ------------------------------------------------------------
+
+    def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """Return the saved checkpoint, or None if the crawler has never been seeded."""
+        try:
+            with self.checkpoint_path.open() as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """Write the checkpoint atomically, so a crash never leaves a partial file."""
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_name(f"{self.checkpoint_path.name}.{os.getpid()}.tmp")
+        with tmp_path.open('w') as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+        self.checkpoint = checkpoint
+
+    # -- crawling --------------------------------------------------------------
+
+    def seed(self, categories: Optional[Iterable[str]] = None) -> int:
+        """
+        Full crawl: enqueue every member of the seed categories as backfill.
+
+        The checkpoint is placed at the time the seed started, so edits made
+        while it runs are picked up by the next poll.
+        """
+        started = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        count = 0
+        for category in categories or CRAWLER_CONFIG['seed_categories']:
+            for member in self.client.iter_category_members(category):
+                self.scheduler.submit('parse', member['title'], priority=Priority.BACKFILL)
+                count += 1
+        self.save_checkpoint({'start': started, 'continue': None, 'last_rcid': 0})
+        return count
+
+    def poll(self, max_batches: Optional[int] = None) -> int:
+        """Process every change since the checkpoint; returns the number of titles enqueued."""
+        if self.checkpoint is None:
+            raise RuntimeError("No checkpoint; run seed() first")
+        self.stats['polls'] += 1
+        enqueued = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            checkpoint = self.checkpoint
+            response = self.client.get_recent_changes(
+                start=checkpoint['start'],
+                continue_params=checkpoint.get('continue'),
+                rcnamespace=self.namespaces,
+                rclimit=self.batch_limit,
+            )
+            changes = response.get('query', {}).get('recentchanges', [])
+            # rcstart is inclusive; skip what the previous poll already handled
+            changes = [c for c in changes if c.get('rcid', 0) > checkpoint.get('last_rcid', 0)]
+            enqueued += self._process(changes)
+            batches += 1
+
+            last = changes[-1] if changes else None
+            self.save_checkpoint({
+                'start': last['timestamp'] if last else checkpoint['start'],
+                'continue': response.get('continue'),
+                'last_rcid': last['rcid'] if last else checkpoint.get('last_rcid', 0),
+            })
+            if 'continue' not in response:
+                break
+        return enqueued
+
+    def _process(self, changes: List[Dict[str, Any]]) -> int:
+        self.stats['changes_seen'] += len(changes)
+        titles = []
+        for change in changes:
+            titles.append(change['title'])
+            # Moves leave the old title behind; refresh both sides
+            target = change.get('logparams', {}).get('target_title')
+            if target:
+                titles.append(target)
+        titles = list(dict.fromkeys(titles))
+
+        for title in titles:
+            self.invalidate(title)
+        for title in titles:
+            self.scheduler.submit('parse', title, priority=self.priority, refresh=True)
+        self.stats['titles_enqueued'] += len(titles)
+        return len(titles)
+
+    def invalidate(self, title: str) -> None:
+        """Drop every cached entry derived from title."""
+        self.cache_manager.invalidate(self.scheduler.info_key(title))
+        self.parse_cache.invalidate(title)
+
+    def run(self, stop: threading.Event, poll_interval: Optional[float] = None) -> None:
+        """Poll until `stop` is set, seeding first if there is no checkpoint."""
+        if self.checkpoint is None:
+            self.seed()
+        interval = poll_interval if poll_interval is not None else CRAWLER_CONFIG['poll_interval']
+        while not stop.is_set():
+            self.poll()
+            stop.wait(interval)
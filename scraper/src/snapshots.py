@@ -0,0 +1,355 @@
+"""
+Precomputed summary snapshots and the HTTP endpoint that serves them.
+
+SnapshotBuilder materializes per-game and per-event summaries from a
+ResultsStore as static JSON files, rebuilding only those whose source
+tournaments changed, and records every change in a versioned manifest.
+SnapshotServer serves the files with strong ETags, gzip and a delta feed
+of what changed since a client's last version.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from aiohttp import web
+
+from .config import SNAPSHOT_CONFIG
+from .results_store import ResultsStore
+
+MANIFEST = 'manifest.json'
+
+def _encode(value: Any) -> bytes:
+    """Canonical JSON, so identical summaries always hash to the same ETag."""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open('wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def slugify(title: str) -> str:
+    """
+    File-safe name for a title, distinct for distinct titles.
+
+    Titles that are already safe are kept as they are. Others are
+    rewritten and given a '-' and a short hash of the title, so that
+    'ASL Season 17' and 'ASL/Season 17' do not share a file; safe names
+    never contain '-', so they cannot clash with a hashed one.
+    """
+    if re.fullmatch(r'[A-Za-z0-9._]+', title) and not title.startswith('.'):
+        return title
+    digest = hashlib.blake2b(title.encode('utf-8'), digest_size=4).hexdigest()
+    return f"{re.sub(r'[^A-Za-z0-9._]+', '_', title).strip('_.')}-{digest}"
+
+def event_name(title: str) -> str:
+    return f"events/{slugify(title)}"
+
+def game_name(game: str) -> str:
+    return f"games/{slugify(game)}"
+
+def load_manifest(directory: Path) -> Dict[str, Any]:
+    try:
+        with (directory / MANIFEST).open() as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'version': 0, 'snapshots': {}, 'sources': {}, 'games': {}, 'history': []}
+
+class SnapshotBuilder:
+    """
+    Build stage turning a ResultsStore into versioned summary snapshots.
+
+    The manifest remembers the revision of every tournament it was built
+    from. A build only recomputes the event snapshots of tournaments whose
+    revision changed (or that disappeared) and the game snapshots those
+    tournaments belong to; a snapshot whose bytes come out unchanged keeps
+    its ETag and version. Each build that changes anything bumps the
+    manifest version and appends (version, changed, removed) to the history
+    used by the delta feed.
+    """
+
+    def __init__(self, store: ResultsStore, directory: Optional[str] = None):
+        self.store = store
+        self.directory = Path(directory or SNAPSHOT_CONFIG['directory'])
+        self.manifest = load_manifest(self.directory)
+
+    def _changed_sources(self, games: Dict[str, str]) -> Tuple[Dict[str, Optional[int]], Set[str]]:
+        previous = self.manifest['sources']
+        current = {
+            title: self.store.revisions.get(self.store.tournaments.code(title))
+            for title in games
+        }
+        changed = {title for title, revid in current.items() if title not in previous or previous[title] != revid}
+        changed |= previous.keys() - current.keys()
+        return current, changed
+
+    def game_summary(self, game: str, titles: List[str]) -> Dict[str, Any]:
+        limit, min_matches = SNAPSHOT_CONFIG['top_players'], SNAPSHOT_CONFIG['min_matches']
+        events = [self.store.tournament_summary(title, placements=1) for title in titles]
+        events = sorted(filter(None, events), key=lambda e: e['last_match'] or 0, reverse=True)
+        return {
+            'game': game,
+            'matches': sum(event['matches'] for event in events),
+            'top_players': self.store.win_rates(game, min_matches=min_matches, limit=limit),
+            'in_form': self.store.form(game, min_matches=min_matches, limit=limit),
+            'upsets': self.store.upsets(game, limit=limit),
+            'events': [
+                {
+                    'title': event['title'],
+                    'champion': event['champion'],
+                    'last_match': event['last_match'],
+                    'snapshot': event_name(event['title']),
+                }
+                for event in events
+            ],
+        }
+
+    def build(self) -> List[str]:
+        """Rebuild the snapshots affected by upstream changes; return the names that changed."""
+        games = self.store.tournament_games()
+        sources, changed_titles = self._changed_sources(games)
+        if not changed_titles:
+            return []
+        previous_games = self.manifest['games']
+        affected_games = {games.get(t) or previous_games.get(t) for t in changed_titles} - {None}
+
+        outputs: Dict[str, Optional[Dict[str, Any]]] = {}
+        for title in changed_titles:
+            outputs[event_name(title)] = self.store.tournament_summary(title) if title in sources else None
+        for game in affected_games:
+            titles = [title for title, g in games.items() if g == game]
+            outputs[game_name(game)] = self.game_summary(game, titles) if titles else None
+
+        version = self.manifest['version'] + 1
+        snapshots = self.manifest['snapshots']
+        changed, removed = [], []
+        for name, summary in sorted(outputs.items()):
+            path = self.directory / f"{name}.json"
+            if summary is None:
+                if snapshots.pop(name, None) is not None:
+                    removed.append(name)
+                continue
+            body = _encode(summary)
+            etag = _etag(body)
+            if name in snapshots and snapshots[name]['etag'] == etag:
+                continue
+            _write_atomic(path, body)
+            _write_atomic(path.with_name(path.name + '.gz'), gzip.compress(body, mtime=0))
+            snapshots[name] = {'etag': etag, 'version': version}
+            changed.append(name)
+
+        self.manifest['sources'] = sources
+        self.manifest['games'] = games
+        if changed or removed:
+            self.manifest['version'] = version
+            history = self.manifest['history']
+            history.append([version, changed, removed])
+            del history[:-SNAPSHOT_CONFIG['history']]
+        # New files go in before the manifest lists them and old ones come out
+        # after it stops listing them, so a listed snapshot is always readable
+        _write_atomic(self.directory / MANIFEST, _encode(self.manifest))
+        for name in removed:
+            path = self.directory / f"{name}.json"
+            path.unlink(missing_ok=True)
+            path.with_name(path.name + '.gz').unlink(missing_ok=True)
+        return changed + removed
+
+def changes_since(manifest: Dict[str, Any], since: int) -> Dict[str, Any]:
+    """
+    Delta feed: snapshots changed or removed after version `since`.
+
+    If `since` is older than the retained history the client must resync;
+    'reset' is set and every current snapshot is listed as changed.
+    """
+    version = manifest['version']
+    history = manifest['history']
+    snapshots = manifest['snapshots']
+    reset = since < 0 or since > version or bool(history) and since < history[0][0] - 1
+    if reset or (since == 0 and not history):
+        names = set(snapshots)
+        removed: Set[str] = set()
+    else:
+        names, removed = set(), set()
+        for entry_version, changed, dropped in history:
+            if entry_version <= since:
+                continue
+            names.update(changed)
+            names.difference_update(dropped)
+            removed.update(dropped)
+            removed.difference_update(changed)
+    return {
+        'version': version,
+        'reset': reset,
+        'changed': {name: snapshots[name]['etag'] for name in sorted(names) if name in snapshots},
+        'removed': sorted(removed),
+    }
+
+class SnapshotServer:
+    """
+    Local HTTP endpoint for the snapshot directory.
+
+    GET /manifest                  current version and the ETag of every snapshot
+    GET /snapshots/<name>.json     one snapshot; 304 on a matching If-None-Match
+    GET /changes?since=<version>   delta feed, see changes_since()
+
+    The manifest is re-read whenever the builder (possibly another process)
+    replaces it. Responses are gzip-encoded for clients that accept it;
+    snapshots use the copy compressed at build time.
+    """
+
+    def __init__(self, directory: Optional[str] = None, host: Optional[str] = None, port: Optional[int] = None):
+        self.directory = Path(directory or SNAPSHOT_CONFIG['directory'])
+        self.host = host or SNAPSHOT_CONFIG['host']
+        self.port = SNAPSHOT_CONFIG['port'] if port is None else port
+        self.url: Optional[str] = None
+        self._manifest: Dict[str, Any] = load_manifest(self.directory)
+        self._manifest_mtime: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/manifest', self.handle_manifest)
+        app.router.add_get('/snapshots/{name:.+}.json', self.handle_snapshot)
+        app.router.add_get('/changes', self.handle_changes)
+        return app
+
+    def start(self) -> None:
+        """
+        Serve in a background thread; port 0 picks a free port.
+
+        Errors binding the port are raised here, in the calling thread.
+        """
+        started = threading.Event()
+        errors: List[BaseException] = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self._start_site())
+                self._loop = loop
+            except BaseException as e:
+                errors.append(e)
+                if self._runner is not None:
+                    loop.run_until_complete(self._runner.cleanup())
+                loop.close()
+                return
+            finally:
+                started.set()
+            loop.run_forever()
+
+        self._runner = None
+        self._thread = threading.Thread(target=run, name='snapshot-server', daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            self._thread.join()
+            raise errors[0]
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def run(self) -> None:
+        """Serve in the foreground until interrupted."""
+        web.run_app(self.create_app(), host=self.host, port=self.port, access_log=None)
+
+    async def _start_site(self) -> None:
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f'http://{self.host}:{port}'
+
+    # -- handlers --------------------------------------------------------------
+
+    def manifest(self) -> Dict[str, Any]:
+        try:
+            mtime = (self.directory / MANIFEST).stat().st_mtime_ns
+        except FileNotFoundError:
+            return self._manifest
+        if mtime != self._manifest_mtime:
+            self._manifest = load_manifest(self.directory)
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    @staticmethod
+    def _respond(
+        request: web.Request, etag: str, body: Optional[bytes] = None, gzipped: Optional[bytes] = None,
+    ) -> web.Response:
+        headers = {
+            'ETag': etag,
+            # Cache, but revalidate every time: a 304 costs a round trip and no body
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding',
+        }
+        if_none_match = request.headers.get('If-None-Match', '')
+        if if_none_match.strip() == '*' or etag in (tag.strip() for tag in if_none_match.split(',')):
+            return web.Response(status=304, headers=headers)
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            body = gzipped if gzipped is not None else gzip.compress(body, mtime=0)
+            headers['Content-Encoding'] = 'gzip'
+        return web.Response(body=body, content_type='application/json', headers=headers)
+
+    async def handle_manifest(self, request: web.Request) -> web.Response:
+        manifest = self.manifest()
+        body = _encode({
+            'version': manifest['version'],
+            'snapshots': {name: entry['etag'] for name, entry in manifest['snapshots'].items()},
+        })
+        return self._respond(request, f'"v{manifest["version"]}"', body)
+
+    async def handle_snapshot(self, request: web.Request) -> web.Response:
+        name = request.match_info['name']
+        # Only names listed in the manifest are served, which also rules out path traversal
+        entry = self.manifest()['snapshots'].get(name)
+        if entry is None:
+            raise web.HTTPNotFound()
+        path = self.directory / f"{name}.json"
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            try:
+                return self._respond(request, entry['etag'], gzipped=path.with_name(path.name + '.gz').read_bytes())
+            except FileNotFoundError:
+                # No copy compressed at build time; _respond compresses the JSON instead
+                pass
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            raise web.HTTPNotFound()
+        return self._respond(request, entry['etag'], data)
+
+    async def handle_changes(self, request: web.Request) -> web.Response:
+        try:
+            since = int(request.query.get('since', '0'))
+        except ValueError:
+            raise web.HTTPBadRequest(text='since must be an integer version')
+        manifest = self.manifest()
+        body = _encode(changes_since(manifest, since))
+        return self._respond(request, f'"v{manifest["version"]}-{since}"', body)
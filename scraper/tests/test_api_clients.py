@@ -1,5 +1,6 @@
 import pytest
 import os
+import time
 from unittest.mock import Mock, patch
 from src.clients import LiquipediaClient, LiquipediaDBClient
 from src.cache import CacheManager
@@ -16,6 +17,14 @@ def liquipedia_client():
     }):
         return LiquipediaClient()
 
+@pytest.fixture
+def anonymous_liquipedia_client():
+    with patch.dict(os.environ, {
+        'LIQUIPEDIA_USERNAME': '',
+        'LIQUIPEDIA_PASSWORD': ''
+    }):
+        return LiquipediaClient()
+
 @pytest.fixture
 def liquipediadb_client():
     with patch.dict(os.environ, {
@@ -33,6 +42,53 @@ def test_liquipediadb_client_initialization(liquipediadb_client):
     assert 'Apikey test_key' in liquipediadb_client.session.headers['Authorization']
     assert 'StarCraft-Tournament-Tracker' in liquipediadb_client.session.headers['User-Agent']
 
+def test_iter_category_members_follows_continue(anonymous_liquipedia_client):
+    responses = [
+        {'continue': {'cmcontinue': 'page|2', 'continue': '-||'},
+         'query': {'categorymembers': [{'title': 'A'}, {'title': 'B'}]}},
+        {'query': {'categorymembers': [{'title': 'C'}]}},
+    ]
+    with patch.object(anonymous_liquipedia_client, 'get', side_effect=responses) as mock_get:
+        members = anonymous_liquipedia_client.iter_category_members('Category:Tournaments')
+        assert next(members)['title'] == 'A'
+        # Continuation is lazy: nothing beyond the first batch has been fetched
+        assert mock_get.call_count == 1
+        assert [m['title'] for m in members] == ['B', 'C']
+
+    second_params = mock_get.call_args_list[1].kwargs['params']
+    assert second_params['cmcontinue'] == 'page|2'
+    assert second_params['cmtitle'] == 'Category:Tournaments'
+
+def test_get_pages_info_batches_titles(anonymous_liquipedia_client):
+    titles = [f'Page {i}' for i in range(120)]
+
+    def fake_get(endpoint, params):
+        batch = params['titles'].split('|')
+        pages = {str(-i - 1): {'title': t, 'missing': ''} if t == 'Page 7'
+                 else {'pageid': i, 'title': t} for i, t in enumerate(batch)}
+        return {'query': {'pages': pages}}
+
+    with patch.object(anonymous_liquipedia_client, 'get', side_effect=fake_get) as mock_get:
+        info = anonymous_liquipedia_client.get_pages_info(titles)
+
+    assert mock_get.call_count == 3
+    assert len(info) == 120
+    assert info['Page 42']['title'] == 'Page 42'
+    assert 'missing' in info['Page 7']
+
+def test_get_pages_info_resolves_normalized_titles(anonymous_liquipedia_client):
+    response = {
+        'query': {
+            'normalized': [{'from': 'gsl', 'to': 'Gsl'}],
+            'redirects': [{'from': 'Gsl', 'to': 'Global StarCraft II League'}],
+            'pages': {'10': {'pageid': 10, 'title': 'Global StarCraft II League'}},
+        }
+    }
+    with patch.object(anonymous_liquipedia_client, 'get', return_value=response):
+        info = anonymous_liquipedia_client.get_pages_info(['gsl'], redirects=1)
+
+    assert info['gsl']['pageid'] == 10
+
 @pytest.mark.integration
 def test_cache_manager_layers(cache_manager):
     # Test data
@@ -56,14 +112,22 @@ def test_cache_manager_layers(cache_manager):
     cache_manager.clear_all()
 
 @pytest.mark.integration
-def test_rate_limiting(liquipedia_client):
-    with patch('src.clients.liquipedia_client.time.sleep') as mock_sleep:
+def test_rate_limiting():
+    from benchmarks.server import StandInServer
+
+    real_sleep = time.sleep
+    with StandInServer(enforce_limits=False) as server, \
+            patch('src.clients.rate_limiter.time.sleep', side_effect=real_sleep) as mock_sleep, \
+            patch.dict(os.environ, {'LIQUIPEDIA_USERNAME': '', 'LIQUIPEDIA_PASSWORD': ''}):
+        client = LiquipediaClient(base_url=f'{server.url}/api.php')
+
         # Make multiple requests to trigger rate limiting
-        liquipedia_client.get_page_info('Starcraft:Main_Page')
-        liquipedia_client.get_page_info('Starcraft:Tournaments')
-        
+        client.get_page_info('Starcraft:Main_Page')
+        client.get_page_info('Starcraft:Tournaments')
+
         # Verify rate limiting was applied
         assert mock_sleep.called
+        assert server.stats['action:query'] == 2
 
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import time
+from unittest.mock import patch
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.clients import AsyncLiquipediaClient, AsyncLiquipediaDBClient, TokenBucket
+
+RESPONSE_DELAY = 0.05
+
+def make_app(calls):
+    """Minimal stand-in for api.php and the v3 LiquipediaDB endpoints."""
+    async def api_php(request):
+        calls.append((time.monotonic(), dict(request.query)))
+        await asyncio.sleep(RESPONSE_DELAY)
+        action = request.query.get('action')
+        if action == 'parse':
+            page = request.query['page']
+            return web.json_response({'parse': {'title': page, 'text': {'*': f'<p>{page}</p>'}}})
+        title = request.query.get('titles', '')
+        return web.json_response({'query': {'pages': {'1': {'pageid': 1, 'title': title}}}})
+
+    async def player(request):
+        calls.append((time.monotonic(), {'auth': request.headers.get('Authorization')}))
+        return web.json_response({'result': [{'id': request.match_info['player_id']}]})
+
+    app = web.Application()
+    app.router.add_get('/api.php/', api_php)
+    app.router.add_get('/api/v3/player/{player_id}', player)
+    return app
+
+async def run_with_server(coro_factory):
+    calls = []
+    server = TestServer(make_app(calls))
+    await server.start_server()
+    try:
+        result = await coro_factory(str(server.make_url('')).rstrip('/'))
+    finally:
+        await server.close()
+    return result, calls
+
+def test_token_bucket_spaces_calls():
+    bucket = TokenBucket(calls=1, period=0.05)
+
+    async def take(n):
+        start = time.monotonic()
+        await asyncio.gather(*(bucket.acquire_async() for _ in range(n)))
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(take(5))
+    assert 0.18 <= elapsed < 0.35
+
+def test_gather_pages_overlaps_requests_with_waiting():
+    titles = [f'Page_{i}' for i in range(6)]
+    interval = 0.1
+
+    async def scenario(base_url):
+        client = AsyncLiquipediaClient(
+            base_url=f'{base_url}/api.php',
+            limiter=TokenBucket(calls=1, period=interval),
+        )
+        async with client:
+            start = time.monotonic()
+            pages = await client.gather_pages(titles)
+            return pages, time.monotonic() - start
+
+    with patch.dict(os.environ, {'LIQUIPEDIA_USERNAME': '', 'LIQUIPEDIA_PASSWORD': ''}):
+        (pages, elapsed), calls = asyncio.run(run_with_server(scenario))
+
+    assert list(pages) == titles
+    assert pages['Page_3']['query']['pages']['1']['title'] == 'Page_3'
+    # Requests are released one interval apart; response time is hidden behind the wait
+    sent = [ts for ts, _ in calls]
+    gaps = [b - a for a, b in zip(sent, sent[1:])]
+    assert min(gaps) >= interval * 0.8
+    sequential = len(titles) * RESPONSE_DELAY + (len(titles) - 1) * interval
+    assert elapsed < sequential
+
+def test_gather_pages_uses_parse_budget():
+    async def scenario(base_url):
+        client = AsyncLiquipediaClient(
+            base_url=f'{base_url}/api.php',
+            limiter=TokenBucket(calls=10, period=1),
+            parse_limiter=TokenBucket(calls=10, period=1),
+        )
+        async with client:
+            return await client.gather_pages(['A', 'B'], parsed=True)
+
+    with patch.dict(os.environ, {'LIQUIPEDIA_USERNAME': '', 'LIQUIPEDIA_PASSWORD': ''}):
+        pages, calls = asyncio.run(run_with_server(scenario))
+
+    assert pages['B']['parse']['title'] == 'B'
+    assert all(query['action'] == 'parse' for _, query in calls)
+
+def test_async_liquipediadb_client_sends_api_key():
+    async def scenario(base_url):
+        client = AsyncLiquipediaDBClient(
+            base_url=f'{base_url}/api/v3',
+            limiter=TokenBucket(calls=10, period=1),
+        )
+        async with client:
+            return await client.get_player_info('Maru')
+
+    with patch.dict(os.environ, {'LIQUIPEDIADB_API_KEY': 'test_key'}):
+        result, calls = asyncio.run(run_with_server(scenario))
+
+    assert result['result'][0]['id'] == 'Maru'
+    assert calls[0][1]['auth'] == 'Apikey test_key'
@@ -0,0 +1,750 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+import fakeredis
+import redis
+import pytest
+from src.cache import CacheManager, FileCache, MemoryCache, RedisCache, RevisionParseCache, SQLiteCache
+from src.cache.cache_manager import cache_decorator
+from src.metrics import CACHE_ERRORS
+from src.clients import CircuitOpenError
+
+@pytest.fixture
+def cache_manager(tmp_path):
+    return CacheManager(redis_url=None, cache_dir=str(tmp_path / "cache"))
+
+class FakeParseClient:
+    def __init__(self, revisions):
+        self.revisions = revisions
+        self.parsed = []
+
+    def get_latest_revisions(self, titles):
+        return {title: self.revisions.get(title) for title in titles}
+
+    def get_parsed_page(self, title):
+        self.parsed.append(title)
+        return {'parse': {'title': title, 'revid': self.revisions[title]}}
+
+def test_revision_parse_cache_skips_unchanged_pages(cache_manager):
+    client = FakeParseClient({'ASL': 100, 'GSL': 200})
+    parse_cache = RevisionParseCache(client, cache_manager)
+
+    first = parse_cache.get_parsed_pages(['ASL', 'GSL', 'Missing'])
+    assert set(first) == {'ASL', 'GSL'}
+    assert client.parsed == ['ASL', 'GSL']
+
+    # Only GSL changed upstream
+    client.revisions['GSL'] = 201
+    second = parse_cache.get_parsed_pages(['ASL', 'GSL'])
+    assert client.parsed == ['ASL', 'GSL', 'GSL']
+    assert second['GSL']['parse']['revid'] == 201
+    assert parse_cache.stats == {
+        'revision_checks': 2,
+        'parse_calls': 3,
+        'parse_calls_avoided': 1,
+        'known_missing': 0,
+        'served_stale': 0,
+    }
+    # The superseded revision is dropped
+    assert cache_manager.get('parse:GSL@200', 'parse') is None
+
+def test_revision_parse_cache_accepts_generator(cache_manager):
+    client = FakeParseClient({'ASL': 100, 'GSL': 200})
+    parse_cache = RevisionParseCache(client, cache_manager)
+    results = parse_cache.get_parsed_pages(title for title in ['ASL', 'GSL', 'ASL'])
+    assert set(results) == {'ASL', 'GSL'}
+    assert client.parsed == ['ASL', 'GSL']
+
+def test_revision_parse_cache_files_parse_under_parsed_revision(cache_manager):
+    client = FakeParseClient({'ASL': 100})
+    parse_cache = RevisionParseCache(client, cache_manager)
+    # Edited between the revision query and the parse
+    client.get_latest_revisions = lambda titles: {'ASL': 99}
+    assert parse_cache.get_parsed_page('ASL')['parse']['revid'] == 100
+    assert cache_manager.get('parse:ASL@99', 'parse') is None
+    assert cache_manager.get('parse:ASL@100', 'parse')['parse']['revid'] == 100
+    assert parse_cache.get_latest_cached('ASL')['parse']['revid'] == 100
+
+def test_revision_parse_cache_skips_parse_errors(cache_manager):
+    client = FakeParseClient({'ASL': 100})
+    parse_cache = RevisionParseCache(client, cache_manager)
+    # Deleted between the revision query and the parse
+    client.get_parsed_page = lambda title: {'error': {'code': 'missingtitle'}}
+    assert parse_cache.get_parsed_pages(['ASL']) == {}
+    assert cache_manager.get('parse:ASL@100', 'parse') is None
+    assert parse_cache.known_missing(['ASL']) == {'ASL'}
+
+def test_revision_parse_cache_remembers_missing_titles(cache_manager):
+    client = FakeParseClient({'ASL': 100})
+    checked = []
+    latest = client.get_latest_revisions
+    client.get_latest_revisions = lambda titles: checked.append(list(titles)) or latest(titles)
+    parse_cache = RevisionParseCache(client, cache_manager)
+
+    parse_cache.get_parsed_pages(['ASL', 'Missing'])
+    parse_cache.get_parsed_pages(['ASL', 'Missing'])
+    assert checked == [['ASL', 'Missing'], ['ASL']]
+    assert parse_cache.stats['known_missing'] == 1
+    # Creating the page invalidates it like any other change
+    parse_cache.invalidate('Missing')
+    assert parse_cache.known_missing(['Missing']) == set()
+
+def test_revision_parse_cache_serves_stale_while_circuit_open(cache_manager):
+    client = FakeParseClient({'ASL': 100})
+    parse_cache = RevisionParseCache(client, cache_manager)
+    parse_cache.get_parsed_pages(['ASL'])
+
+    def unavailable(titles):
+        raise CircuitOpenError('liquipedia', 30)
+    client.get_latest_revisions = unavailable
+    assert parse_cache.get_parsed_pages(['ASL', 'GSL']) == {'ASL': {'parse': {'title': 'ASL', 'revid': 100}}}
+    assert parse_cache.stats['served_stale'] == 1
+
+def test_revision_parse_cache_refreshes_ttl(cache_manager):
+    client = FakeParseClient({'ASL': 100})
+    parse_cache = RevisionParseCache(client, cache_manager)
+    parse_cache.get_parsed_page('ASL')
+
+    entry = cache_manager.memory_cache.cache['parse:ASL@100']
+    entry.expires_at -= 1000
+    before = entry.expires_at
+    parse_cache.get_parsed_page('ASL')
+
+    assert cache_manager.memory_cache.cache['parse:ASL@100'].expires_at > before
+    assert client.parsed == ['ASL']
+
+def test_get_or_load_coalesces_threads(cache_manager):
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'name': 'ASL'}
+
+    results = []
+    def worker():
+        barrier.wait()
+        results.append(cache_manager.get_or_load('tournament:asl', loader, 'tournament'))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'name': 'ASL'}] * 8
+
+def test_get_or_load_shares_loader_errors(cache_manager):
+    def loader():
+        time.sleep(0.05)
+        raise RuntimeError('rate limited')
+
+    errors = []
+    def worker():
+        try:
+            cache_manager.get_or_load('tournament:gsl', loader, 'tournament')
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 4
+    assert cache_manager.get('tournament:gsl') is None
+
+def test_get_or_load_async_survives_leader_cancellation(cache_manager):
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {'name': 'ASL'}
+
+    async def scenario():
+        leader = asyncio.ensure_future(cache_manager.get_or_load_async('tournament:asl', loader, 'tournament'))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.ensure_future(cache_manager.get_or_load_async('tournament:asl', loader, 'tournament'))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(scenario()) == [{'name': 'ASL'}] * 3
+    assert calls == [1]
+
+def test_cache_decorator_coalesces_async_tasks(cache_manager):
+    calls = []
+
+    @cache_decorator(cache_manager, 'player')
+    async def fetch_player(name):
+        calls.append(name)
+        await asyncio.sleep(0.05)
+        return {'name': name}
+
+    async def scenario():
+        return await asyncio.gather(*(fetch_player('Maru') for _ in range(10)))
+
+    results = asyncio.run(scenario())
+    assert calls == ['Maru']
+    assert results == [{'name': 'Maru'}] * 10
+
+def test_cache_decorator_keys_are_canonical(cache_manager):
+    calls = []
+
+    @cache_decorator(cache_manager, 'h2h')
+    def head_to_head(a, b, games=frozenset(), best_of=3):
+        calls.append((a, b))
+        return {'a': a, 'b': b}
+
+    head_to_head('Maru', 'Serral', {'sc2', 'bw'})
+    head_to_head(b='Serral', a='Maru', games={'bw', 'sc2'}, best_of=3)
+    assert calls == [('Maru', 'Serral')]
+    assert head_to_head.cache_key('Maru', 'Serral', {'bw', 'sc2'}) == head_to_head.cache_key(
+        'Maru', b='Serral', games=frozenset({'sc2', 'bw'}),
+    )
+    # Unserializable arguments skip the cache instead of failing
+    head_to_head(object(), 'Serral')
+    head_to_head(object(), 'Serral')
+    assert len(calls) == 3
+
+def test_cache_decorator_keys_are_stable_across_processes(tmp_path):
+    script = (
+        "import sys; from src.cache import CacheManager; from src.cache.cache_manager import cache_decorator\n"
+        "@cache_decorator(CacheManager(redis_url=None, cache_dir=sys.argv[1]), 'player')\n"
+        "def player(name, games=None):\n"
+        "    return name in {'Maru', 'Serral', 'Flash'}\n"
+        "print(player.cache_key('Maru', games={'sc2', 'bw'}))"
+    )
+    keys = []
+    for seed in ('1', '2'):
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        result = subprocess.run(
+            [sys.executable, '-c', script, str(tmp_path)], env=env,
+            capture_output=True, text=True, check=True,
+        )
+        keys.append(result.stdout.strip())
+    assert keys[0] == keys[1] and keys[0].startswith('player:player:')
+
+def test_cache_decorator_versions_keys(cache_manager):
+    def make(schema, bonus):
+        @cache_decorator(cache_manager, 'elo', schema=schema)
+        def elo(name):
+            return 1000 + bonus
+        return elo
+
+    # Same code and schema share entries; a new schema or a changed body does not
+    assert make(1, 0).cache_key('Maru') == make(1, 0).cache_key('Maru')
+    assert make(1, 0).cache_key('Maru') != make(2, 0).cache_key('Maru')
+
+    def elo_v2(name):
+        return 2000
+    def elo_v1(name):
+        return 1000
+    assert cache_decorator(cache_manager, 'elo')(elo_v1).cache_key('Maru').split(':')[2] != \
+        cache_decorator(cache_manager, 'elo')(elo_v2).cache_key('Maru').split(':')[2]
+
+def test_cache_decorator_caches_none_and_ttl(cache_manager):
+    calls = []
+
+    @cache_decorator(cache_manager, 'page', data_type='tournament', none_ttl=60)
+    def missing_page(title):
+        calls.append(title)
+        return None
+
+    assert missing_page('Nonexistent') is None
+    assert missing_page('Nonexistent') is None
+    assert calls == ['Nonexistent']
+    _, expires_at = cache_manager.memory_cache.get_entry(missing_page.cache_key('Nonexistent'))
+    assert expires_at - time.time() <= 60 + cache_manager.stale_ttls['tournament']
+
+    @cache_decorator(cache_manager, 'rank', data_type='tournament')
+    def rank(name):
+        return 1
+
+    rank('Maru', cache_ttl=5)
+    _, expires_at = cache_manager.memory_cache.get_entry(rank.cache_key('Maru'))
+    assert expires_at - time.time() <= 5 + cache_manager.stale_ttls['tournament']
+
+    @cache_decorator(cache_manager, 'rank', none_ttl=0)
+    async def no_rank(name):
+        calls.append(name)
+
+    async def scenario():
+        return [await no_rank('Flash'), await no_rank('Flash')]
+
+    assert asyncio.run(scenario()) == [None, None]
+    assert calls == ['Nonexistent', 'Flash', 'Flash']
+
+def test_distributed_lock_coalesces_across_managers(tmp_path):
+    server = fakeredis.FakeServer()
+    managers = []
+    for i in range(2):
+        manager = CacheManager(cache_dir=str(tmp_path / f"worker{i}"), distributed_lock=True)
+        manager.redis_cache = RedisCache()
+        manager.redis_cache.redis = fakeredis.FakeRedis(server=server)
+        managers.append(manager)
+
+    calls = []
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'name': 'IEM Katowice'}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda m=m: results.append(m.get_or_load('tournament:iem', loader, 'tournament')))
+        for m in managers
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'name': 'IEM Katowice'}] * 2
+
+def make_stale(cache_manager, key, data_type):
+    """Move a cached entry past its TTL but inside the stale grace period."""
+    entry = cache_manager.memory_cache.cache[key]
+    entry.expires_at = time.time() + cache_manager.stale_ttls[data_type] - 1
+
+def test_get_misses_after_ttl_unless_stale_allowed(cache_manager):
+    cache_manager.set('tournament:asl', {'name': 'ASL'}, 'tournament', ttl=1)
+    time.sleep(1.2)
+    assert cache_manager.get('tournament:asl', 'tournament') is None
+    assert cache_manager.get('tournament:asl', 'tournament', allow_stale=True) == {'name': 'ASL'}
+    assert cache_manager.get_many(['tournament:asl'], 'tournament') == {}
+    assert cache_manager.get_many(['tournament:asl'], 'tournament', allow_stale=True) == {'tournament:asl': {'name': 'ASL'}}
+
+def test_stale_value_served_while_refreshing(cache_manager):
+    cache_manager.set('tournament:asl', {'round': 1}, 'tournament')
+    make_stale(cache_manager, 'tournament:asl', 'tournament')
+
+    release = threading.Event()
+    calls = []
+    def loader():
+        calls.append(1)
+        release.wait(1)
+        return {'round': 2}
+
+    # Both readers get the stale value immediately; only one refresh is queued
+    assert cache_manager.get_or_load('tournament:asl', loader, 'tournament') == {'round': 1}
+    assert cache_manager.get_or_load('tournament:asl', loader, 'tournament') == {'round': 1}
+    release.set()
+    cache_manager.close()
+
+    assert len(calls) == 1
+    assert cache_manager.get('tournament:asl', 'tournament') == {'round': 2}
+
+def test_refresh_queue_is_bounded(tmp_path):
+    cache_manager = CacheManager(cache_dir=str(tmp_path), max_pending_refreshes=2)
+    release = threading.Event()
+    for i in range(5):
+        cache_manager.set(f'player:{i}', {'id': i}, 'player')
+        make_stale(cache_manager, f'player:{i}', 'player')
+
+    scheduled = [
+        cache_manager._schedule_refresh(f'player:{i}', lambda: release.wait(1) and {'id': 'new'}, 'player')
+        for i in range(5)
+    ]
+    release.set()
+    cache_manager.close()
+    assert scheduled == [True, True, False, False, False]
+
+def test_stale_value_refreshes_async(cache_manager):
+    cache_manager.set('player:maru', {'elo': 1}, 'player')
+    make_stale(cache_manager, 'player:maru', 'player')
+
+    async def loader():
+        return {'elo': 2}
+
+    async def scenario():
+        first = await cache_manager.get_or_load_async('player:maru', loader, 'player')
+        await asyncio.sleep(0.01)
+        return first, cache_manager.get('player:maru', 'player')
+
+    assert asyncio.run(scenario()) == ({'elo': 1}, {'elo': 2})
+
+def test_file_cache_keys_are_stable_across_processes(tmp_path):
+    script = (
+        "import sys; from src.cache import FileCache; "
+        "cache = FileCache(sys.argv[1]); "
+        "print(cache.get('tournament:asl') or cache.set('tournament:asl', 'ASL 17'))"
+    )
+    outputs = []
+    for seed in ('1', '2'):
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        result = subprocess.run(
+            [sys.executable, '-c', script, str(tmp_path)],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        outputs.append(result.stdout.strip())
+    assert outputs == ['None', 'ASL 17']
+
+def test_file_cache_shards_entries(tmp_path):
+    cache = FileCache(str(tmp_path))
+    cache.set('player:maru', {'race': 'Terran'})
+    path = cache._get_cache_path('player:maru')
+    assert path.exists()
+    assert path.parent.parent.parent == tmp_path
+
+def test_file_cache_cleanup_uses_expiry_index(tmp_path):
+    cache = FileCache(str(tmp_path))
+    cache.set('expired', 1, ttl=-2 * FileCache.EXPIRY_BUCKET_SECONDS)
+    cache.set('rewritten', 2, ttl=-2 * FileCache.EXPIRY_BUCKET_SECONDS)
+    cache.set('rewritten', 3, ttl=3600)
+    cache.set('live', 4, ttl=3600)
+
+    cache.cleanup_expired()
+
+    assert not cache._get_cache_path('expired').exists()
+    assert cache.get('rewritten') == 3
+    assert cache.get('live') == 4
+    # The past bucket has been consumed
+    assert len(list(cache.index_dir.glob('*.idx'))) == 1
+
+def test_file_cache_clear(tmp_path):
+    cache = FileCache(str(tmp_path / 'cache'))
+    for i in range(10):
+        cache.set(f'key:{i}', i)
+    cache.clear()
+    assert cache.get('key:3') is None
+    cache.set('key:3', 'again')
+    assert cache.get('key:3') == 'again'
+    assert [p.name for p in tmp_path.iterdir()] == ['cache']
+
+def test_file_cache_clear_when_directory_cannot_move(tmp_path, monkeypatch):
+    cache = FileCache(str(tmp_path / 'cache'))
+    for i in range(10):
+        cache.set(f'key:{i}', i)
+    (tmp_path / 'cache' / 'keep.txt').write_text('not ours')
+    inode = os.stat(cache.cache_dir).st_ino
+
+    # As across devices, or for shards busy on some filesystems
+    def no_rename(self, target):
+        raise OSError(18, 'Invalid cross-device link')
+    monkeypatch.setattr(type(cache.cache_dir), 'rename', no_rename)
+    cache.clear()
+    assert cache.get('key:3') is None
+    assert os.stat(cache.cache_dir).st_ino == inode
+    assert sorted(p.name for p in cache.cache_dir.iterdir()) == ['_expiry', 'keep.txt']
+
+    # Entries that cannot be removed are counted, not raised
+    monkeypatch.setattr('src.cache.file_cache._remove_tree', lambda path: no_rename(path, None))
+    cache.set('key:3', 'again')
+    errors = CACHE_ERRORS.value(('file', 'clear'))
+    cache.clear()
+    assert CACHE_ERRORS.value(('file', 'clear')) == errors + 1
+
+def test_file_cache_set_replaces_files_atomically(tmp_path, monkeypatch):
+    cache = FileCache(str(tmp_path))
+    cache.set('key', 'old')
+
+    write_bytes = Path.write_bytes
+    # The disk fills up halfway through the write
+    def torn(path, data):
+        write_bytes(path, data[:3])
+        raise OSError(28, 'No space left on device')
+    monkeypatch.setattr(Path, 'write_bytes', torn)
+    cache.set('key', 'new')
+    monkeypatch.undo()
+    assert cache.get('key') == 'old'
+    assert [p.name for p in cache._get_cache_path('key').parent.iterdir()] == [cache._get_cache_path('key').name]
+
+def _sqlite_writer(cache_dir, worker):
+    cache = SQLiteCache(cache_dir)
+    cache.set_many({f'w{worker}:{i}': {'i': i} for i in range(200)}, ttl=60)
+
+def test_sqlite_cache_roundtrip(tmp_path):
+    cache = SQLiteCache(str(tmp_path))
+    cache.set('tournament:asl', {'name': 'ASL'}, ttl=60)
+    cache.set('expired', 1, ttl=-1)
+    cache.set_many({'a': 1, 'b': [2]}, ttl=60)
+
+    assert cache.get('tournament:asl') == {'name': 'ASL'}
+    assert cache.get('expired') is None
+    assert cache.get_many(['a', 'b', 'expired', 'missing']) == {'a': 1, 'b': [2]}
+    assert cache.touch('a', 120)
+    assert not cache.touch('expired', 120)
+
+    cache.cleanup_expired()
+    count = cache._connect().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+    assert count == 3
+
+    cache.delete('a')
+    assert cache.get('a') is None
+    cache.clear()
+    assert cache.get('b') is None
+
+def test_sqlite_cache_concurrent_processes(tmp_path):
+    import multiprocessing
+    ctx = multiprocessing.get_context('spawn')
+    workers = [ctx.Process(target=_sqlite_writer, args=(str(tmp_path), w)) for w in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    cache = SQLiteCache(str(tmp_path))
+    keys = [f'w{w}:{i}' for w in range(3) for i in range(200)]
+    assert len(cache.get_many(keys)) == 600
+
+def test_cache_manager_sqlite_backend(tmp_path):
+    cache_manager = CacheManager(cache_dir=str(tmp_path), file_backend='sqlite')
+    assert isinstance(cache_manager.file_cache, SQLiteCache)
+    cache_manager.set('player:maru', {'race': 'Terran'}, 'player')
+    cache_manager.memory_cache.clear()
+    assert cache_manager.get('player:maru', 'player') == {'race': 'Terran'}
+
+    with pytest.raises(ValueError):
+        CacheManager(cache_dir=str(tmp_path), file_backend='lmdb')
+
+class CountingRedis(fakeredis.FakeRedis):
+    """FakeRedis that counts network round trips (commands and pipeline executions)."""
+    round_trips = 0
+
+    def execute_command(self, *args, **options):
+        CountingRedis.round_trips += 1
+        return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipe = super().pipeline(transaction, shard_hint)
+        execute = pipe.execute
+        def counted_execute(*args, **kwargs):
+            CountingRedis.round_trips += 1
+            return execute(*args, **kwargs)
+        pipe.execute = counted_execute
+        return pipe
+
+def test_get_many_resolves_layer_by_layer(tmp_path):
+    cache_manager = CacheManager(cache_dir=str(tmp_path))
+    cache_manager.redis_cache = RedisCache()
+    cache_manager.redis_cache.redis = CountingRedis()
+    cache_manager.memory_cache.max_size = 1000
+
+    keys = [f'player:{i}' for i in range(500)]
+    # Written as CacheManager would, so the entries are fresh for 'player'
+    ttl = cache_manager._hard_ttl('player')
+    cache_manager.memory_cache.set_many({k: i for i, k in enumerate(keys[:100])}, ttl)
+    cache_manager.redis_cache.set_many({k: i for i, k in enumerate(keys[100:300], 100)}, ttl)
+    cache_manager.file_cache.set_many({k: i for i, k in enumerate(keys[300:], 300)}, ttl)
+
+    CountingRedis.round_trips = 0
+    results = cache_manager.get_many(keys + ['player:missing'], 'player')
+    assert results == {k: i for i, k in enumerate(keys)}
+    # One pipelined read plus one pipelined backfill of the file hits
+    assert CountingRedis.round_trips == 2
+
+    # Everything is now in memory
+    CountingRedis.round_trips = 0
+    assert cache_manager.get_many(keys, 'player') == results
+    assert CountingRedis.round_trips == 0
+    assert cache_manager.redis_cache.get('player:450') == 450
+
+def test_warmup_sets_in_bulk(tmp_path):
+    cache_manager = CacheManager(cache_dir=str(tmp_path))
+    cache_manager.redis_cache = RedisCache()
+    cache_manager.redis_cache.redis = CountingRedis()
+
+    CountingRedis.round_trips = 0
+    cache_manager.warmup({f'static:{i}': {'i': i} for i in range(300)})
+    assert CountingRedis.round_trips == 1
+    assert cache_manager.file_cache.get('static:299') == {'i': 299}
+
+def test_redis_cache_uses_connection_pool():
+    cache = RedisCache('redis://localhost:6379/3', max_connections=7, socket_timeout=1.5, pool_timeout=2)
+    pool = cache.redis.connection_pool
+    # Waits for a free connection instead of raising 'Too many connections'
+    assert isinstance(pool, redis.BlockingConnectionPool)
+    assert pool.timeout == 2
+    assert pool.max_connections == 7
+    assert pool.connection_kwargs['socket_timeout'] == 1.5
+    assert pool.connection_kwargs['db'] == 3
+
+def test_memory_cache_overwrite_does_not_evict():
+    cache = MemoryCache(max_size=2)
+    cache.set('a', 1, 60)
+    cache.set('b', 2, 60)
+    cache.set('a', 3, 60)
+    assert cache.get('b') == 2
+    assert cache.get('a') == 3
+    assert cache.get_stats()['evictions'] == 0
+
+def test_memory_cache_byte_budget():
+    cache = MemoryCache(max_size=1000, max_bytes=42_000)
+    for i in range(20):
+        cache.set(f'player:{i}', {'id': i}, 60)
+    cache.set('parse:big', 'x' * 40_000, 60)
+    assert cache.current_bytes <= 42_000
+    assert cache.get('parse:big') is not None
+    # Oldest small records made room, newest survive
+    assert cache.get('player:0') is None
+    assert cache.get('player:19') == {'id': 19}
+    # Values bigger than the whole budget are not cached
+    cache.set('parse:huge', 'x' * 60_000, 60)
+    assert cache.get('parse:huge') is None
+
+def test_memory_cache_expires_from_heap():
+    cache = MemoryCache(max_size=100)
+    cache.set('short', 1, 0.05)
+    cache.set('long', 2, 60)
+    cache.set('touched', 3, 0.05)
+    assert cache.touch('touched', 60)
+    time.sleep(0.1)
+    cache.cleanup()
+    assert 'short' not in cache.cache
+    assert set(cache.cache) == {'long', 'touched'}
+    stats = cache.get_stats()
+    assert stats['expirations'] == 1
+    assert stats['entries'] == 2
+
+def test_memory_cache_thread_safety():
+    cache = MemoryCache(max_size=500, max_bytes=200_000)
+
+    def worker(n):
+        for i in range(2000):
+            cache.set(f'{n}:{i % 700}', [i] * 10, 60)
+            cache.get(f'{(n + 1) % 4}:{i % 700}')
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(cache.cache) <= 500
+    assert cache.current_bytes == sum(entry.size for entry in cache.cache.values())
+
+def shared_manager(server, cache_dir, namespace='esports-tldr', file_backend=None):
+    """A CacheManager as one process would build it, on a shared Redis and cache directory."""
+    manager = CacheManager(cache_dir=str(cache_dir), file_backend=file_backend)
+    manager.redis_cache = RedisCache(namespace=namespace)
+    manager.redis_cache.redis = fakeredis.FakeRedis(server=server)
+    return manager
+
+@pytest.mark.parametrize('file_backend', ['json', 'sqlite'])
+def test_invalidate_tag_drops_tagged_keys_from_every_layer(tmp_path, file_backend):
+    server = fakeredis.FakeServer()
+    first = shared_manager(server, tmp_path, file_backend=file_backend)
+    second = shared_manager(server, tmp_path, file_backend=file_backend)
+    first.set('parse:ASL@1', {'revid': 1}, 'parse', tags=['page:ASL'])
+    first.set_many({'player:Maru': 1, 'player:Serral': 2}, 'player', tags=['page:ASL', 'game:sc2'])
+    second.get_or_load('summary:ASL', lambda: {'winner': 'Maru'}, 'static', tags=['page:ASL'])
+    first.set('parse:GSL@1', {'revid': 1}, 'parse', tags=['page:GSL'])
+
+    # Keys tagged by the other manager are found through Redis
+    assert first.invalidate_tag('page:ASL') == 4
+    for key in ('parse:ASL@1', 'player:Maru', 'summary:ASL'):
+        assert first.memory_cache.get(key) is None
+        assert first.redis_cache.get(key) is None
+        assert first.file_cache.get(key) is None
+    assert first.get('parse:GSL@1', 'parse') == {'revid': 1}
+    assert first.invalidate_tag('page:ASL') == 0
+
+def test_tags_survive_restart_without_redis(tmp_path):
+    CacheManager(cache_dir=str(tmp_path)).set('player:Maru', 1, 'player', tags=['team:ONSYDE'])
+    restarted = CacheManager(cache_dir=str(tmp_path))
+    assert restarted.get('player:Maru', 'player') == 1
+    assert restarted.invalidate_tag('team:ONSYDE') == 1
+    assert restarted.get('player:Maru', 'player') is None
+
+def test_clear_all_only_clears_its_namespace(tmp_path):
+    server = fakeredis.FakeServer()
+    ours = shared_manager(server, tmp_path / 'ours')
+    theirs = shared_manager(server, tmp_path / 'theirs', namespace='other-app')
+    ours.set('player:Maru', 1, 'player', tags=['game:sc2'])
+    theirs.set('player:Maru', 2, 'player')
+    shared = fakeredis.FakeRedis(server=server)
+    shared.set('ratelimit:liquipedia:general', 'x')
+
+    ours.clear_all()
+    assert ours.get('player:Maru', 'player') is None
+    assert theirs.redis_cache.get('player:Maru') == 2
+    assert shared.get('ratelimit:liquipedia:general') == b'x'
+    assert not [key for key in shared.scan_iter() if key.startswith(b'esports-tldr:')]
+
+def test_revision_parse_cache_invalidates_by_page_tag(cache_manager):
+    client = FakeParseClient({'ASL': 100})
+    parse_cache = RevisionParseCache(client, cache_manager)
+    parse_cache.get_parsed_page('ASL')
+    cache_manager.set('summary:ASL', {'winner': 'Maru'}, tags=[parse_cache.page_tag('ASL')])
+    parse_cache.invalidate('ASL')
+    assert parse_cache.get_latest_cached('ASL') is None
+    assert cache_manager.get('summary:ASL') is None
+
+@pytest.mark.parametrize('file_backend', ['json', 'sqlite'])
+def test_snapshot_roundtrip_keeps_remaining_ttls(tmp_path, file_backend):
+    source = CacheManager(cache_dir=str(tmp_path / 'source'), file_backend=file_backend)
+    source.set_many({f'player:{i}': {'id': i} for i in range(50)}, 'player', tags=['game:sc2'])
+    # No stale grace for 'missing', so the stored expiry is exactly 60s out
+    source.set('missing:short', 'soon', 'missing', ttl=60)
+    source.file_cache.set('static:expired', 'gone', ttl=-1)
+    # Memory-only entries are exported as well
+    source.memory_cache.set('static:memory', [1, 2], 120)
+    path = tmp_path / 'warm.snap'
+    assert source.export_snapshot(str(path)) == 52
+
+    replica = CacheManager(cache_dir=str(tmp_path / 'replica'), file_backend=file_backend)
+    assert replica.load_snapshot(str(path)) == 52
+    assert replica.get('player:7', 'player') == {'id': 7}
+    assert replica.get_many(['player:8', 'static:memory', 'static:expired']) == {
+        'player:8': {'id': 8}, 'static:memory': [1, 2],
+    }
+    assert replica.get('missing:short', 'missing') == 'soon'
+    _, expires_at = replica.memory_cache.get_entry('missing:short')
+    assert 55 < expires_at - time.time() <= 60
+    # Hits are promoted to memory only
+    assert replica.file_cache.get('player:7') is None
+
+def test_snapshot_decodes_values_on_first_access(tmp_path, monkeypatch):
+    source = CacheManager(cache_dir=str(tmp_path / 'source'))
+    source.set_many({f'static:{i}': {'i': i} for i in range(100)})
+    source.export_snapshot(str(tmp_path / 'warm.snap'))
+
+    from src.cache import cache_snapshot
+    decoded = []
+    real_decode = cache_snapshot.decode
+    monkeypatch.setattr(cache_snapshot, 'decode', lambda data: decoded.append(len(data)) or real_decode(data))
+    replica = CacheManager(cache_dir=str(tmp_path / 'replica'))
+    replica.load_snapshot(str(tmp_path / 'warm.snap'))
+    # Only the index was decoded
+    assert len(decoded) == 1
+    assert replica.get('static:3') == {'i': 3}
+    assert replica.get('static:3') == {'i': 3}
+    assert len(decoded) == 2
+
+def test_snapshot_honours_writes_and_invalidation(tmp_path):
+    source = CacheManager(cache_dir=str(tmp_path / 'source'))
+    source.set('player:Maru', 1, 'player', tags=['team:ONSYDE'])
+    source.set('player:Serral', 2, 'player', tags=['team:BASILISK'])
+    source.set('player:Clem', 3, 'player')
+    source.export_snapshot(str(tmp_path / 'warm.snap'))
+
+    replica = CacheManager(cache_dir=str(tmp_path / 'replica'))
+    replica.load_snapshot(str(tmp_path / 'warm.snap'))
+    assert replica.invalidate_tag('team:ONSYDE') == 1
+    assert replica.get('player:Maru', 'player') is None
+    replica.invalidate('player:Clem')
+    assert replica.get('player:Clem', 'player') is None
+    replica.set('player:Serral', 20, 'player')
+    replica.memory_cache.clear()
+    assert replica.get('player:Serral', 'player') == 20
+
+    # Re-exporting carries the snapshot's remaining entries and tags forward
+    replica.export_snapshot(str(tmp_path / 'again.snap'))
+    third = CacheManager(cache_dir=str(tmp_path / 'third'))
+    assert third.load_snapshot(str(tmp_path / 'again.snap')) == 1
+    assert third.invalidate_tag('team:BASILISK') == 1
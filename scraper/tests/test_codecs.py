@@ -0,0 +1,52 @@
+import json
+import fakeredis
+import pytest
+from src.cache import Codec, CodecError, FileCache, RedisCache
+from src.cache.codecs import decode
+
+PAGE = {'parse': {'title': 'ASL Season 17', 'text': {'*': '<div class="brkts-match">Maru 3-1 Soulkey</div>' * 200}}}
+
+@pytest.mark.parametrize('format', ['json', 'orjson', 'msgpack'])
+@pytest.mark.parametrize('compression', ['none', 'zlib', 'zstd'])
+def test_codec_roundtrip(format, compression):
+    codec = Codec(format=format, compression=compression, threshold=256)
+    encoded = codec.encode(PAGE)
+    assert decode(encoded) == PAGE
+    if compression != 'none':
+        assert len(encoded) < len(json.dumps(PAGE)) / 10
+
+def test_small_values_are_not_compressed():
+    codec = Codec(format='json', compression='zlib', threshold=1024)
+    encoded = codec.encode({'id': 1})
+    assert encoded[3] == 0
+    assert encoded.endswith(b'{"id":1}')
+
+def test_json_values_decode_like_json():
+    value = {'big': 2**70, 'nan': float('nan'), 'inf': float('inf')}
+    decoded = decode(Codec('json', 'zlib').encode(value))
+    assert decoded['big'] == 2**70 and isinstance(decoded['big'], int)
+    assert decoded['nan'] != decoded['nan']
+    assert decoded['inf'] == float('inf')
+
+def test_legacy_json_is_readable():
+    assert decode('{"name": "ASL"}') == {'name': 'ASL'}
+    assert decode(b'[1, 2]') == [1, 2]
+
+def test_corrupt_value_raises_codec_error():
+    with pytest.raises(CodecError):
+        decode(b'\x00C\x01\x01not-zlib')
+
+def test_redis_reads_mixed_formats():
+    cache = RedisCache()
+    cache.redis = fakeredis.FakeRedis()
+    cache.redis.set('legacy', json.dumps({'v': 1}))
+    cache.set('packed', PAGE, 60, codec=Codec('msgpack', 'zstd', threshold=64))
+    assert cache.get('legacy') == {'v': 1}
+    assert cache.get('packed') == PAGE
+
+def test_file_cache_uses_codec(tmp_path):
+    cache = FileCache(str(tmp_path))
+    cache.set('page', PAGE, 60, codec=Codec('orjson', 'zstd', threshold=64))
+    raw = cache._get_cache_path('page').read_bytes()
+    assert raw.startswith(b'\x00C')
+    assert cache.get('page') == PAGE
@@ -0,0 +1,113 @@
+import io
+import fakeredis
+import pytest
+import data_processor
+from benchmarks.fixtures import make_parse_payload, make_tournament_html
+from data_processor import Match, PagePipeline, Participant, Placement, PrizePool, extract_page, iter_records
+from src.cache import CacheManager, RedisCache, RevisionParseCache
+
+MATCH_HTML = (
+    '<div class="brkts-round-header"><div class="brkts-header">Grand Final</div></div>'
+    '<div class="brkts-match">'
+    '<div class="brkts-opponent-entry" aria-label="Maru"><div class="brkts-opponent-score-inner brkts-opponent-win">4</div></div>'
+    '<div class="brkts-opponent-entry" aria-label="Serral"><div class="brkts-opponent-score-inner">W</div></div>'
+    '<div class="brkts-match-info-popup"><span class="timer-object" data-timestamp="1700000000"></span>'
+    '<div class="block-player"><span class="name">Decoy</span></div>'
+    '<div class="brkts-popup-comment">Best of 7</div></div>'
+    '</div>'
+)
+
+def test_extracts_every_record_type():
+    page = extract_page(make_parse_payload('ASL Season 17', matches=40))
+    assert page.title == 'ASL Season 17'
+    assert len(page.matches) == 40
+    assert len(page.participants) == 64
+    assert len(page.placements) == 16
+    assert isinstance(page.prize_pool, PrizePool) and page.prize_pool.currency == 'USD'
+
+    first = page.placements[0]
+    assert first.place == '1st'
+    assert first.prize == page.prize_pool.amount * 0.3
+    assert all(p.race in ('Terran', 'Zerg', 'Protoss') for p in page.participants)
+    for match in page.matches:
+        assert match.winner in (match.player1, match.player2)
+        assert max(match.score1, match.score2) == match.best_of // 2 + 1
+
+def test_match_fields():
+    (match,) = list(iter_records(MATCH_HTML))
+    assert match == Match('Grand Final', 'Maru', 'Serral', 4, None, 'Maru', 7, 1700000000)
+
+def test_results_do_not_depend_on_chunk_boundaries():
+    html = make_tournament_html(matches=20)
+    whole = list(iter_records(html, chunk_size=len(html)))
+    assert list(iter_records(html, chunk_size=7)) == whole
+    # Any iterable of text chunks works, e.g. a file in text mode
+    assert list(iter_records(io.StringIO(html))) == whole
+
+def test_records_are_yielded_while_streaming():
+    html = make_tournament_html(matches=20)
+    chunks = iter([html[:len(html) // 2], html[len(html) // 2:]])
+    records = iter_records(chunks)
+    next(records)
+    # The first record arrives before the second half is read
+    assert next(chunks, None) is not None
+
+def test_records_are_compact():
+    for record in (Participant('Maru', 'Terran'), Placement('1st', 'Maru', 1.0)):
+        assert not hasattr(record, '__dict__')
+
+def test_unrelated_markup_is_ignored():
+    assert list(iter_records('<div class="mw-parser-output"><p>No results yet<br></p></div></span>')) == []
+
+@pytest.fixture
+def cached_pages(tmp_path):
+    parse_cache = RevisionParseCache(None, CacheManager(cache_dir=str(tmp_path)))
+    for i in range(6):
+        payload = make_parse_payload(f'Tournament {i}', matches=5 + i, seed=i)
+        parse_cache.store(f'Tournament {i}', payload['parse']['revid'], payload)
+    return str(tmp_path)
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_pipeline_yields_results_in_order(cached_pages, workers):
+    titles = [f'Tournament {i}' for i in reversed(range(6))] + ['Not Cached']
+    with PagePipeline(cache_dir=cached_pages, workers=workers, window=3) as pipeline:
+        results = list(pipeline.process_titles(titles))
+    assert [title for title, _ in results] == titles
+    assert [len(records.matches) for _, records in results[:-1]] == [10, 9, 8, 7, 6, 5]
+    assert results[-1][1] is None
+
+def test_pipeline_reads_by_key(cached_pages):
+    with PagePipeline(cache_dir=cached_pages, workers=0) as pipeline:
+        ((key, records),) = pipeline.process_keys(['parse:Tournament 2@500002'])
+    assert records.title == 'Tournament 2' and records.revid == 500002
+
+def test_pipeline_reads_namespaced_redis(tmp_path, monkeypatch):
+    server = fakeredis.FakeServer()
+
+    def fake_redis_cache(redis_url=None, namespace=None):
+        cache = RedisCache(namespace=namespace)
+        cache.redis = fakeredis.FakeRedis(server=server)
+        return cache
+
+    manager = CacheManager(cache_dir=str(tmp_path / 'writer'))
+    manager.redis_cache = fake_redis_cache(namespace=manager.namespace)
+    payload = make_parse_payload('Tournament 1', matches=4, seed=1)
+    RevisionParseCache(None, manager).store('Tournament 1', payload['parse']['revid'], payload)
+
+    monkeypatch.setattr(data_processor, 'RedisCache', fake_redis_cache)
+    # An empty file layer: the page can only come from Redis
+    with PagePipeline(cache_dir=str(tmp_path / 'reader'), redis_url='redis://stand-in', workers=0) as pipeline:
+        ((_, records),) = pipeline.process_titles(['Tournament 1'])
+    assert records is not None and len(records.matches) == 4
+
+def test_pipeline_bounds_pages_in_flight(cached_pages):
+    consumed = []
+
+    def titles():
+        for i in range(6):
+            consumed.append(i)
+            yield f'Tournament {i}'
+
+    with PagePipeline(cache_dir=cached_pages, workers=0, window=2) as pipeline:
+        for yielded, _ in enumerate(pipeline.process_titles(titles()), start=1):
+            assert len(consumed) - yielded <= 2
@@ -0,0 +1,112 @@
+import json
+import threading
+from unittest.mock import MagicMock
+import pytest
+from src import metrics
+from src.cache import CacheManager
+from src.clients import BaseClient, TokenBucket
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.REGISTRY.reset()
+    metrics.enable()
+    yield
+    metrics.REGISTRY.reset()
+    metrics.enable()
+
+def test_counter_and_histogram():
+    registry = metrics.Registry()
+    requests = registry.counter('requests_total', 'Requests', ('status',))
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1))
+    requests.inc(('200',))
+    requests.inc(('200',), 2)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+    assert requests.value(('200',)) == 3
+    assert latency.count() == 3
+    assert latency.sum() == pytest.approx(5.55)
+
+def test_prometheus_and_json_export():
+    registry = metrics.Registry()
+    registry.counter('requests_total', 'Requests', ('status',)).inc(('200',))
+    registry.histogram('latency_seconds', 'Latency', ('endpoint',), buckets=(0.1, 1)).observe(0.5, ('parse',))
+    text = registry.to_prometheus()
+    assert '# TYPE requests_total counter' in text
+    assert 'requests_total{status="200"} 1' in text
+    assert 'latency_seconds_bucket{endpoint="parse",le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{endpoint="parse",le="+Inf"} 1' in text
+    assert 'latency_seconds_count{endpoint="parse"} 1' in text
+
+    snapshot = json.loads(json.dumps(registry.snapshot()))
+    assert snapshot['requests_total']['values'] == [{'labels': {'status': '200'}, 'value': 1}]
+    assert snapshot['latency_seconds']['values'][0]['counts'] == [0, 1, 0]
+
+def test_disabled_metrics_record_nothing():
+    metrics.disable()
+    metrics.CACHE_LOOKUPS.inc(('memory', 'static', 'hit'))
+    metrics.HTTP_LATENCY.observe(1.0, ('BaseClient', 'query'))
+    assert metrics.CACHE_LOOKUPS.value(('memory', 'static', 'hit')) == 0
+    assert metrics.HTTP_LATENCY.count(('BaseClient', 'query')) == 0
+
+def test_endpoint_label():
+    assert metrics.endpoint_label('', {'action': 'parse', 'page': 'ASL'}) == 'parse'
+    assert metrics.endpoint_label('', {'action': 'query', 'list': 'categorymembers'}) == 'query:categorymembers'
+    assert metrics.endpoint_label('/player/Maru') == 'player'
+    assert metrics.endpoint_label('/search/players', {'query': 'Maru'}) == 'search/players'
+
+def test_cache_manager_records_layer_hits(tmp_path):
+    manager = CacheManager(cache_dir=str(tmp_path))
+    manager.set('player:maru', {'name': 'Maru'}, 'player')
+    manager.get('player:maru', 'player')
+    manager.memory_cache.clear()
+    manager.get('player:maru', 'player')
+    manager.get('player:unknown', 'player')
+
+    lookups = metrics.CACHE_LOOKUPS
+    assert lookups.value(('memory', 'player', 'hit')) == 1
+    assert lookups.value(('memory', 'player', 'miss')) == 2
+    assert lookups.value(('file', 'player', 'hit')) == 1
+    assert lookups.value(('file', 'player', 'miss')) == 1
+    assert metrics.CACHE_LATENCY.count(('file', 'get')) == 2
+
+def test_cache_manager_skips_timing_when_disabled(tmp_path, monkeypatch):
+    manager = CacheManager(cache_dir=str(tmp_path))
+    metrics.disable()
+    from src.cache import cache_manager
+    clock = MagicMock(return_value=0.0)
+    monkeypatch.setattr(cache_manager.time, 'perf_counter', clock)
+    manager.set('player:maru', {'name': 'Maru'}, 'player')
+    manager.memory_cache.clear()
+    manager.get('player:maru', 'player')
+    manager.get_many(['player:serral'], 'player')
+    assert clock.call_count == 0
+
+def test_client_records_latency_and_status():
+    client = BaseClient(base_url='https://liquipedia.net/api.php', user_agent='test', limiter=TokenBucket(10, 1))
+    response = MagicMock(status_code=200)
+    client.session.request = MagicMock(return_value=response)
+    client._make_request('GET', '', params={'action': 'parse', 'page': 'ASL'})
+    assert metrics.HTTP_REQUESTS.value(('BaseClient', 'parse', '200')) == 1
+    assert metrics.HTTP_LATENCY.count(('BaseClient', 'parse')) == 1
+
+def test_token_bucket_records_wait():
+    bucket = TokenBucket(calls=1, period=0.05, name='test:bucket')
+    bucket.acquire()
+    bucket.acquire()
+    assert metrics.LIMITER_WAIT.count(('test:bucket',)) == 2
+    assert metrics.LIMITER_WAIT.sum(('test:bucket',)) > 0.03
+
+def test_concurrent_increments_are_not_lost():
+    counter = metrics.Registry().counter('events_total', 'Events')
+
+    def work():
+        for _ in range(10000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.value() == 40000
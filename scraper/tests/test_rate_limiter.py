@@ -0,0 +1,157 @@
+import time
+from email.utils import formatdate
+from unittest.mock import MagicMock, patch
+import fakeredis
+import pytest
+import redis
+import requests
+from src.clients import (
+    BaseClient, CircuitBreaker, CircuitOpenError, RedisTokenBucket, TokenBucket, get_limiter, parse_retry_after,
+)
+from src.clients import rate_limiter
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+def shared_bucket(server, calls=2, period=1.0):
+    """A bucket as another process would see it: own client, same Redis and key."""
+    return RedisTokenBucket(fakeredis.FakeRedis(server=server), 'ratelimit:test:general', calls, period)
+
+def test_redis_buckets_share_one_budget(server):
+    first, second = shared_bucket(server), shared_bucket(server)
+    assert first._reserve() == 0
+    assert second._reserve() == 0
+    # Budget of 2/s is spent across both "processes"; the next slot is 0.5s out
+    assert first._reserve() == pytest.approx(0.5, abs=0.05)
+    assert second._reserve() == pytest.approx(1.0, abs=0.05)
+
+def test_penalty_applies_to_every_process(server):
+    first, second = shared_bucket(server), shared_bucket(server)
+    first.penalize(5)
+    assert second._reserve() == pytest.approx(5, abs=0.05)
+
+def test_local_penalty_delays_next_caller():
+    bucket = TokenBucket(calls=10, period=1)
+    bucket.penalize(2)
+    assert bucket._reserve() == pytest.approx(2, abs=0.01)
+    assert bucket._reserve() == pytest.approx(2.1, abs=0.01)
+
+def test_redis_outage_falls_back_to_local_bucket():
+    client = redis.Redis(host='127.0.0.1', port=1, socket_connect_timeout=0.1)
+    bucket = RedisTokenBucket(client, 'ratelimit:test:general', calls=1, period=1)
+    assert bucket._reserve() == 0
+    assert bucket._reserve() == pytest.approx(1, abs=0.05)
+
+def test_get_limiter_uses_configured_backend(server):
+    with patch.dict(rate_limiter.RATE_LIMITER_CONFIG, {'backend': 'redis'}), \
+            patch.object(rate_limiter, '_limiters', {}), \
+            patch.object(rate_limiter, '_redis_client', fakeredis.FakeRedis(server=server)):
+        limiter = get_limiter('liquipedia', 'parse')
+        assert isinstance(limiter, RedisTokenBucket)
+        assert limiter.key == 'ratelimit:liquipedia:parse'
+        assert get_limiter('liquipedia', 'parse') is limiter
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(formatdate(time.time() + 60, usegmt=True)) == pytest.approx(60, abs=2)
+
+def test_client_honours_retry_after():
+    limiter = TokenBucket(calls=100, period=1)
+    client = BaseClient(base_url='https://liquipedia.net/api.php', user_agent='test', limiter=limiter)
+    throttled = MagicMock(status_code=429, headers={'Retry-After': '7'})
+    ok = MagicMock(status_code=200, headers={})
+    client.session.request = MagicMock(side_effect=[throttled, ok])
+
+    with patch('src.clients.rate_limiter.time.sleep') as mock_sleep:
+        assert client._make_request('GET', '', params={'action': 'query'}) is ok
+
+    assert client.session.request.call_count == 2
+    mock_sleep.assert_called_once()
+    assert mock_sleep.call_args.args[0] == pytest.approx(7, abs=0.05)
+
+def test_adaptive_rate_backs_off_and_recovers():
+    bucket = TokenBucket(calls=10, period=1, adaptive=True)
+    bucket.throttled()
+    assert bucket.rate == 5
+    # 429s from the same burst only cut once
+    bucket.throttled()
+    assert bucket.rate == 5
+    for _ in range(50):
+        bucket.record_response(0.1)
+    assert bucket.rate == bucket.max_rate == 10
+
+    for _ in range(20):
+        bucket._last_decrease = float('-inf')
+        bucket.record_response(10)
+    assert bucket.rate == pytest.approx(bucket.min_rate)
+
+def test_rate_change_keeps_reserved_slots():
+    bucket = TokenBucket(calls=10, period=1, adaptive=True)
+    for _ in range(30):
+        bucket._reserve()
+    before = bucket.ready_in()
+    bucket.throttled()
+    # Slots already handed out stay put; only the next one is an interval further out
+    assert bucket.ready_in() == pytest.approx(before + 0.1, abs=0.02)
+    assert bucket._reserve() - bucket._reserve() == pytest.approx(-0.2, abs=0.01)
+
+def test_circuit_breaker_opens_and_half_opens():
+    breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    breaker.before_call()
+    # Only one trial call at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_in() == pytest.approx(0.1, abs=0.02)
+
+    time.sleep(0.11)
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+def test_client_circuit_opens_on_server_errors():
+    breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=60)
+    client = BaseClient(
+        base_url='https://liquipedia.net/api.php', user_agent='test',
+        limiter=TokenBucket(calls=100, period=1), breaker=breaker,
+    )
+    unavailable = MagicMock(status_code=503, headers={})
+    unavailable.raise_for_status.side_effect = requests.HTTPError('503')
+    client.session.request = MagicMock(return_value=unavailable)
+
+    with patch('src.clients.base_client.time.sleep'):
+        with pytest.raises(requests.HTTPError):
+            client._make_request('GET', '', params={'action': 'query'})
+        # Retries stop as soon as the circuit opens
+        assert client.session.request.call_count == 2
+        with pytest.raises(CircuitOpenError):
+            client._make_request('GET', '', params={'action': 'query'})
+    assert client.session.request.call_count == 2
+
+def test_client_remembers_missing_resources():
+    client = BaseClient(
+        base_url='https://api.liquipedia.net/api/v3', user_agent='test',
+        limiter=TokenBucket(calls=100, period=1), breaker=CircuitBreaker('test'),
+    )
+    not_found = MagicMock(status_code=404, headers={})
+    not_found.raise_for_status.side_effect = requests.HTTPError('404')
+    client.session.request = MagicMock(return_value=not_found)
+
+    for _ in range(3):
+        with pytest.raises(requests.HTTPError):
+            client._make_request('GET', '/player/missing')
+    assert client.session.request.call_count == 1
+    # A 404 is a healthy answer
+    assert client.breaker.failures == 0
@@ -0,0 +1,81 @@
+import pytest
+from data_processor import Match, PageRecords, Placement, extract_page
+from benchmarks.fixtures import make_parse_payload
+from src.results_store import ResultsStore
+
+def page(title, revid, matches, placements=()):
+    records = PageRecords(title, revid)
+    for record in (*matches, *placements):
+        records.add(record)
+    return records
+
+def match(first, second, winner, timestamp):
+    scores = (2, 0) if winner == first else (0, 2)
+    return Match('Round 1', first, second, *scores, winner, 3, timestamp)
+
+@pytest.fixture
+def store():
+    store = ResultsStore()
+    store.add_page(page('GSL 2024', 1, [
+        match('Maru', 'Serral', 'Maru', 100),
+        match('Maru', 'Clem', 'Clem', 200),
+        match('Serral', 'Maru', 'Maru', 300),
+        match('Clem', 'Serral', 'Serral', 400),
+        Match('Final', 'Maru', 'Clem', None, None, None, 5, None),
+    ], [Placement('1st', 'Maru', 50000.0), Placement('3rd-4th', 'Clem', None)]), 'starcraft2')
+    store.add_page(page('BLAST Major', 7, [match('s1mple', 'ZywOo', 'ZywOo', 150)]), 'counterstrike')
+    return store
+
+def test_win_rates(store):
+    ranking = store.win_rates(game='starcraft2')
+    assert [(r['player'], r['wins'], r['matches']) for r in ranking] == [
+        ('Maru', 2, 3), ('Clem', 1, 2), ('Serral', 1, 3),
+    ]
+    assert store.win_rates(game='starcraft2', since=250, limit=1)[0]['player'] in ('Maru', 'Serral')
+    assert store.win_rates(game='dota2') == []
+    assert len(store.win_rates()) == 5
+
+def test_head_to_head(store):
+    assert store.head_to_head('Maru', 'Serral') == {'matches': 2, 'Maru': 2, 'Serral': 0}
+    assert store.head_to_head('Serral', 'Maru') == {'matches': 2, 'Serral': 0, 'Maru': 2}
+    assert store.head_to_head('Maru', 'Nobody')['matches'] == 0
+
+def test_form_uses_most_recent_matches(store):
+    # Serral's last two: beat Clem at 400, lost to Maru at 300
+    form = {r['player']: r for r in store.form(game='starcraft2', last=2)}
+    assert (form['Serral']['wins'], form['Serral']['matches']) == (1, 2)
+    assert (form['Maru']['wins'], form['Maru']['matches']) == (1, 2)
+    assert store.form(game='starcraft2', last=1, limit=1)[0]['player'] in ('Maru', 'Serral')
+
+def test_reingesting_a_tournament_replaces_its_rows(store):
+    updated = page('GSL 2024', 2, [match('Serral', 'Maru', 'Serral', 500)])
+    assert store.add_page(updated, 'starcraft2') == 1
+    assert store.add_page(updated, 'starcraft2') == 0
+    assert store.head_to_head('Maru', 'Serral') == {'matches': 1, 'Maru': 0, 'Serral': 1}
+    assert store.placements['alive'].sum() == 0
+
+def test_save_and_load_round_trip(store, tmp_path):
+    path = str(tmp_path / 'results.npz')
+    store.save(path)
+    loaded = ResultsStore.load(path)
+    assert loaded.win_rates() == store.win_rates()
+    assert loaded.revisions == store.revisions
+    # Loaded stores keep accepting appends
+    loaded.add_page(page('IEM Katowice', 3, [match('Clem', 'Maru', 'Clem', 600)]), 'starcraft2')
+    assert loaded.head_to_head('Clem', 'Maru')['Clem'] == 2
+
+def test_ingests_extracted_pages():
+    store = ResultsStore()
+    extracted = extract_page(make_parse_payload('ASL Season 17', matches=50))
+    assert store.add_page(extracted, 'starcraft2') == 50 + 16
+    assert sum(r['matches'] for r in store.win_rates()) == 100
+
+def test_upsets(store):
+    # Maru 2/3, Clem 1/2, Serral 1/3: Clem beating Maru and Serral beating Clem are upsets
+    upsets = store.upsets(game='starcraft2')
+    assert {(u['winner'], u['loser']) for u in upsets} == {('Clem', 'Maru'), ('Serral', 'Clem')}
+    assert all(u['loser_rate'] > u['winner_rate'] for u in upsets)
+    assert len(store.upsets(game='starcraft2', limit=1)) == 1
+    assert store.upsets(game='starcraft2', since=300) == [
+        u for u in upsets if u['timestamp'] >= 300
+    ]
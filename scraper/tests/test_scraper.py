@@ -0,0 +1,241 @@
+import threading
+import time
+import pytest
+from src.cache import CacheManager
+from src.clients import CircuitOpenError, TokenBucket
+from src.scraper import FetchScheduler, Priority
+
+class FakeClient:
+    """Records the requests a scheduler makes; every page is at revision 1 unless changed."""
+
+    MAX_TITLES_PER_QUERY = 50
+
+    def __init__(self, calls_per_second: float = 1000):
+        self.limiter = TokenBucket(1, 1 / calls_per_second)
+        self.parse_limiter = TokenBucket(1, 1 / calls_per_second)
+        self.revisions = {}
+        self.info_batches = []
+        self.parsed = []
+        self.lock = threading.Lock()
+
+    def get_pages_info(self, titles, **params):
+        self.limiter.acquire()
+        with self.lock:
+            self.info_batches.append(list(titles))
+        return {
+            title: {'title': title, 'missing': ''} if title.startswith('Missing')
+            else {'title': title, 'revisions': [{'revid': self.revisions.get(title, 1)}]}
+            for title in titles
+        }
+
+    def get_parsed_page(self, title):
+        self.parse_limiter.acquire()
+        with self.lock:
+            self.parsed.append(title)
+        return {'parse': {'title': title, 'revid': self.revisions.get(title, 1)}}
+
+@pytest.fixture
+def cache_manager(tmp_path):
+    return CacheManager(cache_dir=str(tmp_path))
+
+def run(scheduler):
+    scheduler.start()
+    try:
+        assert scheduler.join(timeout=10)
+    finally:
+        scheduler.stop()
+
+def test_info_jobs_are_batched_and_cached(cache_manager):
+    client = FakeClient()
+    scheduler = FetchScheduler(client, cache_manager)
+    futures = [scheduler.submit('info', f'Tournament {i}') for i in range(120)]
+    run(scheduler)
+
+    assert [len(batch) for batch in client.info_batches] == [50, 50, 20]
+    assert futures[7].result()['title'] == 'Tournament 7'
+
+    # Answered from the cache without another request
+    again = scheduler.submit('info', 'Tournament 7')
+    assert again.done() and again.result()['title'] == 'Tournament 7'
+    assert len(client.info_batches) == 3
+
+def test_pending_jobs_are_deduplicated(cache_manager):
+    client = FakeClient()
+    scheduler = FetchScheduler(client, cache_manager)
+    first = scheduler.submit('parse', 'ASL Season 17')
+    second = scheduler.submit('parse', 'ASL Season 17', priority=Priority.LIVE)
+    assert first is second
+    run(scheduler)
+    assert client.parsed == ['ASL Season 17']
+    assert scheduler.stats['deduplicated'] == 1
+
+def test_higher_priority_jobs_go_first(cache_manager):
+    client = FakeClient()
+    scheduler = FetchScheduler(client, cache_manager, batch_size=1)
+    scheduler.submit('info', 'Old Tournament', priority=Priority.BACKFILL)
+    scheduler.submit('info', 'Last Week', priority=Priority.RECENT)
+    scheduler.submit('info', 'Live Event', priority=Priority.LIVE)
+    run(scheduler)
+    assert client.info_batches == [['Live Event'], ['Last Week'], ['Old Tournament']]
+
+def test_waiting_jobs_are_promoted(cache_manager):
+    client = FakeClient()
+    scheduler = FetchScheduler(client, cache_manager, batch_size=1)
+    scheduler.promote_after = {Priority.RECENT: 60, Priority.BACKFILL: 0.05}
+    scheduler.submit('info', 'Old Tournament', priority=Priority.BACKFILL)
+    time.sleep(0.1)
+    scheduler.submit('info', 'Last Week', priority=Priority.RECENT)
+    run(scheduler)
+    assert client.info_batches[0] == ['Old Tournament']
+    assert scheduler.stats['promoted'] >= 1
+
+def test_jobs_near_their_deadline_are_live(cache_manager):
+    client = FakeClient()
+    scheduler = FetchScheduler(client, cache_manager, batch_size=1)
+    scheduler.submit('info', 'Live Event', priority=Priority.LIVE)
+    scheduler.submit('info', 'Due Soon', priority=Priority.BACKFILL, deadline=time.monotonic() + 5)
+    scheduler.submit('info', 'Last Week', priority=Priority.RECENT)
+    run(scheduler)
+    assert client.info_batches == [['Live Event'], ['Due Soon'], ['Last Week']]
+
+def test_parse_jobs_only_spend_parse_tokens_on_changed_pages(cache_manager):
+    client = FakeClient()
+    scheduler = FetchScheduler(client, cache_manager)
+    for title in ('GSL 2023', 'ASL Season 17', 'Missing Page'):
+        scheduler.submit('parse', title)
+    run(scheduler)
+    assert sorted(client.parsed) == ['ASL Season 17', 'GSL 2023']
+
+    # A revision change forces a re-parse; refresh=True skips the cached answer
+    client.revisions['GSL 2023'] = 2
+    changed = scheduler.submit('parse', 'GSL 2023', refresh=True)
+    unchanged = scheduler.submit('parse', 'ASL Season 17', refresh=True)
+    missing = scheduler.submit('parse', 'Missing Page', refresh=True)
+    run(scheduler)
+    assert changed.result()['parse']['revid'] == 2
+    assert unchanged.result()['parse']['title'] == 'ASL Season 17'
+    assert missing.result() is None
+    assert sorted(client.parsed) == ['ASL Season 17', 'GSL 2023', 'GSL 2023']
+
+def test_parse_is_stored_under_the_parsed_revision(cache_manager):
+    client = FakeClient()
+    client.revisions['GSL 2023'] = 2
+    # Edited between the revision check and the parse
+    get_pages_info = client.get_pages_info
+    client.get_pages_info = lambda titles, **params: {
+        title: {'title': title, 'revisions': [{'revid': 1}]} for title in get_pages_info(titles, **params)
+    }
+    scheduler = FetchScheduler(client, cache_manager)
+    future = scheduler.submit('parse', 'GSL 2023')
+    run(scheduler)
+    assert future.result()['parse']['revid'] == 2
+    assert scheduler.parse_cache.get_cached('GSL 2023', 1) is None
+    assert scheduler.parse_cache.get_latest_cached('GSL 2023')['parse']['revid'] == 2
+
+def test_budgets_are_used_concurrently(cache_manager):
+    # Parse tokens come every 50ms; general tokens every 10ms
+    client = FakeClient(calls_per_second=100)
+    client.parse_limiter = TokenBucket(1, 0.05)
+    scheduler = FetchScheduler(client, cache_manager, batch_size=1)
+    for i in range(4):
+        scheduler.submit('parse', f'Tournament {i}')
+    for i in range(10):
+        scheduler.submit('info', f'Player {i}')
+    start = time.monotonic()
+    run(scheduler)
+    # Serially this would take 4 * 50ms + 14 * 10ms; both lanes overlap instead
+    assert time.monotonic() - start < 0.3
+    assert len(client.parsed) == 4
+
+def test_failures_are_reported_on_the_future(cache_manager):
+    client = FakeClient()
+    client.get_pages_info = lambda titles, **params: (_ for _ in ()).throw(RuntimeError('boom'))
+    scheduler = FetchScheduler(client, cache_manager)
+    future = scheduler.submit('info', 'Anything')
+    run(scheduler)
+    with pytest.raises(RuntimeError):
+        future.result()
+    assert scheduler.stats['failed'] == 1
+
+def test_missing_titles_are_remembered(cache_manager):
+    client = FakeClient()
+    scheduler = FetchScheduler(client, cache_manager)
+    future = scheduler.submit('parse', 'Missing page')
+    run(scheduler)
+    assert future.result() is None
+
+    again = scheduler.submit('info', 'Missing page')
+    assert again.done() and again.result() is None
+    assert client.info_batches == [['Missing page']]
+
+def test_cached_results_are_served_while_circuit_open(cache_manager):
+    client = FakeClient()
+    scheduler = FetchScheduler(client, cache_manager)
+    cached = scheduler.submit('info', 'ASL')
+    run(scheduler)
+
+    def unavailable(titles, **params):
+        raise CircuitOpenError('liquipedia', 30)
+    client.get_pages_info = unavailable
+    refreshed = scheduler.submit('info', 'ASL', refresh=True)
+    uncached = scheduler.submit('info', 'GSL')
+    run(scheduler)
+    assert refreshed.result() == cached.result()
+    with pytest.raises(CircuitOpenError):
+        uncached.result()
+    assert scheduler.stats['served_stale'] == 1
+
+@pytest.fixture
+def stand_in():
+    from benchmarks.server import StandInServer
+    with StandInServer(enforce_limits=False, category_size=30, matches=5) as server:
+        yield server
+
+def stand_in_client(server):
+    from benchmarks.bench_clients import unthrottled_client
+    return unthrottled_client(f'{server.url}/api.php')
+
+def make_crawler(server, cache_manager, checkpoint, **kwargs):
+    from src.scraper import IncrementalCrawler
+    client = stand_in_client(server)
+    scheduler = FetchScheduler(client, cache_manager)
+    return IncrementalCrawler(client, scheduler, checkpoint_path=str(checkpoint), **kwargs)
+
+def test_seed_enqueues_category_and_sets_checkpoint(stand_in, cache_manager, tmp_path):
+    crawler = make_crawler(stand_in, cache_manager, tmp_path / 'checkpoint.json')
+    assert crawler.seed(['Category:Tournaments']) == 30
+    assert crawler.scheduler.pending() == 30
+    assert crawler.load_checkpoint()['continue'] is None
+
+def test_poll_invalidates_and_enqueues_changed_titles(stand_in, cache_manager, tmp_path):
+    crawler = make_crawler(stand_in, cache_manager, tmp_path / 'checkpoint.json')
+    crawler.save_checkpoint({'start': '2024-01-01T00:00:00Z', 'continue': None, 'last_rcid': 0})
+    scheduler = crawler.scheduler
+    scheduler.submit('parse', 'Tournament 1')
+    run(scheduler)
+    cached = scheduler.submit('parse', 'Tournament 1')
+    assert cached.done()
+
+    stand_in.edit('Tournament 1', timestamp='2024-02-01T00:00:00Z')
+    assert crawler.poll() == 1
+    # The stale parse is gone and a fresh one is on its way
+    assert crawler.parse_cache.get_latest_cached('Tournament 1') is None
+    run(scheduler)
+    assert scheduler.submit('parse', 'Tournament 1').result()['parse']['revid'] == stand_in.revisions['Tournament 1']
+
+    # Nothing new: nothing enqueued, even though rcstart is inclusive
+    assert crawler.poll() == 0
+
+def test_crawler_resumes_from_checkpoint(stand_in, cache_manager, tmp_path):
+    checkpoint = tmp_path / 'checkpoint.json'
+    for i in range(5):
+        stand_in.edit(f'Tournament {i}', timestamp=f'2024-02-0{i + 1}T00:00:00Z')
+    first = make_crawler(stand_in, cache_manager, checkpoint, batch_limit=2)
+    first.save_checkpoint({'start': '2024-01-01T00:00:00Z', 'continue': None, 'last_rcid': 0})
+    assert first.poll(max_batches=1) == 2
+    assert first.load_checkpoint()['continue'] is not None
+
+    # A new process picks up the rest without repeating the first batch
+    second = make_crawler(stand_in, cache_manager, checkpoint, batch_limit=2)
+    assert second.poll() == 3
+    assert sorted(second.scheduler._pending) == [('parse', f'Tournament {i}') for i in range(2, 5)]
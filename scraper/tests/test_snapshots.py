@@ -0,0 +1,120 @@
+import gzip
+import json
+import pytest
+import requests
+from data_processor import Match, PageRecords, Placement
+from src.results_store import ResultsStore
+from src.snapshots import SnapshotBuilder, SnapshotServer, changes_since, event_name
+
+GSL, ASL, BLAST = event_name('GSL 2024'), event_name('ASL Season 17'), event_name('BLAST Major')
+
+def page(title, revid, winner='Maru'):
+    records = PageRecords(title, revid)
+    loser = 'Serral' if winner == 'Maru' else 'Maru'
+    for record in (
+        Match('Final', 'Maru', 'Serral', 4, 2, winner, 7, 1700000000 + revid),
+        Placement('1st', winner, 50000.0),
+        Placement('2nd', loser, 25000.0),
+    ):
+        records.add(record)
+    return records
+
+@pytest.fixture
+def store():
+    store = ResultsStore()
+    store.add_page(page('GSL 2024', 1), 'starcraft2')
+    store.add_page(page('ASL Season 17', 1), 'starcraft2')
+    store.add_page(page('BLAST Major', 1, winner='Serral'), 'counterstrike')
+    return store
+
+def test_build_writes_snapshots_and_skips_unchanged_data(store, tmp_path):
+    builder = SnapshotBuilder(store, str(tmp_path))
+    assert builder.build() == [
+        ASL, BLAST, GSL, 'games/counterstrike', 'games/starcraft2',
+    ]
+    event = json.loads((tmp_path / f'{GSL}.json').read_text())
+    assert event['champion'] == 'Maru' and event['prize_total'] == 75000
+    assert gzip.decompress((tmp_path / f'{GSL}.json.gz').read_bytes()) == \
+        (tmp_path / f'{GSL}.json').read_bytes()
+    game = json.loads((tmp_path / 'games' / 'starcraft2.json').read_text())
+    assert [e['title'] for e in game['events']] == ['GSL 2024', 'ASL Season 17']
+
+    # Nothing changed upstream: nothing is rebuilt and the version stays put
+    assert SnapshotBuilder(store, str(tmp_path)).build() == []
+    assert builder.manifest['version'] == 1
+
+def test_titles_with_the_same_slug_get_separate_snapshots(store, tmp_path):
+    store.add_page(page('ASL/Season 17', 1, winner='Serral'), 'starcraft2')
+    builder = SnapshotBuilder(store, str(tmp_path))
+    builder.build()
+    assert event_name('ASL/Season 17') != ASL
+    assert json.loads((tmp_path / f"{event_name('ASL/Season 17')}.json").read_text())['champion'] == 'Serral'
+    assert json.loads((tmp_path / f'{ASL}.json').read_text())['champion'] == 'Maru'
+    assert event_name('GSL_2024') == 'events/GSL_2024'
+
+def test_only_affected_snapshots_are_rebuilt(store, tmp_path):
+    builder = SnapshotBuilder(store, str(tmp_path))
+    builder.build()
+    untouched = builder.manifest['snapshots']['games/counterstrike']
+
+    store.add_page(page('GSL 2024', 2, winner='Serral'), 'starcraft2')
+    assert builder.build() == [GSL, 'games/starcraft2']
+    assert builder.manifest['version'] == 2
+    assert builder.manifest['snapshots']['games/counterstrike'] == untouched
+
+def test_changes_since(store, tmp_path):
+    builder = SnapshotBuilder(store, str(tmp_path))
+    builder.build()
+    store.add_page(page('GSL 2024', 2, winner='Serral'), 'starcraft2')
+    builder.build()
+    store._retire(store.tournaments.code('BLAST Major'))
+    builder.build()
+
+    manifest = builder.manifest
+    delta = changes_since(manifest, 1)
+    assert delta['version'] == 3 and not delta['reset']
+    assert sorted(delta['changed']) == [GSL, 'games/starcraft2']
+    assert delta['removed'] == [BLAST, 'games/counterstrike']
+    assert changes_since(manifest, 3)['changed'] == {}
+    assert changes_since(manifest, 0)['changed'].keys() == manifest['snapshots'].keys()
+    assert changes_since(manifest, 99)['reset']
+
+def test_server_etags_gzip_and_delta_feed(store, tmp_path):
+    builder = SnapshotBuilder(store, str(tmp_path))
+    builder.build()
+    with SnapshotServer(str(tmp_path), host='127.0.0.1', port=0) as server:
+        url = f'{server.url}/snapshots/{GSL}.json'
+        response = requests.get(url, headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.json()['champion'] == 'Maru'
+        etag = response.headers['ETag']
+
+        assert requests.get(url, headers={'If-None-Match': etag}).status_code == 304
+        assert 'Content-Encoding' not in requests.get(url, headers={'Accept-Encoding': 'identity'}).headers
+        assert requests.get(f'{server.url}/snapshots/events/Unknown.json').status_code == 404
+
+        # A rebuild in the meantime is picked up without restarting the server
+        store.add_page(page('GSL 2024', 2, winner='Serral'), 'starcraft2')
+        builder.build()
+        assert requests.get(url, headers={'If-None-Match': etag}).status_code == 200
+        delta = requests.get(f'{server.url}/changes', params={'since': 1}).json()
+        assert delta['version'] == 2 and GSL in delta['changed']
+        manifest = requests.get(f'{server.url}/manifest')
+        assert manifest.headers['ETag'] == '"v2"'
+        assert requests.get(f'{server.url}/changes', params={'since': 'x'}).status_code == 400
+
+def test_server_gzips_snapshots_without_a_compressed_copy(store, tmp_path):
+    SnapshotBuilder(store, str(tmp_path)).build()
+    (tmp_path / f'{GSL}.json.gz').unlink()
+    with SnapshotServer(str(tmp_path), host='127.0.0.1', port=0) as server:
+        response = requests.get(f'{server.url}/snapshots/{GSL}.json', headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.json()['champion'] == 'Maru'
+
+def test_server_start_raises_when_the_port_is_taken(tmp_path):
+    with SnapshotServer(str(tmp_path), host='127.0.0.1', port=0) as server:
+        port = int(server.url.rsplit(':', 1)[1])
+        with pytest.raises(OSError):
+            SnapshotServer(str(tmp_path), host='127.0.0.1', port=port).start()
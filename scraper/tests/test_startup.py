@@ -0,0 +1,157 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from unittest.mock import Mock, patch
+import pytest
+from src.clients import AsyncLiquipediaClient, LiquipediaClient, SessionStore, TokenBucket
+
+# Wall-clock budget for importing the scraper and building a cache manager in
+# a fresh interpreter; generous for slow CI, far below what redis, requests
+# and aiohttp cost when imported eagerly
+IMPORT_BUDGET = 0.5
+HEAVY_MODULES = ('redis', 'requests', 'aiohttp', 'asyncio', 'numpy')
+
+def test_cold_start_stays_within_import_budget(tmp_path):
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import src.scraper, src.cache, src.clients\n"
+        "from src.cache import CacheManager, RevisionParseCache\n"
+        "manager = CacheManager(redis_url='redis://localhost:6379/0', cache_dir=sys.argv[1])\n"
+        "manager.memory_cache.set('warm', 1, 60)\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script, str(tmp_path)], capture_output=True, text=True, check=True,
+    )
+    elapsed, loaded = result.stdout.splitlines()
+    assert loaded == ''
+    assert float(elapsed) < IMPORT_BUDGET
+    # Nothing was written: the file layer is only opened when used
+    assert list(tmp_path.iterdir()) == []
+
+def test_cache_package_does_not_import_clients():
+    script = (
+        "import sys\n"
+        "from src.cache import RevisionParseCache\n"
+        "print(','.join(m for m in sys.modules if m.startswith('src.clients')))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
+
+def test_sync_client_does_not_import_redis_or_asyncio():
+    script = (
+        "import sys\n"
+        "from src.clients import LiquipediaClient\n"
+        "LiquipediaClient()\n"
+        "print(','.join(m for m in ('redis', 'asyncio') if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
+
+@pytest.fixture
+def stand_in():
+    from benchmarks.server import StandInServer
+    with StandInServer(enforce_limits=False) as server:
+        yield server
+
+@pytest.fixture
+def credentials():
+    with patch.dict(os.environ, {'LIQUIPEDIA_USERNAME': 'bot', 'LIQUIPEDIA_PASSWORD': 'secret'}):
+        yield
+
+def make_client(server, store):
+    unlimited = TokenBucket(10 ** 9, 1)
+    return LiquipediaClient(
+        base_url=f'{server.url}/api.php', limiter=unlimited, parse_limiter=unlimited, session_store=store,
+    )
+
+def test_login_is_lazy_and_persisted(stand_in, credentials, tmp_path):
+    store = SessionStore(str(tmp_path / 'session.json'))
+    client = make_client(stand_in, store)
+    assert stand_in.stats['requests'] == 0
+
+    client.get_page_info('ASL')
+    client.get_page_info('GSL')
+    assert stand_in.stats['action:login'] == 1
+    saved = store.load('bot')
+    assert [cookie['name'] for cookie in saved] == ['liquipedia_session']
+    assert oct(os.stat(store.path).st_mode & 0o777) == '0o600'
+
+    # A restarted worker reuses the session without logging in again
+    restarted = make_client(stand_in, store)
+    restarted.get_page_info('ASL')
+    assert stand_in.stats['action:login'] == 1
+    assert restarted.session.cookies.get('liquipedia_session') == 'stand-in-bot'
+
+def test_expired_session_logs_in_again(stand_in, credentials, tmp_path):
+    store = SessionStore(str(tmp_path / 'session.json'), max_age=0)
+    make_client(stand_in, store).get_page_info('ASL')
+    make_client(stand_in, store).get_page_info('ASL')
+    assert stand_in.stats['action:login'] == 2
+    assert store.load('bot') is None
+    assert SessionStore(store.path).load('someone else') is None
+
+def test_async_client_reuses_persisted_session(stand_in, credentials, tmp_path):
+    store = SessionStore(str(tmp_path / 'session.json'))
+
+    async def scenario():
+        for _ in range(2):
+            before = stand_in.stats['requests']
+            async with AsyncLiquipediaClient(
+                # aiohttp keeps no cookies for bare IP addresses
+                base_url=f"{stand_in.url.replace('127.0.0.1', 'localhost')}/api.php",
+                limiter=TokenBucket(1000, 1), parse_limiter=TokenBucket(1000, 1), session_store=store,
+            ) as client:
+                # Opening the client does not log in; the first request does
+                assert stand_in.stats['requests'] == before
+                await client.get_page_info('ASL')
+
+    asyncio.run(scenario())
+    assert stand_in.stats['action:login'] == 1
+    # Login token and a page query, then the restored session's check and a page query
+    assert stand_in.stats['action:query'] == 4
+
+def test_rejected_session_logs_in_again(stand_in, credentials, tmp_path):
+    store = SessionStore(str(tmp_path / 'session.json'))
+    make_client(stand_in, store).get_page_info('ASL')
+    # The wiki forgot every session, e.g. after its own restart
+    stand_in.sessions.clear()
+    restarted = make_client(stand_in, store)
+    restarted.get_page_info('ASL')
+    assert stand_in.stats['action:login'] == 2
+    assert restarted._logged_in
+    assert store.load('bot') is not None
+
+def test_failed_login_is_retried_later(stand_in, credentials, tmp_path):
+    store = SessionStore(str(tmp_path / 'session.json'))
+    stand_in.login_result = 'Failed'
+    client = make_client(stand_in, store)
+    client.get_page_info('ASL')
+    client.get_page_info('GSL')
+    assert not client._logged_in
+    assert stand_in.stats['action:login'] == 1
+    assert store.load('bot') is None
+
+    stand_in.login_result = 'Success'
+    client._login_retry_at = 0
+    client.get_page_info('ASL')
+    assert client._logged_in and stand_in.stats['action:login'] == 2
+
+def test_login_errors_fall_back_to_anonymous(stand_in, credentials, tmp_path):
+    store = SessionStore(str(tmp_path / 'session.json'))
+    store.save = Mock(side_effect=OSError('read-only file system'))
+    client = make_client(stand_in, store)
+    assert client.get_page_info('ASL')
+    client.get_page_info('GSL')
+    assert not client._logged_in
+    assert client._login_retry_at > time.monotonic()
+    assert stand_in.stats['action:login'] == 1
+
+def test_session_without_cookies_is_not_live(tmp_path):
+    store = SessionStore(str(tmp_path / 'session.json'))
+    store.save('bot', [])
+    assert store.load('bot') is None